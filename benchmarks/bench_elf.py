@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# ELF parser benchmark on synthetic files
+#
+# python benchmarks/bench_elf.py -s 65535 -p 64
+
+# standard
+from optparse import OptionParser
+import os
+import struct
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# self
+from utils.ELFParser import *
+
+BASE_ADDR = 0x400000
+SECTION_SIZE = 0x10
+
+def build_elf64(shnum, phnum):
+    '''
+    ELF64 LSB file with shnum sections and phnum PT_LOAD segments
+    layout: ehdr | phdrs | shstrtab | shdrs
+    [0] NULL, [1] .shstrtab, [2..] ALLOC sections packed from BASE_ADDR
+    '''
+    ehsize, phentsize, shentsize = 64, 56, 64
+    shstrtab = b'\0.s\0.shstrtab\0'
+    phoff = ehsize
+    shstrtab_off = phoff + phnum * phentsize
+    shoff = shstrtab_off + len(shstrtab)
+
+    e_ident = bytes([ELFMAG0, ord(ELFMAG1), ord(ELFMAG2), ord(ELFMAG3), ELFCLASS64, ELFDATA2LSB, EV_CURRENT]) + bytes(9)
+    data = [struct.pack('<16sHHIQQQIHHHHHH', e_ident, ET_EXEC, EM_X86_64, EV_CURRENT, BASE_ADDR, phoff, shoff, 0,
+                        ehsize, phentsize, phnum, shentsize, shnum, 1)]
+
+    span = -(-(shnum - 2) * SECTION_SIZE // phnum)
+    for i in range(phnum):
+        data.append(struct.pack('<IIQQQQQQ', PT_LOAD, PF_R | PF_X, 0, BASE_ADDR + i * span, BASE_ADDR + i * span, span, span, 0x1000))
+    data.append(shstrtab)
+
+    data.append(bytes(shentsize))
+    data.append(struct.pack('<IIQQQQIIQQ', 4, SHT_STRTAB, 0, 0, shstrtab_off, len(shstrtab), 0, 0, 1, 0))
+    for i in range(2, shnum):
+        data.append(struct.pack('<IIQQQQIIQQ', 1, SHT_PROGBITS, SHF_ALLOC | SHF_EXECINSTR, BASE_ADDR + (i - 2) * SECTION_SIZE,
+                                0, SECTION_SIZE, 0, 0, SECTION_SIZE, 0))
+    return b''.join(data)
+
+def naive_section2segment(elffile):
+    # the former every segment x every section loop, kept as reference
+    result = []
+    for phdr in elffile.segment_headers:
+        sections = []
+        if phdr.p_memsz:
+            for index, section in enumerate(elffile.section_headers):
+                if not section.sh_flags & SHF_ALLOC:
+                    continue
+                if not bool(phdr.p_type == PT_TLS) == bool(section.sh_flags & SHF_TLS):
+                    continue
+                if (section.sh_addr >= phdr.p_vaddr) and (section.sh_addr + section.sh_size) <= (phdr.p_vaddr + phdr.p_memsz):
+                    sections.append(elffile.section_names[index])
+        result.append(sections)
+    return result
+
+def timeit(func):
+    starttime = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - starttime
+
+def main():
+    parser = OptionParser(usage = "usage: %prog [options]")
+    parser.add_option("-s", "--sections", dest="shnum", type="int", help="Number of section headers", default=65535)
+    parser.add_option("-p", "--segments", dest="phnum", type="int", help="Number of program headers", default=64)
+    parser.add_option("-n", "--naive-limit", dest="naive_limit", type="int",
+                      help="Skip the reference loop above sections*segments", default=50000000)
+    (options, args) = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix = '.elf') as fw:
+        fw.write(build_elf64(options.shnum, options.phnum))
+        fw.flush()
+        print("synthetic ELF64: %d sections, %d segments, %d bytes" % (options.shnum, options.phnum, os.path.getsize(fw.name)))
+
+        with ELF(fw.name) as elffile:
+            _, elapsed = timeit(lambda: elffile.header)
+            print("header              %8.3f ms" % (elapsed * 1000,))
+            _, elapsed = timeit(lambda: elffile.section_headers)
+            print("section headers     %8.3f ms" % (elapsed * 1000,))
+            _, elapsed = timeit(lambda: elffile.section_names)
+            print("section names       %8.3f ms" % (elapsed * 1000,))
+            _, elapsed = timeit(lambda: elffile.segment_headers)
+            print("segment headers     %8.3f ms" % (elapsed * 1000,))
+            result, elapsed = timeit(elffile.section2segment)
+            print("section2segment     %8.3f ms" % (elapsed * 1000,))
+
+            if options.shnum * options.phnum <= options.naive_limit:
+                expected, elapsed = timeit(lambda: naive_section2segment(elffile))
+                print("reference loop      %8.3f ms  %s" % (elapsed * 1000, 'match' if expected == result else 'MISMATCH'))
+            else:
+                print("reference loop      skipped")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# analyzer version, part of the result cache key
+__version__ = '0.1.1'
@@ -6,48 +6,69 @@
 # email = felicitychou@hotmail.com
 
 # standard
-import binascii
-import hashlib
 import os
-import subprocess
 import sys
 sys.path.append("..")
 
-# third
-import magic
-import ssdeep
-
 # self
-from utils.ELFParser import ELF
+from utils.ELFParser import ELF, DEFAULT_LIMITS
+from utils.Entropy import RegionStats
+from utils.PackerDetector import PackerDetector
+from utils.Hasher import DEFAULT_HASH_TYPES, DEFAULT_CHUNK_SIZE, parse_hash_types
+from utils.StringExtractor import StringExtractor, DEFAULT_MIN_LENGTH, DEFAULT_MAX_COUNT
+
+# digests other analyzers depend on (result path, virustotal)
+REQUIRED_HASH_TYPES = ['md5', 'sha256']
+
+def hash_config(conf):
+    '''
+    conf: [basic]
+    :return Hash_Types (with the required ones), Hash_Chunk_Size
+    '''
+    hash_types = parse_hash_types(conf.get('Hash_Types', ','.join(DEFAULT_HASH_TYPES)))
+    for hash_type in REQUIRED_HASH_TYPES:
+        if hash_type not in hash_types:
+            hash_types.append(hash_type)
+    return hash_types, conf.getint('Hash_Chunk_Size', DEFAULT_CHUNK_SIZE)
+
+# PackerSign_Path rules compiled once per process: {rules_path: (mtime, PackerDetector)}
+PACKER_DETECTORS = {}
+
+def packer_detector(rules_path):
+    mtime = os.path.getmtime(rules_path) if rules_path and os.path.isfile(rules_path) else None
+    cached = PACKER_DETECTORS.get(rules_path)
+    if cached is None or cached[0] != mtime:
+        cached = PACKER_DETECTORS[rules_path] = (mtime, PackerDetector(rules_path = rules_path))
+    return cached[1]
 
 class BasicAnalyzer(object):
 
-    def __init__(self,filepath,logger,conf):
+    def __init__(self,sample,logger,conf):
 
-        self.filepath = filepath
+        # core.sample.Sample, the file is mapped once and shared with the other analyzers
+        self.sample = sample
         self.logger = logger
         self.conf = conf
+        # errors swallowed during run, a result with errors is not reused from the cache
+        self.errors = []
         self.run()
 
     def run(self):
 
         try:
             # get basic info
-            self.filename = os.path.basename(self.filepath)
-            self.filetype = magic.from_file(self.filepath)
-            self.filesize = int(os.path.getsize(self.filepath))
-            # get hash
-            self.md5 = self.hash_file('md5')
-            self.sha256 = self.hash_file('sha256')
-            self.crc32 = self.get_crc32()
-            self.ssdeep = self.get_ssdeep()
-
-            # get strings
+            self.filename = self.sample.filename
+            self.filetype = self.sample.filetype
+            self.filesize = self.sample.size
+            # get hash (self.hashes)
+            self.get_hashes()
+            self.md5 = self.hashes.get('md5')
+            self.sha256 = self.hashes.get('sha256')
+
+            # get strings (self.strings)
             self.get_strings()
-            self.strings = {"ascii":self.ascii_strings,"unicode":self.unicode_strings}
 
             # get packer info (self.packer)
-            self.packer = None
             self.get_packer_info()
 
             # get elf info (self.elf_info)
@@ -57,73 +78,107 @@ class BasicAnalyzer(object):
                 self.elf_info = None
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
+
+    # no error swallowed, the result is worth caching
+    def complete(self):
+        return not self.errors
 
     # output list
     def output(self):
-        #return ['filename','filetype','filesize','md5','sha256','crc32','ssdeep','strings','packer','elf_info']
-        return {
+        #return ['filename','filetype','filesize',<hash types>,'strings','packer','elf_info']
+        output = {
             'filename':self.filename,
             'filetype':self.filetype,
             'filesize':self.filesize,
-            'md5':self.md5,
-            'sha256':self.sha256,
-            'crc32':self.crc32,
-            'ssdeep':self.ssdeep,
             'strings':self.strings,
             'packer':self.packer,
             'elf_info':self.elf_info,
         }
+        output.update(self.hashes)
+        return output
 
-    # get packer info:
+    # get packer info: upx headers/sections and PackerSign_Path yara rules, no external upx
     def get_packer_info(self):
-        # ELF (UPX)
-        cmd = [self.conf["UPX_Path"],"-q", "-t",self.filepath]
-        output = subprocess.getoutput(cmd)
-        if -1!=output.find("[OK]"):
-            self.packer = "upx"
-        else:
-            self.packer = None
-    
-    # get elf info
-    def get_elf_info(self):
-        self.elf_info = {}
-        elffile  = ELF(self.filepath)
-
-        self.elf_info['header'] = elffile.OutputELFHeader()
-        self.elf_info['section_headers'] = elffile.OutputELFShdr()
-        self.elf_info['segment_headers'] = elffile.OutputELFPhdr()
-
-
-    # get strings unicode and ascii 
-    def get_strings(self):
-        # linux return string list
+        self.packer = None
         try:
-            self.ascii_strings = subprocess.check_output(["strings", "-a", self.filepath]).decode().splitlines()
-            self.unicode_strings = subprocess.check_output(["strings", "-a", "-el", self.filepath]).decode().splitlines()
+            detector = packer_detector(self.conf.get('PackerSign_Path'))
+            if self.sample.size == 0:
+                return
+            section_names = []
+            try:
+                with ELF(data = self.sample.data, hardened = True, limits = self.elf_limits()) as elffile:
+                    section_names = elffile.section_names
+            except Exception:
+                # not an ELF or no usable section table (common for packed samples)
+                pass
+            self.packer = detector.detect(self.sample.buffer, section_names)
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
+    
+    # [basic] ELF_Max_Sections, ELF_Max_Read ... override DEFAULT_LIMITS
+    def elf_limits(self):
+        return dict((key, self.conf.getint('ELF_' + key.title(), value)) for key, value in DEFAULT_LIMITS.items())
 
-    # get hash ('md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512')
-    def hash_file(self, hash_type):
-        try:
-            hash_handle = getattr(hashlib, hash_type)()
-            with open(self.filepath, 'rb') as file:
-                hash_handle.update(file.read())
-            return hash_handle.hexdigest()
-        except Exception as e:
-            self.logger.exception('%s: %s' % (Exception, e))
-        
-    # get crc32
-    def get_crc32(self):
+    # get elf info, malformed tables are reported in elf_info['anomalies'] with whatever could be read
+    def get_elf_info(self):
+        self.elf_info = {}
+        limits = self.elf_limits()
+        with ELF(data = self.sample.data, hardened = True, limits = limits) as elffile:
+            # filled in as the tables are read, kept even if a later step fails
+            self.elf_info['anomalies'] = elffile.anomalies
+            self.elf_info['header'] = elffile.OutputELFHeader()
+            self.elf_info['section_headers'] = elffile.OutputELFShdr()
+            self.elf_info['segment_headers'] = elffile.OutputELFPhdr()
+            self.elf_info['symbols'] = elffile.OutputELFSymbols()
+            self.elf_info['dynamic'] = elffile.OutputELFDynamic()
+            self.elf_info['relocations'] = elffile.OutputELFRelocations()
+
+            # linking info for import based clustering
+            self.elf_info['needed'] = elffile.needed
+            self.elf_info['soname'] = elffile.soname
+            self.elf_info['rpath'] = elffile.rpath
+            self.elf_info['runpath'] = elffile.runpath
+            self.elf_info['imports'] = elffile.imports()
+            self.elf_info['exports'] = elffile.exports()
+
+            # entropy, byte histogram and md5 per section / segment, plus whole file entropy
+            section_ranges = [elffile.section_range(i) for i in range(len(elffile.section_headers))]
+            segment_ranges = [elffile.segment_range(i) for i in range(len(elffile.segment_headers))]
+            # region md5s get what table decoding left of max_read, not a budget of their own
+            region_stats = RegionStats(elffile.data, section_ranges + segment_ranges,
+                                       max_hash_bytes = max(limits['max_read'] - elffile.bytes_read, 0))
+            try:
+                for shdr, (offset, size) in zip(self.elf_info['section_headers'], section_ranges):
+                    shdr.update(region_stats.stats(offset, size))
+                for phdr, (offset, size) in zip(self.elf_info['segment_headers'], segment_ranges):
+                    phdr.update(region_stats.stats(offset, size))
+                self.elf_info['entropy'] = region_stats.entropy()
+            finally:
+                region_stats.close()
+            if region_stats.hash_skipped:
+                elffile.anomalies.append('region md5: %d regions skipped, max_read %d exhausted' % (region_stats.hash_skipped, limits['max_read']))
+
+
+    # get strings ascii, unicode (utf-16le) and unicode_be (utf-16be) with file offsets
+    def get_strings(self):
+        self.strings = None
         try:
-            with open(self.filepath, 'rb') as file:
-                return '%x' % (binascii.crc32(file.read()) & 0xffffffff)
+            extractor = StringExtractor(min_length = self.conf.getint('Strings_Min_Length', DEFAULT_MIN_LENGTH),
+                                        max_count = self.conf.getint('Strings_Max_Count', DEFAULT_MAX_COUNT))
+            self.strings = extractor.extract(self.sample.buffer)
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
 
-    # get ssdeep
-    def get_ssdeep(self):
+    # get hash ('md5', 'sha1', 'sha256', 'sha512', 'crc32', 'ssdeep' ...)
+    # one pass over the mapped sample feeds every digest not computed yet
+    def get_hashes(self):
+        self.hashes = {}
         try:
-            return ssdeep.hash_from_file(self.filepath)
+            hash_types, chunk_size = hash_config(self.conf)
+            self.hashes = self.sample.hashes(hash_types, chunk_size = chunk_size)
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
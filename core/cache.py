@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# self
+from core import __version__
+
+STAGES = ['basic', 'static', 'dynamic']
+
+DEFAULT_MAX_AGE = 7 * 24 * 3600     # seconds
+DEFAULT_MAX_SIZE = 10240            # MB
+DEFAULT_EVICT_INTERVAL = 3600       # seconds
+
+class ResultCache(object):
+    '''
+    Content addressed result cache.
+
+    Result_Path/<sha256>/<stage>.json   stage result
+    Result_Path/<sha256>/<stage>.key    analyzer version + stage config digest
+    '''
+
+    EVICT_MARK = '.last_evict'
+
+    def __init__(self,result_path,logger,conf):
+        self.result_path = result_path
+        self.logger = logger
+        self.enabled = conf.getboolean('Cache', True)
+        self.max_age = conf.getint('Cache_Max_Age', DEFAULT_MAX_AGE)
+        self.max_size = conf.getint('Cache_Max_Size', DEFAULT_MAX_SIZE) * 1024 * 1024
+        self.evict_interval = conf.getint('Cache_Evict_Interval', DEFAULT_EVICT_INTERVAL)
+
+    def sample_path(self,sha256):
+        return os.path.join(self.result_path, sha256)
+
+    def key(self,stage,conf,sources = ''):
+        # a result is reusable while the analyzer version, its config section and
+        # sources (e.g. the yara rules digest) are unchanged
+        digest = hashlib.sha256()
+        digest.update(('%s\n%s\n' % (__version__, stage)).encode())
+        if sources:
+            digest.update(('sources=%s\n' % (sources,)).encode())
+        for option, value in sorted(conf.items()):
+            digest.update(('%s=%s\n' % (option, value)).encode())
+        return digest.hexdigest()
+
+    def lookup(self,sha256,stage,key):
+        '''
+        :return path of the cached <stage>.json or None
+        '''
+        if not self.enabled:
+            return None
+        path = self.sample_path(sha256)
+        result_file = os.path.join(path, '%s.json' % (stage,))
+        try:
+            with open(os.path.join(path, '%s.key' % (stage,))) as fr:
+                if fr.read().strip() != key:
+                    return None
+            if time.time() - os.path.getmtime(result_file) > self.max_age:
+                return None
+            # mark as recently used for size based eviction
+            os.utime(path)
+        except (IOError, OSError):
+            return None
+        return result_file
+
+    def store(self,sha256,stage,key,result,complete = True):
+        '''
+        complete: False for a result an error cut short (network, timeout, no sandbox),
+        it is written for the current run but never served by lookup
+        '''
+        path = self.sample_path(sha256)
+        os.makedirs(path, exist_ok = True)
+        key_file = os.path.join(path, '%s.key' % (stage,))
+        if not complete:
+            # drop the key first, an older key must not validate the new result
+            try:
+                os.unlink(key_file)
+            except FileNotFoundError:
+                pass
+        self._write(os.path.join(path, '%s.json' % (stage,)), json.dumps(result))
+        if complete:
+            self._write(key_file, key)
+
+    def _write(self,filepath,content):
+        # write then rename so concurrent readers never see a partial file
+        fd, tmppath = tempfile.mkstemp(dir = os.path.dirname(filepath), prefix = '.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fw:
+                fw.write(content)
+            # mkstemp creates 0600, keep results readable like before
+            os.chmod(tmppath, 0o644)
+            os.replace(tmppath, filepath)
+        except Exception:
+            os.unlink(tmppath)
+            raise
+
+    def evict(self,force = False):
+        '''
+        Drop entries unused for Cache_Max_Age, then the least recently used
+        ones until the tree fits in Cache_Max_Size. Runs at most once per
+        Cache_Evict_Interval unless forced.
+        '''
+        if not os.path.isdir(self.result_path):
+            # nothing stored yet
+            return
+        mark = os.path.join(self.result_path, self.EVICT_MARK)
+        now = time.time()
+        if not force and os.path.exists(mark) and now - os.path.getmtime(mark) < self.evict_interval:
+            return
+        with open(mark, 'w'):
+            pass
+
+        entries = []
+        for name in os.listdir(self.result_path):
+            path = os.path.join(self.result_path, name)
+            if not os.path.isdir(path):
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - mtime > self.max_age:
+                self._remove(path)
+                continue
+            entries.append((mtime, self._size(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def _size(self,path):
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return size
+
+    def _remove(self,path):
+        self.logger.info("Evict cached result %s" % (path,))
+        shutil.rmtree(path, ignore_errors = True)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+# self
+from core.cache import STAGES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8421
+DEFAULT_WORKERS = 1
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MAX_JOBS = 10000            # finished jobs kept for status/result
+# seconds a client is told to wait when the queue is full
+RETRY_AFTER = 5
+MAX_REQUEST_SIZE = 64 * 1024
+
+MODES = ['basic', 'static', 'dynamic', 'all']
+
+
+class Job(object):
+
+    def __init__(self,filepath,mode,refresh):
+        self.id = uuid.uuid4().hex
+        self.filepath = filepath
+        self.mode = mode
+        self.refresh = refresh
+        self.status = 'queued'      # queued / running / done / failed
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result_path = None
+        self.stages = []
+        self.error = None
+
+    def output(self):
+        return {
+            'id':self.id,
+            'filepath':self.filepath,
+            'mode':self.mode,
+            'status':self.status,
+            'submitted':self.submitted,
+            'started':self.started,
+            'finished':self.finished,
+            'result_path':self.result_path,
+            'stages':self.stages,
+            'error':self.error,
+        }
+
+
+class AnalysisDaemon(object):
+    '''
+    Long running analysis service, config, imports and compiled rules stay warm.
+
+    POST /jobs              {"filepath": ..., "mode": "static", "refresh": [] / ["static"] / "all"}
+                            202 job, 503 + Retry-After while the queue is full
+    GET  /jobs/<id>         job status
+    GET  /jobs/<id>/result  {stage: result}, 409 until the job is done
+    GET  /status            queue depth and job counts
+
+    analyze(filepath, mode, refresh) -> (result_path, {stage: result})
+    '''
+
+    def __init__(self,analyze,logger,conf):
+        self.analyze = analyze
+        self.logger = logger
+        self.host = conf.get('Daemon_Host', DEFAULT_HOST)
+        self.port = conf.getint('Daemon_Port', DEFAULT_PORT)
+        self.workers = conf.getint('Daemon_Workers', DEFAULT_WORKERS)
+        self.max_jobs = conf.getint('Daemon_Max_Jobs', DEFAULT_MAX_JOBS)
+        # bounded, a full queue is reported to the client instead of growing without limit
+        self.queue = queue.Queue(maxsize = conf.getint('Daemon_Queue_Size', DEFAULT_QUEUE_SIZE))
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.server = None
+
+    def submit(self,filepath,mode = 'static',refresh = ()):
+        '''
+        :return Job, or None when the queue is full
+        '''
+        job = Job(filepath = filepath,mode = mode,refresh = list(refresh))
+        with self.lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                return None
+            self.jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self,job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def status(self):
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {'queue':self.queue.qsize(), 'queue_size':self.queue.maxsize, 'workers':self.workers, 'jobs':counts}
+
+    def _prune(self):
+        # drop the oldest finished jobs, queued and running ones are always kept
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].status in ('done', 'failed'):
+                del self.jobs[job_id]
+                excess -= 1
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            job.status, job.started = 'running', time.time()
+            try:
+                job.result_path, results = self.analyze(job.filepath, job.mode, job.refresh)
+                job.stages = list(results)
+                job.status = 'done'
+            except Exception as e:
+                self.logger.exception('%s: %s' % (Exception, e))
+                job.error, job.status = '%s' % (e,), 'failed'
+            job.finished = time.time()
+            self.logger.info("Job %s %s %s in %.3fs" % (job.id, job.filepath, job.status, job.finished - job.started))
+
+    def result(self,job):
+        # stage files are passed through as they are, no decode / encode of large results
+        parts = []
+        for stage in job.stages:
+            with open(os.path.join(job.result_path, '%s.json' % (stage,)), 'rb') as fr:
+                parts.append(json.dumps(stage).encode() + b':' + fr.read())
+        return b'{' + b','.join(parts) + b'}'
+
+    def serve_forever(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target = self._work, name = 'rudolf-worker-%d' % (i,), daemon = True)
+            thread.start()
+            self.threads.append(thread)
+        self.server = ThreadingHTTPServer((self.host, self.port), DaemonRequestHandler)
+        self.server.analysis_daemon = self
+        self.logger.info("Daemon listening on http://%s:%d workers:%d queue:%d" % (self.host, self.server.server_port, self.workers, self.queue.maxsize))
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.stop()
+
+    def shutdown(self):
+        # from another thread / signal handler
+        if self.server is not None:
+            threading.Thread(target = self.server.shutdown).start()
+
+    def stop(self):
+        # queued jobs are dropped, running ones finish
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self,format,*args):
+        self.server.analysis_daemon.logger.debug("%s %s" % (self.address_string(), format % args))
+
+    def send_json(self,code,body,headers = ()):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header in headers:
+            self.send_header(*header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        daemon = self.server.analysis_daemon
+        if self.path.rstrip('/') != '/jobs':
+            return self.send_json(404, {'error':'not found'})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_SIZE:
+            return self.send_json(413, {'error':'request too large'})
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            filepath = request['filepath']
+            mode = request.get('mode', 'static')
+            refresh = request.get('refresh', [])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self.send_json(400, {'error':'bad request: %s' % (e,)})
+        # "all" or a list of stage names, like -r
+        if refresh == 'all':
+            refresh = STAGES
+        if not isinstance(refresh, list) or not all(stage in STAGES for stage in refresh):
+            return self.send_json(400, {'error':'refresh must be "all" or a list of %s' % (', '.join(STAGES),)})
+        if not isinstance(filepath, str) or not filepath:
+            return self.send_json(400, {'error':'filepath must be a non-empty string'})
+        if mode not in MODES:
+            return self.send_json(400, {'error':'mode must be one of %s' % (', '.join(MODES),)})
+        if not os.path.isfile(filepath):
+            return self.send_json(400, {'error':'no such file: %s' % (filepath,)})
+        job = daemon.submit(filepath = os.path.abspath(filepath),mode = mode,refresh = refresh)
+        if job is None:
+            return self.send_json(503, {'error':'queue full'}, [('Retry-After', str(RETRY_AFTER))])
+        self.send_json(202, job.output(), [('Location', '/jobs/%s' % (job.id,))])
+
+    def do_GET(self):
+        daemon = self.server.analysis_daemon
+        parts = [part for part in self.path.split('?', 1)[0].split('/') if part]
+        if parts == ['status']:
+            return self.send_json(200, daemon.status())
+        if len(parts) not in (2, 3) or parts[0] != 'jobs' or (len(parts) == 3 and parts[2] != 'result'):
+            return self.send_json(404, {'error':'not found'})
+        job = daemon.get(parts[1])
+        if job is None:
+            return self.send_json(404, {'error':'no such job'})
+        if len(parts) == 2:
+            return self.send_json(200, job.output())
+        if job.status != 'done':
+            return self.send_json(409, job.output())
+        try:
+            self.send_json(200, daemon.result(job))
+        except (IOError, OSError) as e:
+            # evicted from the result cache in the meantime
+            self.send_json(410, {'error':'%s' % (e,)})
@@ -8,32 +8,55 @@
 import os
 import time
 import random
-from configparser import ConfigParser
 
-import paramiko
 import pexpect
 
+from core.supervisor import Watch, get_supervisor
+from utils.ELFParser import ELF, ELFCLASS32, ELFCLASS64, ELFDATA2LSB, ELFDATA2MSB, EM_386, EM_ARM, EM_MIPS, EM_PPC, EM_X86_64
+
+# (EI_CLASS, EI_DATA, e_machine) -> sandbox platform
+ELFPLATFORM = {
+    (ELFCLASS32, ELFDATA2LSB, EM_ARM):'arm',
+    (ELFCLASS32, ELFDATA2LSB, EM_386):'x86',
+    (ELFCLASS32, ELFDATA2MSB, EM_MIPS):'mips',
+    (ELFCLASS32, ELFDATA2LSB, EM_MIPS):'mipsel',
+    (ELFCLASS32, ELFDATA2MSB, EM_PPC):'powerpc',
+    (ELFCLASS64, ELFDATA2LSB, EM_X86_64):'x86-64',
+}
+
 
 class DynamicAnalyzer(object):
 
-    def __init__(self,filepath,filetype,result_path,sandbox_id,logger,conf):
-        self.filepath = filepath
+    def __init__(self,sample,filetype,result_path,pool,logger,conf):
+        # core.sample.Sample, uploaded from its mapping
+        self.sample = sample
+        self.filepath = sample.filepath
         self.filetype = filetype
         self.result_path = result_path
-        self.sandbox_id = sandbox_id
+        # core.sandbox.SandboxPool, a warm vm of the platform is leased for the run
+        self.pool = pool
         self.logger = logger
         self.conf = conf
+        # errors swallowed during run, a result with errors is not reused from the cache
+        self.errors = []
         self.run()
 
-    def _get_qemu_conf(self):
-        config = ConfigParser()
-        config.read_file(open('rudolf.cfg'))
-        return config['qemu-%s-%s'% (self.platform,self.sandbox_id)]
-
     def _identify_platform(self):
         '''
         :return self.platform
         '''
+        # only e_ident and e_machine are decoded, section/segment tables are left alone
+        self.platform = None
+        try:
+            with ELF(data = self.sample.data, hardened = True) as elffile:
+                if elffile.elffile is not None:
+                    self.platform = ELFPLATFORM.get((elffile.e_ident.e_class, elffile.e_ident.e_data, elffile.header.e_machine))
+        except Exception as e:
+            self.logger.exception('%s: %s' % (Exception, e))
+        if not self.platform:
+            self._identify_platform_from_filetype()
+
+    def _identify_platform_from_filetype(self):
         filetype = self.filetype
         self.platform = None
         if "ELF 32-bit" in filetype:
@@ -65,129 +88,118 @@ class DynamicAnalyzer(object):
         if not self.platform:
             return
 
-        # get qemu conf
-        qemu_conf = self._get_qemu_conf()
-        host = qemu_conf['ip']
-        port = int(qemu_conf['port'])
-        user = qemu_conf['user']
-        password = qemu_conf['password']
-        macaddr = qemu_conf['macaddr']
+        # wait for a free sandbox of the platform, it is reverted to its snapshot when released
+        try:
+            sandbox = self.pool.lease(self.platform)
+        except Exception as e:
+            self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
+            return
+        try:
+            self.execute(sandbox)
+        finally:
+            self.pool.release(sandbox)
 
+    def execute(self,sandbox):
+        host = sandbox.host
+        port = sandbox.port
+        qemu = sandbox.qemu
+        # one ssh transport for every guest command and transfer of this run
+        session = sandbox.session
 
         # A randomly generated sandbox filename
         dst_binary_filepath = "/tmp/" + ("".join(chr(random.choice(range(97,123))) for _ in range(random.choice(range(6,12)))))
 
-        # start machine
-        qemu_command = self.qemu_commands()
-
-        qemu_command += " -net nic,macaddr=%s -net tap -monitor stdio" % (macaddr,)
-        self.logger.info(qemu_command)
-        qemu = pexpect.spawn(qemu_command)
+        pcapture = None
         try:
-            qemu.expect("(qemu).*")
-            qemu.sendline("info network")
-            qemu.expect("(qemu).*")
-            ifname =  qemu.before.decode().split("ifname=", 1)[1].split(",", 1)[0]
-            qemu.sendline("loadvm init")
-            qemu.expect("(qemu).*")
-            # copy sample
-            self.scp(host=host, port=port, user=user, password=password, src_file = self.filepath, dst_file = dst_binary_filepath, mode = 'put')
+            # copy sample, no second open of the sample
+            with self.sample.stream() as stream:
+                session.put(stream, dst_binary_filepath, file_size = self.sample.size)
             # Pre binary execution commands
-            pre_exec = self.ssh_execute(host=host, port=port, user=user, password=password,commands = ["chmod +x %s" % (dst_binary_filepath,)])
+            pre_exec = session.execute(["chmod +x %s" % (dst_binary_filepath,)])
             # Start Packet Capture
             pcap_command = "/usr/bin/dumpcap -i %s -P -w %s -f 'not ((tcp dst port %d and ip dst host %s) or (tcp src port %d and ip src host %s))'"
             pcap_filepath = os.path.join(self.result_path, "pcap")
-            pcapture = pexpect.spawn(pcap_command % (ifname, pcap_filepath, port, host, port, host))
-
+            pcapture = pexpect.spawn(pcap_command % (sandbox.ifname, pcap_filepath, port, host, port, host))
             # wait for pcapture to start and then Execute the binary
             time.sleep(5)
-            stace_log = '/tmp/strace.log'
-            command_to_exec = "strace -ttt -x -o %s -f %s" % (stace_log,dst_binary_filepath)
+            # strace output is piped (-o "|cmd") to fd 3 = the channel stdout and streamed into
+            # result_path while the sample runs, the sample's own stdout / stderr are dropped.
+            # fd 3 is closed before the sample is exec'd, it cannot write to or close the trace
+            command_to_exec = "strace -ttt -x -f -o '|cat >&3' sh -c 'exec 3>&-; exec %s' 3>&1 >/dev/null 2>&1" % (dst_binary_filepath,)
             print("Executing %s" % (command_to_exec,))
-            exec_ssh = self.ssh_execute(host, port, user, password, command_to_exec, True, False)
-
-            starttime = time.time()
-            while time.time() < starttime + int(self.conf['Timeout']):
-                if not qemu.isalive():
-                    exec_time = 0
+            exec_channel = session.start(command_to_exec)
+
+            # sleep until the traced process tree or the vm exits, the run goes idle
+            # (no syscall, no packet for Idle_Timeout) or Timeout, the supervisor thread
+            # watches the qemu and dumpcap ptys and the exec channel of every sandbox
+            timeout = int(self.conf['Timeout'])
+            idle_timeout = self.conf.getint('Idle_Timeout', 0)
+            strace_logpath = os.path.join(self.result_path,'strace.log')
+            with open(strace_logpath, 'wb') as strace_log:
+                starttime = time.time()
+                watch = Watch(name = sandbox.name, deadline = starttime + timeout,
+                              on_data = lambda kind, data: strace_log.write(data) if kind == 'exec' else None,
+                              idle_timeout = idle_timeout or None)
+                watch.add_process('qemu', qemu)
+                watch.add_process('pcap', pcapture, ends_run = False)
+                watch.add_probe('pcap', lambda: os.path.getsize(pcap_filepath))
+                watch.add_channel('exec', exec_channel, activity = True)
+                stop_reason = get_supervisor(self.logger).supervise(watch)
+            if stop_reason == 'error':
+                self.errors.append('sandbox run not supervised')
+            exit_status = exec_channel.recv_exit_status() if stop_reason == 'exited' else None
+
+            post_exec = None
             if qemu.isalive():
                 # Post binary execution commands
-                post_exec = self.ssh_execute(host, port, user, password, ["ps aux"])
-                strace_logpath = os.path.join(self.result_path,'strace.log')
-                self.scp(host = host, port = port, user = user, password = password, src_file = stace_log, dst_file = strace_logpath, mode = 'get')
                 try:
-                    if exec_ssh != None:
-                        exec_ssh.close()
+                    post_exec = session.execute(["ps aux"])
                 except Exception as e:
-                    self.logger.info("Error while logging out exec_ssh: %s" % (e,))
-                qemu.sendline("q")
+                    self.logger.info("Error while running post exec commands: %s" % (e,))
+                exec_channel.close()
 
             # Stop Packet Capture
             if pcapture.isalive():
                 pcapture.close()
 
             endtime = time.time()
-            #result = {'start_time': sandbox_starttime, 'end_time': sandbox_endtime, 'pcap_filepath': pcap_filepath}
-            #result['post_exec_result'] = post_exec
+            self.result = {
+                'platform':self.platform,
+                'sandbox':sandbox.name,
+                'start_time':starttime,
+                'end_time':endtime,
+                'duration':round(watch.finished - starttime, 3),
+                'stop_reason':stop_reason,                                      # exited / idle / vm_exit / timeout / error
+                'time_saved':round(max(0, watch.deadline - watch.finished), 3),   # of the Timeout budget
+                'timeout':timeout,
+                'idle_timeout':idle_timeout,
+                'exit_status':exit_status,
+                'syscalls':self.count_lines(strace_logpath),
+                'strace_log':strace_logpath,
+                'pcap':pcap_filepath,
+                'pcap_size':os.path.getsize(pcap_filepath) if os.path.exists(pcap_filepath) else 0,
+                'post_exec':post_exec,
+            }
+            self.logger.info("Sandbox run stopped: %s after %.1fs, %.1fs saved" % (stop_reason, self.result['duration'], self.result['time_saved']))
 
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
-            if qemu.isalive():
-                qemu.close()
-            return {}
+            self.errors.append('%s' % (e,))
+            if pcapture is not None and pcapture.isalive():
+                pcapture.close()
 
-        #return result
+    # no error swallowed, the result is worth caching
+    def complete(self):
+        return not self.errors
 
     def output(self):
-        return None
-
-    def qemu_commands(self):
-        platform = self.platform
-        sandbox_id = self.sandbox_id
-        if platform == "x86":
-            return "sudo qemu-system-i386 -hda qemu/x86/%s/debian_wheezy_i386_standard.qcow2 -vnc 127.0.0.1:1%s" % (sandbox_id, sandbox_id, )
-        if platform == "x86-64":
-            return "sudo qemu-system-x86_64 -hda qemu/x86-64/%s/debian_wheezy_amd64_standard.qcow2 -vnc 127.0.0.1:2%s" % (sandbox_id, sandbox_id,)
-        if platform == "mips":
-            return 'sudo qemu-system-mips -M malta -kernel qemu/mips/%s/vmlinux-3.2.0-4-4kc-malta -hda qemu/mips/%s/debian_wheezy_mips_standard.qcow2 -append "root=/dev/sda1 console=tty0" -vnc 127.0.0.1:3%s'  % (sandbox_id, sandbox_id, sandbox_id,)
-        if platform == "mipsel":
-            return 'sudo qemu-system-mipsel -M malta -kernel qemu/mipsel/%s/vmlinux-3.2.0-4-4kc-malta -hda qemu/mipsel/%s/debian_wheezy_mipsel_standard.qcow2 -append "root=/dev/sda1 console=tty0" -vnc 127.0.0.1:4%s'  % (sandbox_id, sandbox_id, sandbox_id, )
-        if platform == "arm":
-            return 'sudo qemu-system-arm -M versatilepb -kernel qemu/arm/%s/vmlinuz-3.2.0-4-versatile -initrd qemu/arm/%s/initrd.img-3.2.0-4-versatile -hda qemu/arm/%s/debian_wheezy_armel_standard.qcow2 -append "root=/dev/sda1" -vnc 127.0.0.1:5%s'  % (sandbox_id, sandbox_id, sandbox_id, sandbox_id,)
-        return None
-
-
-    def ssh_execute(self, host, port, user, password, commands, noprompt = False, logout = True):
-        result = None
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        try:
-            ssh.connect(host, port = port, username = user, password = password)
-            if type(commands) == type(str()):
-                stdin, stdout, stderr = ssh.exec_command(commands, timeout = 10)
-                if noprompt == False:
-                    result = "".join(stdout.readlines())
-            if type(commands) == type(list()):
-                result = {}
-                for command in commands:
-                    stdin, stdout, stderr = ssh.exec_command(command, timeout = 10)
-                    result[command] = "".join(stdout.readlines())
-            if logout:
-                ssh.close()
-            else:
-                return ssh  # Return SSH object to logout later
-        except Exception as e:
-            self.logger.exception('%s: %s' % (Exception, e))
-        return result
-
-
-    def scp(self, host, port, user, password, src_file, dst_file, mode):
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        try:
-            ssh.connect(host, port = port, username = user, password = password)
-            sftp = ssh.open_sftp()
-            getattr(sftp,mode)(src_file, dst_file)
-            #sftp.put(src_file, dst_file)
-        except Exception as e:
-            self.logger.exception('%s: %s' % (Exception, e))
+        return getattr(self,'result',None)
+
+    def count_lines(self, filepath):
+        # strace lines ~ syscalls (unfinished / resumed pairs count twice)
+        count = 0
+        with open(filepath, 'rb') as fr:
+            for block in iter(lambda: fr.read(1024 * 1024), b''):
+                count += block.count(b'\n')
+        return count
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+import socket
+import threading
+import time
+
+# third
+import paramiko
+
+DEFAULT_KEEPALIVE = 15              # seconds
+DEFAULT_CONNECT_TIMEOUT = 60        # seconds to wait for sshd, e.g. right after loadvm
+DEFAULT_COMMAND_TIMEOUT = 10        # seconds per command
+
+
+class GuestSession(object):
+    '''
+    One authenticated SSH transport to a sandbox guest, shared by command
+    execution, uploads and downloads (one key exchange instead of one per call).
+
+    The transport is opened on first use and again whenever it is found dead.
+    Call reset() after loadvm: the restored guest knows nothing of the old
+    connection, the next call reconnects.
+    '''
+
+    # errors of a dead or half-open transport, the call is retried once on a new one.
+    # socket.timeout is a socket.error too but means a slow command, it is never retried
+    RETRY_ERRORS = (paramiko.SSHException, EOFError, socket.error)
+
+    def __init__(self,host,port,user,password,logger,keepalive = DEFAULT_KEEPALIVE,
+                 connect_timeout = DEFAULT_CONNECT_TIMEOUT,command_timeout = DEFAULT_COMMAND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.logger = logger
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.transport = None
+        self.sftp_client = None
+        self.lock = threading.RLock()
+
+    def connect(self):
+        deadline = time.time() + self.connect_timeout
+        while True:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout = max(1, min(10, deadline - time.time())))
+                transport = paramiko.Transport(sock)
+                transport.start_client(timeout = self.command_timeout)
+                transport.auth_password(self.user, self.password)
+                transport.set_keepalive(self.keepalive)
+                self.transport = transport
+                self.logger.info("SSH session to %s:%s opened" % (self.host, self.port))
+                return transport
+            except (paramiko.SSHException, EOFError, socket.error) as e:
+                # sshd of a just restored guest needs a moment
+                if time.time() >= deadline:
+                    raise
+                time.sleep(1)
+
+    def ensure(self):
+        with self.lock:
+            if self.transport is None or not self.transport.is_active():
+                self.reset()
+                self.connect()
+            return self.transport
+
+    def reset(self):
+        with self.lock:
+            if self.sftp_client is not None:
+                try:
+                    self.sftp_client.close()
+                except Exception:
+                    pass
+            if self.transport is not None:
+                self.transport.close()
+            self.sftp_client, self.transport = None, None
+
+    def call(self,func):
+        # func must be safe to run twice
+        try:
+            return func()
+        except socket.timeout:
+            raise
+        except self.RETRY_ERRORS as e:
+            self.logger.info("SSH session to %s:%s lost (%s), reconnecting" % (self.host, self.port, e))
+            self.reset()
+            return func()
+
+    def execute(self,commands,timeout = None):
+        '''
+        commands: str -> stdout, [str, ...] -> {command: stdout}
+        a command is run again when the transport dies under it, use start() for
+        anything that must not run twice
+        '''
+        if isinstance(commands, str):
+            return self.call(lambda: self._execute(commands, timeout))
+        return dict((command, self.call(lambda: self._execute(command, timeout))) for command in commands)
+
+    def _execute(self,command,timeout):
+        channel = self.ensure().open_session()
+        try:
+            channel.settimeout(timeout or self.command_timeout)
+            channel.exec_command(command)
+            output = channel.makefile('rb').read()
+            channel.recv_exit_status()
+            return output.decode(errors = 'replace')
+        finally:
+            channel.close()
+
+    def start(self,command):
+        '''
+        start command without waiting for it, it is sent at most once
+        (only opening the channel is retried)
+        :return channel, exit_status_ready() once it ends
+        '''
+        channel = self.call(lambda: self.ensure().open_session())
+        channel.exec_command(command)
+        return channel
+
+    def sftp(self):
+        with self.lock:
+            transport = self.ensure()
+            if self.sftp_client is None:
+                self.sftp_client = paramiko.SFTPClient.from_transport(transport)
+            return self.sftp_client
+
+    def put(self,fileobj,dst_file,file_size = 0):
+        def put():
+            fileobj.seek(0)
+            return self.sftp().putfo(fileobj, dst_file, file_size = file_size)
+        return self.call(put)
+
+    def get(self,src_file,dst_file):
+        return self.call(lambda: self.sftp().get(src_file, dst_file))
+
+    def close(self):
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
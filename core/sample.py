@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+from functools import cached_property
+import io
+import mmap
+import os
+import sys
+sys.path.append("..")
+
+# third
+import magic
+
+# self
+from utils.Hasher import Hasher, DEFAULT_CHUNK_SIZE
+
+class Sample(object):
+    '''
+    One sample file, opened and mapped once and shared by every analyzer.
+
+    filepath, filename, size
+    buffer: read-only mmap of the file (b'' for an empty file), has find / rfind / read
+    data: memoryview of buffer, slices are zero-copy
+    '''
+
+    def __init__(self,filepath):
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+        self.file = open(filepath, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        # an empty file can not be mapped
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ) if self.size else None
+        self.buffer = self.mmap if self.mmap is not None else b''
+        self.data = memoryview(self.buffer)
+        self.digests = {}
+
+    @cached_property
+    def filetype(self):
+        # libmagic reads through the open descriptor
+        return magic.from_descriptor(self.file.fileno())
+
+    def hashes(self,hash_types,chunk_size = DEFAULT_CHUNK_SIZE):
+        # digests not computed yet are fed from the mapping in one pass
+        missing = [hash_type for hash_type in hash_types if hash_type not in self.digests]
+        if missing:
+            self.digests.update(Hasher(hash_types = missing, chunk_size = chunk_size).hash_buffer(self.data))
+        return dict((hash_type, self.digests[hash_type]) for hash_type in hash_types)
+
+    @property
+    def md5(self):
+        return self.hashes(['md5'])['md5']
+
+    @property
+    def sha256(self):
+        return self.hashes(['sha256'])['sha256']
+
+    def stream(self):
+        # file-like object over the file (paramiko putfo ...), a mapping of its own so the
+        # read position is not shared with find / read on buffer from other threads
+        if self.mmap is None:
+            return io.BytesIO(b'')
+        return mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def close(self):
+        self.data.release()
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # a view is still alive somewhere, the mapping goes with its last reference
+                pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+from contextlib import contextmanager
+import atexit
+import queue
+import re
+import threading
+
+# third
+import pexpect
+
+# self
+from core.guest import GuestSession, DEFAULT_KEEPALIVE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+
+MONITOR_PROMPT = r'\(qemu\)'
+DEFAULT_SNAPSHOT = 'init'
+DEFAULT_BOOT_TIMEOUT = 120          # seconds for qemu to bring up its monitor
+DEFAULT_LOADVM_TIMEOUT = 120        # seconds for a snapshot revert
+DEFAULT_LEASE_TIMEOUT = 3600        # seconds a job waits for a sandbox of its platform
+# [qemu-<platform>-<id>]
+SANDBOX_SECTION = re.compile(r'^qemu-(.+)-(\d+)$')
+
+
+class SandboxUnavailable(Exception):
+    pass
+
+
+def qemu_command(platform,sandbox_id):
+    if platform == "x86":
+        return "sudo qemu-system-i386 -hda qemu/x86/%s/debian_wheezy_i386_standard.qcow2 -vnc 127.0.0.1:1%s" % (sandbox_id, sandbox_id, )
+    if platform == "x86-64":
+        return "sudo qemu-system-x86_64 -hda qemu/x86-64/%s/debian_wheezy_amd64_standard.qcow2 -vnc 127.0.0.1:2%s" % (sandbox_id, sandbox_id,)
+    if platform == "mips":
+        return 'sudo qemu-system-mips -M malta -kernel qemu/mips/%s/vmlinux-3.2.0-4-4kc-malta -hda qemu/mips/%s/debian_wheezy_mips_standard.qcow2 -append "root=/dev/sda1 console=tty0" -vnc 127.0.0.1:3%s'  % (sandbox_id, sandbox_id, sandbox_id,)
+    if platform == "mipsel":
+        return 'sudo qemu-system-mipsel -M malta -kernel qemu/mipsel/%s/vmlinux-3.2.0-4-4kc-malta -hda qemu/mipsel/%s/debian_wheezy_mipsel_standard.qcow2 -append "root=/dev/sda1 console=tty0" -vnc 127.0.0.1:4%s'  % (sandbox_id, sandbox_id, sandbox_id, )
+    if platform == "arm":
+        return 'sudo qemu-system-arm -M versatilepb -kernel qemu/arm/%s/vmlinuz-3.2.0-4-versatile -initrd qemu/arm/%s/initrd.img-3.2.0-4-versatile -hda qemu/arm/%s/debian_wheezy_armel_standard.qcow2 -append "root=/dev/sda1" -vnc 127.0.0.1:5%s'  % (sandbox_id, sandbox_id, sandbox_id, sandbox_id,)
+    return None
+
+
+class Sandbox(object):
+    '''
+    One qemu instance of [qemu-<platform>-<id>]. Booted once, reverted to the
+    snapshot with loadvm between samples instead of being restarted.
+    '''
+
+    def __init__(self,platform,sandbox_id,qemu_conf,logger,conf):
+        # qemu_conf: [qemu-<platform>-<id>], conf: [dynamic]
+        self.platform = platform
+        self.sandbox_id = sandbox_id
+        self.name = '%s-%s' % (platform, sandbox_id)
+        self.host = qemu_conf['ip']
+        self.port = int(qemu_conf['port'])
+        self.macaddr = qemu_conf['macaddr']
+        self.logger = logger
+        self.snapshot = conf.get('Snapshot', DEFAULT_SNAPSHOT)
+        self.boot_timeout = conf.getint('Boot_Timeout', DEFAULT_BOOT_TIMEOUT)
+        self.loadvm_timeout = conf.getint('Loadvm_Timeout', DEFAULT_LOADVM_TIMEOUT)
+        self.qemu = None
+        self.ifname = None
+        self.session = GuestSession(host = self.host,port = self.port,user = qemu_conf['user'],password = qemu_conf['password'],logger = logger,
+                                    keepalive = conf.getint('Ssh_Keepalive', DEFAULT_KEEPALIVE),
+                                    connect_timeout = conf.getint('Ssh_Connect_Timeout', DEFAULT_CONNECT_TIMEOUT),
+                                    command_timeout = conf.getint('Ssh_Command_Timeout', DEFAULT_COMMAND_TIMEOUT))
+
+    def alive(self):
+        return self.qemu is not None and self.qemu.isalive()
+
+    def monitor(self,command,timeout = 30):
+        # :return monitor output of command
+        # drop what the supervisor left unread (boot messages, old prompts)
+        try:
+            while self.qemu.read_nonblocking(65536, timeout = 0):
+                pass
+        except (pexpect.TIMEOUT, pexpect.EOF):
+            pass
+        self.qemu.sendline(command)
+        self.qemu.expect(MONITOR_PROMPT, timeout = timeout)
+        return self.qemu.before.decode(errors = 'replace')
+
+    def start(self):
+        command = qemu_command(self.platform, self.sandbox_id)
+        if command is None:
+            raise SandboxUnavailable('no qemu command for platform %s' % (self.platform,))
+        command += " -net nic,macaddr=%s -net tap -monitor stdio" % (self.macaddr,)
+        self.logger.info(command)
+        self.stop()
+        self.qemu = pexpect.spawn(command)
+        self.qemu.expect(MONITOR_PROMPT, timeout = self.boot_timeout)
+        self.ifname = self.monitor("info network").split("ifname=", 1)[1].split(",", 1)[0]
+        self.revert()
+        self.logger.info("Sandbox %s started, tap %s" % (self.name, self.ifname))
+
+    def revert(self):
+        self.monitor("loadvm %s" % (self.snapshot,), timeout = self.loadvm_timeout)
+        # the restored guest has no connection, the next call opens one
+        self.session.reset()
+
+    def stop(self):
+        self.session.close()
+        if self.qemu is not None:
+            if self.qemu.isalive():
+                try:
+                    self.qemu.sendline("q")
+                    self.qemu.expect(pexpect.EOF, timeout = 10)
+                except Exception:
+                    pass
+            self.qemu.close(force = True)
+            self.qemu = None
+
+
+class SandboxPool(object):
+    '''
+    The sandboxes of every [qemu-<platform>-<id>] section, leased one job at a time.
+
+    Each platform has its own queue of idle sandboxes, jobs of a platform wait
+    in order for one of them while other platforms keep running. A sandbox is
+    booted on its first lease (or by warm()), reverted with loadvm when
+    released and restarted only when qemu died.
+    '''
+
+    def __init__(self,config,logger):
+        self.logger = logger
+        conf = config['dynamic']
+        self.lease_timeout = conf.getint('Lease_Timeout', DEFAULT_LEASE_TIMEOUT)
+        self.sandboxes = {}
+        self.idle = {}
+        self.reverts = []
+        for section in config.sections():
+            match = SANDBOX_SECTION.match(section)
+            if match:
+                platform, sandbox_id = match.group(1), int(match.group(2))
+                self.sandboxes.setdefault(platform, []).append(Sandbox(platform = platform,sandbox_id = sandbox_id,qemu_conf = config[section],
+                                                                       logger = logger,conf = conf))
+        for platform, sandboxes in self.sandboxes.items():
+            sandboxes.sort(key = lambda sandbox: sandbox.sandbox_id)
+            self.idle[platform] = queue.Queue()
+            for sandbox in sandboxes:
+                self.idle[platform].put(sandbox)
+
+    def warm(self,platforms = None):
+        # boot every sandbox (of platforms) side by side, failures are retried on lease
+        def start(sandbox):
+            try:
+                sandbox.start()
+            except Exception as e:
+                self.logger.exception('%s: %s' % (Exception, e))
+        threads = [threading.Thread(target = start, args = (sandbox,)) for platform, sandboxes in self.sandboxes.items()
+                   if platforms is None or platform in platforms for sandbox in sandboxes if not sandbox.alive()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def lease(self,platform,timeout = None):
+        if platform not in self.idle:
+            raise SandboxUnavailable('no [qemu-%s-<id>] section' % (platform,))
+        try:
+            sandbox = self.idle[platform].get(timeout = timeout or self.lease_timeout)
+        except queue.Empty:
+            raise SandboxUnavailable('no %s sandbox free within %ss' % (platform, timeout or self.lease_timeout))
+        try:
+            if not sandbox.alive():
+                sandbox.start()
+        except Exception:
+            self.idle[platform].put(sandbox)
+            raise
+        self.logger.info("Lease sandbox %s" % (sandbox.name,))
+        return sandbox
+
+    def release(self,sandbox):
+        # reverted in the background, the job does not wait for loadvm
+        def revert():
+            try:
+                if sandbox.alive():
+                    sandbox.revert()
+            except Exception as e:
+                self.logger.exception('%s: %s' % (Exception, e))
+                # restarted on its next lease
+                sandbox.stop()
+            self.idle[sandbox.platform].put(sandbox)
+        thread = threading.Thread(target = revert, name = 'rudolf-revert-%s' % (sandbox.name,), daemon = True)
+        thread.start()
+        self.reverts = [item for item in self.reverts if item.is_alive()] + [thread]
+
+    @contextmanager
+    def sandbox(self,platform,timeout = None):
+        sandbox = self.lease(platform, timeout)
+        try:
+            yield sandbox
+        finally:
+            self.release(sandbox)
+
+    def close(self):
+        for thread in self.reverts:
+            thread.join()
+        for sandboxes in self.sandboxes.values():
+            for sandbox in sandboxes:
+                sandbox.stop()
+
+
+# one pool per process, the vms outlive single analyses and stop with the process
+POOL = None
+POOL_LOCK = threading.Lock()
+
+def get_pool(config,logger):
+    global POOL
+    with POOL_LOCK:
+        if POOL is None:
+            POOL = SandboxPool(config = config,logger = logger)
+            atexit.register(POOL.close)
+        return POOL
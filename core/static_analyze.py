@@ -6,19 +6,258 @@
 # email = felicitychou@hotmail.com
 
 # standard
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import hashlib
+import math
 import os
+import re
+import tempfile
+import threading
+import time
 
 # third
 import yara
-import requests
+
+# self
+from core.sample import Sample
+from core.virustotal import get_client
+
+# compiled rulesets of this process, reused while the rule files are unchanged
+RULES_MEMO = {}
+RULES_MEMO_LOCK = threading.Lock()
+
+DEFAULT_YARA_TIMEOUT = 60           # seconds per sample, all rulesets together
+DEFAULT_YARA_MAX_OFFSETS = 16       # offsets kept per matched string
+# YaraScanService threads, yara releases the GIL while matching
+MAX_SCAN_WORKERS = 32
+# include "other.yar" directives, resolved relative to the including file
+INCLUDE = re.compile(rb'^\s*include\s+"([^"]+)"', re.MULTILINE)
+# {filepath: ((mtime, size), [included filepath, ...])}, a rule file is read again only when its stat changes
+INCLUDES_MEMO = {}
+# {((name, filepath, mtime, size), ...): sources digest}
+DIGEST_MEMO = {}
+
+def rule_files(path):
+    # [(name, filepath, mtime, size), ...] of the regular files in path
+    files = []
+    for item in sorted(os.listdir(path)):
+        filepath = os.path.join(path, item)
+        if os.path.isfile(filepath):
+            stat = os.stat(filepath)
+            files.append((item, filepath, stat.st_mtime_ns, stat.st_size))
+    return files
+
+def file_includes(filepath,mtime,size):
+    cached = INCLUDES_MEMO.get(filepath)
+    if cached is None or cached[0] != (mtime, size):
+        with open(filepath, 'rb') as fr:
+            content = fr.read()
+        dirname = os.path.dirname(filepath)
+        included = [os.path.normpath(os.path.join(dirname, name.decode(errors = 'replace'))) for name in INCLUDE.findall(content)]
+        cached = INCLUDES_MEMO[filepath] = ((mtime, size), included)
+    return cached[1]
+
+def rule_includes(files):
+    # [(filepath, filepath, mtime, size), ...] of the files included by files, recursively
+    includes, seen = [], set(filepath for _, filepath, _, _ in files)
+    todo = [(filepath, mtime, size) for _, filepath, mtime, size in files]
+    while todo:
+        try:
+            included = file_includes(*todo.pop())
+        except OSError:
+            continue
+        for filepath in included:
+            if filepath in seen or not os.path.isfile(filepath):
+                # a missing include is reported by yara.compile
+                continue
+            seen.add(filepath)
+            stat = os.stat(filepath)
+            includes.append((filepath, filepath, stat.st_mtime_ns, stat.st_size))
+            todo.append((filepath, stat.st_mtime_ns, stat.st_size))
+    return includes
+
+def sources_digest(files):
+    # yara build + name and content of every rule file, mtimes do not matter,
+    # the files are read again only when one of their stats changes
+    key = tuple(files)
+    if key not in DIGEST_MEMO:
+        digest = hashlib.sha256(('yara %s\n' % (yara.YARA_VERSION,)).encode())
+        for item, filepath, _, _ in files:
+            with open(filepath, 'rb') as fr:
+                content = fr.read()
+            digest.update(('%s %d\n' % (item, len(content))).encode())
+            digest.update(content)
+        if len(DIGEST_MEMO) >= 64:
+            DIGEST_MEMO.clear()
+        DIGEST_MEMO[key] = digest.hexdigest()
+    return DIGEST_MEMO[key]
+
+def rules_digest(conf):
+    '''
+    conf: [static]
+    :return digest of every rule file a static result depends on (uncompiled, their includes, compiled)
+    '''
+    uncompiled_path, compiled_path = conf.get('Yara_Uncompiled_Rules'), conf.get('Yara_Compiled_Rules')
+    uncompiled = rule_files(uncompiled_path) if uncompiled_path and os.path.isdir(uncompiled_path) else []
+    compiled = rule_files(compiled_path) if compiled_path and os.path.isdir(compiled_path) else []
+    return '%s %s' % (sources_digest(uncompiled + rule_includes(uncompiled)), sources_digest(compiled))
+
+def compile_rules(uncompiled_path,files,cache_path = None,logger = None,includes = ()):
+    '''
+    compile Yara_Uncompiled_Rules, through Yara_Cache_Path/<dir>-<sources digest>.yarc when set,
+    the digest covers the included files (rule_includes) too
+    '''
+    filepaths = dict((os.path.splitext(item)[0], filepath) for item, filepath, _, _ in files)
+    if not cache_path:
+        return yara.compile(filepaths = filepaths)
+    prefix = hashlib.sha256(os.path.abspath(uncompiled_path).encode()).hexdigest()[:16]
+    cached = os.path.join(cache_path, '%s-%s.yarc' % (prefix, sources_digest(list(files) + list(includes))))
+    if os.path.isfile(cached):
+        try:
+            return yara.load(cached)
+        except yara.Error as e:
+            # truncated or written by another yara build, compiled again below
+            if logger:
+                logger.warning("Ignore compiled rules cache %s: %s" % (cached, e))
+    rules = yara.compile(filepaths = filepaths)
+    try:
+        os.makedirs(cache_path, exist_ok = True)
+        # save then rename so other processes never load a partial file
+        fd, tmppath = tempfile.mkstemp(dir = cache_path, prefix = '.tmp')
+        os.close(fd)
+        try:
+            rules.save(tmppath)
+            # mkstemp creates 0600, the cache is shared with other users of the rules
+            os.chmod(tmppath, 0o644)
+            os.replace(tmppath, cached)
+        except Exception:
+            os.unlink(tmppath)
+            raise
+        # older builds of the same rule directory
+        for item in os.listdir(cache_path):
+            if item.startswith(prefix + '-') and item != os.path.basename(cached):
+                os.remove(os.path.join(cache_path, item))
+    except (OSError, yara.Error) as e:
+        # a read only cache only costs the compile time
+        if logger:
+            logger.warning("Cannot write compiled rules cache %s: %s" % (cached, e))
+    return rules
+
+def load_rules(uncompiled_path,compiled_path,cache_path = None,logger = None):
+    '''
+    :return [(name, yara.Rules), ...] for Yara_Uncompiled_Rules (all files in one ruleset,
+            namespace = file name) and every file in Yara_Compiled_Rules
+    compiled rule files cannot be merged, each one stays a ruleset of its own
+    '''
+    uncompiled = rule_files(uncompiled_path) if uncompiled_path else []
+    compiled = rule_files(compiled_path) if compiled_path else []
+    includes = rule_includes(uncompiled)
+    key = (uncompiled_path, compiled_path, tuple(uncompiled), tuple(compiled), tuple(includes))
+    with RULES_MEMO_LOCK:
+        if key not in RULES_MEMO:
+            rules_list = []
+            if uncompiled:
+                rules_list.append((uncompiled_path, compile_rules(uncompiled_path, uncompiled, cache_path = cache_path, logger = logger, includes = includes)))
+            rules_list.extend([(filepath, yara.load(filepath)) for _, filepath, _, _ in compiled])
+            # one generation per config, older ones are garbage
+            for old in [old for old in RULES_MEMO if old[:2] == key[:2]]:
+                del RULES_MEMO[old]
+            RULES_MEMO[key] = rules_list
+        return RULES_MEMO[key]
+
+def format_match(data,max_offsets):
+    strings = []
+    for string in data['strings']:
+        strings.append({
+            "identifier":string.identifier,
+            "count":len(string.instances),
+            "offsets":[instance.offset for instance in string.instances[:max_offsets]],
+        })
+    return {"namespace":data['namespace'],"rule":data['rule'],"meta":data['meta'],"tags":data['tags'],"strings":strings}
+
+def match_rules(rules_list,data,timeout,max_offsets,logger = None,label = ''):
+    '''
+    match every ruleset of load_rules against data, timeout (seconds) is shared by all of them
+    :return matches, timing
+    '''
+    result, timings = [], []
+    deadline = time.time() + timeout
+    for name, rules in rules_list:
+        # collected from the callback so a timeout keeps the matches found so far
+        matches = []
+        def collect(match):
+            matches.append(format_match(match, max_offsets))
+            return yara.CALLBACK_CONTINUE
+        remaining = int(math.ceil(deadline - time.time()))
+        timing = {'ruleset':name, 'elapsed':0.0, 'matches':0, 'timeout':remaining <= 0}
+        if not timing['timeout']:
+            starttime = time.time()
+            try:
+                rules.match(data = data, callback = collect, which_callbacks = yara.CALLBACK_MATCHES, timeout = remaining)
+            except yara.TimeoutError:
+                timing['timeout'] = True
+                if logger:
+                    logger.warning("Yara ruleset %s timed out on %s" % (name, label))
+            timing['elapsed'] = round(time.time() - starttime, 4)
+        timing['matches'] = len(matches)
+        timings.append(timing)
+        result.extend(matches)
+    return result, timings
+
+class YaraScanService(object):
+    '''
+    Scan a stream of samples on a thread pool sharing one set of compiled rules.
+
+    for filepath, matches, timing, error in service.scan(filepaths):
+        ...
+
+    results come back as they complete, not in input order
+    '''
+
+    def __init__(self,conf,logger,workers = 0):
+        self.logger = logger
+        self.timeout = conf.getint("Yara_Timeout", DEFAULT_YARA_TIMEOUT)
+        self.max_offsets = conf.getint("Yara_Max_Offsets", DEFAULT_YARA_MAX_OFFSETS)
+        self.workers = min(MAX_SCAN_WORKERS, workers or conf.getint("Yara_Scan_Workers", 0) or os.cpu_count() or 1)
+        self.rules_list = load_rules(conf["Yara_Uncompiled_Rules"], conf["Yara_Compiled_Rules"],
+                                     cache_path = conf.get("Yara_Cache_Path"), logger = logger)
+
+    def scan_one(self,filepath):
+        try:
+            with Sample(filepath) as sample:
+                matches, timing = match_rules(self.rules_list, sample.data, self.timeout, self.max_offsets,
+                                              logger = self.logger, label = filepath)
+            return filepath, matches, timing, None
+        except Exception as e:
+            self.logger.exception('%s: %s' % (Exception, e))
+            return filepath, None, None, '%s' % (e,)
+
+    def scan(self,filepaths):
+        # at most two samples per thread in flight, a long stream is never read ahead
+        # and mapped all at once
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            pending = set()
+            for filepath in filepaths:
+                pending.add(executor.submit(self.scan_one, filepath))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
 
 class StaticAnalyzer(object):
 
-    def __init__(self,filepath,hash,logger,conf):
-        self.filepath = filepath
+    def __init__(self,sample,hash,logger,conf):
+        # core.sample.Sample, every ruleset matches the same mapping
+        self.sample = sample
         self.hash = hash
         self.logger = logger
         self.conf = conf
+        # errors swallowed during run, a result with errors is not reused from the cache
+        self.errors = []
         self.run()
 
     def run(self):
@@ -31,12 +270,18 @@ class StaticAnalyzer(object):
                 self.vt_scan()
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
     
+    # no error swallowed, the result is worth caching
+    def complete(self):
+        return not self.errors
+
     # output list
     def output(self):
-        #return ['yara_scan_result','vt_scan_result']
+        #return ['yara_scan_result','yara_timing','vt_scan_result']
         return {
             'yara':self.get_yara_scan_result(),
+            'yara_timing':getattr(self,'yara_timing',None),
             'virustotal':self.get_vt_scan_result(),
         }
 
@@ -51,28 +296,27 @@ class StaticAnalyzer(object):
       'meta': {},
       'strings': [(81L, '$a', 'abc'), (141L, '$b', 'def')]
     }
+        every ruleset matches the mapped sample once (data=), the whole scan shares Yara_Timeout
+        result: [{'namespace','rule','meta','tags','strings':[{'identifier','count','offsets'}]}]
+        timing: [{'ruleset','elapsed','matches','timeout'}], yara has no per rule cost, this is per ruleset
         '''
         try:
             self.yara_scan_result = []
-            yara_uncompiled_rules = self.conf["Yara_Uncompiled_Rules"]
-            yara_compiled_rules = self.conf["Yara_Compiled_Rules"]
-            yara_rules_list = []
-            # load rules
-            if yara_uncompiled_rules:
-                filepaths = {}
-                for rulefile in os.listdir(yara_uncompiled_rules):
-                    rulefilepath = os.path.join(yara_uncompiled_rules,rulefile)
-                    if os.path.isfile(rulefilepath):
-                        filepaths[os.path.splitext(rulefile)[0]] = os.path.join(yara_uncompiled_rules,rulefile)
-                yara_rules_list.append(yara.compile(filepaths = filepaths))
-            if yara_compiled_rules:
-                yara_rules_list.extend([yara.load(os.path.join(yara_compiled_rules,item)) for item in os.listdir(yara_compiled_rules)])
+            self.yara_timing = []
+            timeout = self.conf.getint("Yara_Timeout", DEFAULT_YARA_TIMEOUT)
+            max_offsets = self.conf.getint("Yara_Max_Offsets", DEFAULT_YARA_MAX_OFFSETS)
+            # load rules, compiled once per process while the rule files are unchanged
+            # and once across processes while their content is (Yara_Cache_Path)
+            yara_rules_list = load_rules(self.conf["Yara_Uncompiled_Rules"], self.conf["Yara_Compiled_Rules"],
+                                         cache_path = self.conf.get("Yara_Cache_Path"), logger = self.logger)
             # match yara rules
-            for rules in yara_rules_list:
-                matches = rules.match(self.filepath)
-                self.yara_scan_result.extend([{"namespace":match.namespace,"rule":match.rule,"meta":match.meta} for match in matches])
+            self.yara_scan_result, self.yara_timing = match_rules(yara_rules_list, self.sample.data, timeout, max_offsets,
+                                                                  logger = self.logger, label = self.hash)
+            if any(timing['timeout'] for timing in self.yara_timing):
+                self.errors.append('yara timeout')
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
             
 
     def vt_scan(self):
@@ -109,16 +353,12 @@ class StaticAnalyzer(object):
 }
         '''
         try:
-            params = {'apikey': self.conf['Virustotal_Apikey'], 'resource': self.hash}
-            headers = {
-                "Accept-Encoding": "gzip, deflate",
-                "User-Agent": "gzip,  My Python requests library example client or username"
-            }
-            response = requests.get('https://www.virustotal.com/vtapi/v2/file/report',
-                                    params = params, headers = headers)
-            self._parse_vt_report(vt_report = response.json())
+            # pooled, rate limited client shared by every analyzer of this process
+            client = get_client(conf = self.conf,logger = self.logger)
+            self._parse_vt_report(vt_report = client.report(self.hash))
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
             
 
 
@@ -142,6 +382,7 @@ class StaticAnalyzer(object):
                 self.vt_scan_result = None
         except Exception as e:
             self.logger.exception('%s: %s' % (Exception, e))
+            self.errors.append('%s' % (e,))
 
     def get_yara_scan_result(self):
         return getattr(self,'yara_scan_result',None)
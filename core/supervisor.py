@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+import selectors
+import socket
+import threading
+import time
+
+# third
+import pexpect
+
+READ_SIZE = 65536
+# seconds between probe polls (pcap size ...)
+PROBE_INTERVAL = 1
+# seconds past the deadline a caller waits for the supervisor thread before giving up on it
+WAIT_MARGIN = 30
+
+
+class Watch(object):
+    '''
+    One supervised sandbox run: the processes (pexpect) and SSH channels (paramiko)
+    to watch and the deadline. wait() returns the reason the run ended:
+        vm_exit   a process with ends_run (qemu) exited
+        exited    the exec channel reported its exit status
+        idle      no activity for idle_timeout seconds
+        timeout   deadline reached
+        error     the run could not be supervised (bad fd, on_data failed ...)
+    Activity is data on a source added with activity = True (the strace stream)
+    or a changed probe value (pcap size).
+    on_data(kind, data) gets everything read from the sources.
+    '''
+
+    def __init__(self,name,deadline,on_data = None,idle_timeout = None):
+        self.name = name
+        self.deadline = deadline
+        self.on_data = on_data
+        self.idle_timeout = idle_timeout
+        # [(kind, fileobj, read, ends_run, activity)], read() -> bytes, b'' while idle, None at the end
+        self.sources = []
+        # {kind: [probe, last value]}
+        self.probes = {}
+        self.next_probe = 0
+        self.last_activity = time.time()
+        self.event = threading.Event()
+        self.reason = None
+        self.finished = None
+
+    def add_probe(self,kind,probe):
+        # probe() -> any value, polled every PROBE_INTERVAL, a change counts as activity
+        self.probes[kind] = [probe, None]
+
+    def check(self,now):
+        '''
+        :return 'timeout' / 'idle' or None
+        '''
+        if self.probes and now >= self.next_probe:
+            self.next_probe = now + PROBE_INTERVAL
+            for item in self.probes.values():
+                try:
+                    value = item[0]()
+                except Exception:
+                    value = None
+                if value != item[1]:
+                    item[1] = value
+                    self.last_activity = now
+        if now >= self.deadline:
+            return 'timeout'
+        if self.idle_timeout and now - self.last_activity >= self.idle_timeout:
+            return 'idle'
+        return None
+
+    def wakeup_time(self):
+        times = [self.deadline]
+        if self.idle_timeout:
+            times.append(self.last_activity + self.idle_timeout)
+        if self.probes:
+            times.append(self.next_probe)
+        return min(times)
+
+    def add_process(self,kind,child,ends_run = True,activity = False):
+        def read():
+            try:
+                return child.read_nonblocking(READ_SIZE, timeout = 0)
+            except pexpect.TIMEOUT:
+                return b''
+            except pexpect.EOF:
+                return None
+        self.sources.append((kind, child.child_fd, read, ends_run, activity))
+
+    def add_channel(self,kind,channel,ends_run = True,activity = False):
+        def read():
+            data = b''
+            if channel.recv_ready():
+                data += channel.recv(READ_SIZE)
+            if channel.recv_stderr_ready():
+                data += channel.recv_stderr(READ_SIZE)
+            # the pipe stays readable after EOF, exit status or EOF with nothing left ends the source
+            if not data and (channel.exit_status_ready() or channel.eof_received) and not channel.recv_ready():
+                return None
+            return data
+        # fileno() sets up a pipe paramiko makes readable on data and on close
+        self.sources.append((kind, channel.fileno(), read, ends_run, activity))
+
+    def stop(self,reason):
+        if self.reason is None:
+            self.reason = reason
+            self.finished = time.time()
+
+    def wait(self,timeout = None):
+        # :return reason, None if the run has not ended within timeout
+        self.event.wait(timeout)
+        return self.reason
+
+
+class VMSupervisor(object):
+    '''
+    Watches the runs of any number of sandboxes from one thread: a selector over
+    every qemu / dumpcap pty and SSH channel, sleeping until one of them has
+    something to say or the nearest deadline.
+    '''
+
+    def __init__(self,logger):
+        self.logger = logger
+        self.selector = selectors.DefaultSelector()
+        # new watches are handed over through this pair, the loop thread owns the selector
+        self.wakeup, self.waker = socket.socketpair()
+        self.wakeup.setblocking(False)
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        self.pending = []
+        self.watches = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def supervise(self,watch):
+        '''
+        block until the run ends
+        :return watch.reason
+        '''
+        with self.lock:
+            self.pending.append(watch)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target = self._loop, name = 'rudolf-supervisor', daemon = True)
+                self.thread.start()
+        self.waker.send(b'\0')
+        reason = watch.wait(max(0, watch.deadline - time.time()) + WAIT_MARGIN)
+        if reason is None:
+            # the loop thread is stuck or gone, it drops the watch once it sees the reason
+            self.logger.error("Sandbox run %s not supervised past its deadline" % (watch.name,))
+            watch.stop('error')
+            watch.event.set()
+            self.waker.send(b'\0')
+        return watch.reason
+
+    def _loop(self):
+        while True:
+            with self.lock:
+                pending, self.pending = self.pending, []
+            for watch in pending:
+                try:
+                    self._register(watch)
+                except Exception as e:
+                    self.logger.exception('%s: %s' % (Exception, e))
+                    self._finish(watch, 'error')
+            now = time.time()
+            for watch in list(self.watches):
+                try:
+                    reason = watch.reason or watch.check(now)
+                except Exception as e:
+                    self.logger.exception('%s: %s' % (Exception, e))
+                    reason = 'error'
+                if reason:
+                    self._finish(watch, reason)
+            timeout = min([watch.wakeup_time() for watch in self.watches], default = None)
+            for key, mask in self.selector.select(None if timeout is None else max(0, timeout - time.time())):
+                if key.fileobj is self.wakeup:
+                    try:
+                        self.wakeup.recv(READ_SIZE)
+                    except BlockingIOError:
+                        pass
+                    continue
+                watch, kind, read, ends_run, activity = key.data
+                if watch.reason is not None:
+                    # ended (or given up by its caller) since select, dropped in the next round
+                    continue
+                try:
+                    data = read()
+                except Exception as e:
+                    self.logger.exception('%s: %s' % (Exception, e))
+                    data = None
+                try:
+                    if data and activity:
+                        watch.last_activity = time.time()
+                    if data and watch.on_data:
+                        watch.on_data(kind, data)
+                except Exception as e:
+                    self.logger.exception('%s: %s' % (Exception, e))
+                    self._finish(watch, 'error')
+                    continue
+                if data is None:
+                    self.selector.unregister(key.fileobj)
+                    if ends_run:
+                        self._finish(watch, 'exited' if kind == 'exec' else 'vm_exit')
+
+    def _register(self,watch):
+        self.watches.add(watch)
+        watch.last_activity = time.time()
+        for kind, fileobj, read, ends_run, activity in watch.sources:
+            self.selector.register(fileobj, selectors.EVENT_READ, (watch, kind, read, ends_run, activity))
+
+    def _finish(self,watch,reason):
+        watch.stop(reason)
+        self._unregister(watch)
+
+    def _unregister(self,watch):
+        for kind, fileobj, read, ends_run, activity in watch.sources:
+            try:
+                self.selector.unregister(fileobj)
+            except (KeyError, ValueError, OSError):
+                pass
+        self.watches.discard(watch)
+        self.logger.info("Sandbox run %s ended: %s" % (watch.name, watch.reason))
+        watch.event.set()
+
+
+# one supervisor thread per process, shared by every dynamic analyzer
+SUPERVISOR = None
+SUPERVISOR_LOCK = threading.Lock()
+
+def get_supervisor(logger):
+    global SUPERVISOR
+    with SUPERVISOR_LOCK:
+        if SUPERVISOR is None:
+            SUPERVISOR = VMSupervisor(logger = logger)
+        return SUPERVISOR
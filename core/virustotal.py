@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Rudolf Sandbox
+# version = 0.1
+# author = felicitychou
+# email = felicitychou@hotmail.com
+
+# standard
+from concurrent.futures import Future
+from collections import OrderedDict
+import fcntl
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# third
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'https://www.virustotal.com/vtapi/v2'
+# public API: 4 requests a minute, 4 resources a report request
+DEFAULT_RATE = 4
+DEFAULT_RATE_PERIOD = 60            # seconds
+DEFAULT_BATCH_SIZE = 4
+DEFAULT_TIMEOUT = 30                # seconds per request
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2                 # seconds, doubled on every retry
+MAX_BACKOFF = 120
+DEFAULT_CACHE_TTL = 7 * 24 * 3600   # seconds, reports found
+DEFAULT_NEGATIVE_TTL = 24 * 3600    # seconds, "not found", a new sample may be uploaded any time
+
+
+class VirusTotalError(Exception):
+    pass
+
+
+class TokenBucket(object):
+    '''
+    rate tokens per period, at most capacity saved up.
+    With path the bucket lives in that file under flock and is shared by every
+    process using it (batch workers, daemon and single runs share one quota).
+    '''
+
+    def __init__(self,rate,period,capacity = None,path = None):
+        self.rate = float(rate)
+        self.period = float(period)
+        self.capacity = float(capacity or rate)
+        self.path = path
+        self.tokens = self.capacity
+        self.stamp = time.time()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            wait = self._take(1)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def drain(self):
+        # the server said the quota is used up, whatever we counted
+        self._take(0, drain = True)
+
+    def _take(self,count,drain = False):
+        '''
+        :return 0 when taken, else seconds until count tokens are available
+        '''
+        with self.lock:
+            if not self.path:
+                return self._update(count, drain)
+            with open(self.path, 'a+') as fp:
+                fcntl.flock(fp, fcntl.LOCK_EX)
+                fp.seek(0)
+                try:
+                    self.tokens, self.stamp = [float(value) for value in fp.read().split()]
+                except ValueError:
+                    # new or damaged state, start full
+                    self.tokens, self.stamp = self.capacity, time.time()
+                wait = self._update(count, drain)
+                fp.seek(0)
+                fp.truncate()
+                fp.write('%f %f' % (self.tokens, self.stamp))
+                return wait
+
+    def _update(self,count,drain):
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate / self.period)
+        self.stamp = now
+        if drain:
+            self.tokens = 0.0
+            return 0
+        if self.tokens >= count:
+            self.tokens -= count
+            return 0
+        return (count - self.tokens) * self.period / self.rate
+
+
+class ReportCache(object):
+    '''
+    Local SQLite store of file reports, keyed by every hash of the report (md5, sha1,
+    sha256 and the requested resource) so a lookup by any of them hits.
+    "not found" answers are kept too, for negative_ttl.
+
+    WAL journal: readers never block the writer, every process and thread has its
+    own connection, concurrent writers wait up to busy_timeout.
+    '''
+
+    BUSY_TIMEOUT = 30   # seconds
+
+    def __init__(self,path,ttl = DEFAULT_CACHE_TTL,negative_ttl = DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        connection = self.connection()
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS reports (resource TEXT PRIMARY KEY, found INTEGER, report TEXT, fetched REAL)')
+            # expired rows of earlier runs
+            connection.execute('DELETE FROM reports WHERE fetched < ?', (time.time() - max(ttl, negative_ttl),))
+
+    def connection(self):
+        # sqlite connections must not cross threads, and after a fork not processes either
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout = self.BUSY_TIMEOUT)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection, self.local.pid = connection, os.getpid()
+        return connection
+
+    def get(self,resource):
+        '''
+        :return report, or None when missing / expired
+        '''
+        row = self.connection().execute('SELECT found, report, fetched FROM reports WHERE resource = ?', (resource.lower(),)).fetchone()
+        if row is None:
+            return None
+        found, report, fetched = row
+        if time.time() - fetched > (self.ttl if found else self.negative_ttl):
+            return None
+        return json.loads(report)
+
+    def put(self,resource,report):
+        # found (1) and not found (0) are final answers, queued (-2) and errors are not cached
+        if report.get('response_code') not in (0, 1):
+            return
+        found = report['response_code'] == 1
+        keys = set([resource.lower()])
+        if found:
+            keys.update(report[key].lower() for key in ('md5', 'sha1', 'sha256') if report.get(key))
+        content, now = json.dumps(report), time.time()
+        connection = self.connection()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO reports (resource, found, report, fetched) VALUES (?, ?, ?, ?)',
+                                   [(key, int(found), content, now) for key in keys])
+
+
+class VirusTotalClient(object):
+    '''
+    VirusTotal v2 file report client.
+
+    One pooled requests.Session, a token bucket for the API quota, retry with
+    exponential backoff on 204 (quota), 5xx and connection errors.
+
+    report() is thread safe. Callers waiting for the rate limiter queue their
+    resources and whoever sends next takes up to batch_size of them in one
+    request, so concurrent lookups share the quota.
+
+    With a ReportCache, cached reports are answered locally and only unseen
+    resources use the quota.
+    '''
+
+    def __init__(self,apikey,logger,base_url = DEFAULT_BASE_URL,rate = DEFAULT_RATE,period = DEFAULT_RATE_PERIOD,
+                 batch_size = DEFAULT_BATCH_SIZE,timeout = DEFAULT_TIMEOUT,retries = DEFAULT_RETRIES,
+                 backoff = DEFAULT_BACKOFF,rate_state = None,cache = None):
+        self.apikey = apikey
+        self.logger = logger
+        self.url = base_url.rstrip('/') + '/file/report'
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate = rate, period = period, path = rate_state or None)
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections = 1, pool_maxsize = 4))
+        self.session.mount('http://', HTTPAdapter(pool_connections = 1, pool_maxsize = 4))
+        self.session.headers.update({'Accept-Encoding':'gzip, deflate', 'User-Agent':'Rudolf Sandbox'})
+        # resource -> Future, in request order
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+
+    def report(self,resource):
+        '''
+        resource: md5 / sha1 / sha256
+        :return report dict (response_code 0 = unknown to VirusTotal), raise VirusTotalError
+        '''
+        cached = self.cached(resource)
+        if cached is not None:
+            return cached
+        with self.lock:
+            future = self.pending.get(resource)
+            if future is None:
+                future = self.pending[resource] = Future()
+        while not future.done():
+            with self.send_lock:
+                if future.done():
+                    break
+                self.bucket.acquire()
+                with self.lock:
+                    batch = OrderedDict()
+                    while self.pending and len(batch) < self.batch_size:
+                        key, item = self.pending.popitem(last = False)
+                        batch[key] = item
+                self._send(batch)
+        return future.result()
+
+    def cached(self,resource):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(resource)
+        except sqlite3.Error as e:
+            # a locked or broken cache only costs quota
+            self.logger.warning('VirusTotal cache lookup failed: %s' % (e,))
+            return None
+
+    def _send(self,batch):
+        try:
+            reports = self._request(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for resource, future in batch.items():
+            if resource in reports:
+                future.set_result(reports[resource])
+            else:
+                future.set_exception(VirusTotalError('no report for %s in the response' % (resource,)))
+
+    def _request(self,resources):
+        '''
+        one file/report request, the token is already taken
+        :return {resource: report}
+        '''
+        params = {'apikey':self.apikey, 'resource':', '.join(resources)}
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.bucket.acquire()
+            # seconds to wait before the next attempt, besides the rate limiter
+            delay = min(MAX_BACKOFF, self.backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+            try:
+                response = self.session.get(self.url, params = params, timeout = self.timeout)
+            except requests.RequestException as e:
+                error = 'VirusTotal request failed: %s' % (e,)
+            else:
+                if response.status_code == 200:
+                    reports = response.json()
+                    if isinstance(reports, dict):
+                        reports = [reports]
+                    reports = dict((report.get('resource'), report) for report in reports)
+                    self.store(reports)
+                    return reports
+                if response.status_code in (401, 403):
+                    raise VirusTotalError('VirusTotal refused the API key (%d)' % (response.status_code,))
+                if response.status_code not in (204, 429) and response.status_code < 500:
+                    raise VirusTotalError('VirusTotal returned %d' % (response.status_code,))
+                error = 'VirusTotal returned %d' % (response.status_code,)
+                if response.status_code == 204:
+                    # quota exceeded (other users of the key, a restarted process),
+                    # the emptied bucket makes the next attempt wait for a new token
+                    self.bucket.drain()
+                    delay = 0
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = min(int(retry_after), MAX_BACKOFF)
+            if attempt < self.retries:
+                self.logger.warning('%s, retry %d/%d' % (error, attempt + 1, self.retries))
+                time.sleep(delay)
+        raise VirusTotalError(error)
+
+    def store(self,reports):
+        if self.cache is None:
+            return
+        try:
+            for resource, report in reports.items():
+                if resource:
+                    self.cache.put(resource, report)
+        except sqlite3.Error as e:
+            self.logger.warning('VirusTotal cache store failed: %s' % (e,))
+
+    def close(self):
+        self.session.close()
+
+
+# one client per process and configuration, the session and quota are shared by all analyzers
+CLIENTS = {}
+CLIENTS_LOCK = threading.Lock()
+
+def get_client(conf,logger):
+    '''
+    conf: [static] Virustotal_Apikey, Virustotal_Base_Url, Virustotal_Rate, Virustotal_Rate_Period,
+          Virustotal_Batch_Size, Virustotal_Timeout, Virustotal_Retries, Virustotal_Rate_State,
+          Virustotal_Cache, Virustotal_Cache_Ttl, Virustotal_Negative_Ttl
+    '''
+    options = dict(
+        apikey = conf.get('Virustotal_Apikey'),
+        base_url = conf.get('Virustotal_Base_Url', DEFAULT_BASE_URL),
+        rate = conf.getint('Virustotal_Rate', DEFAULT_RATE),
+        period = conf.getint('Virustotal_Rate_Period', DEFAULT_RATE_PERIOD),
+        batch_size = conf.getint('Virustotal_Batch_Size', DEFAULT_BATCH_SIZE),
+        timeout = conf.getint('Virustotal_Timeout', DEFAULT_TIMEOUT),
+        retries = conf.getint('Virustotal_Retries', DEFAULT_RETRIES),
+        rate_state = conf.get('Virustotal_Rate_State'),
+    )
+    cache = (conf.get('Virustotal_Cache'), conf.getint('Virustotal_Cache_Ttl', DEFAULT_CACHE_TTL),
+             conf.getint('Virustotal_Negative_Ttl', DEFAULT_NEGATIVE_TTL))
+    key = tuple(sorted(options.items())) + cache
+    with CLIENTS_LOCK:
+        if key not in CLIENTS:
+            if options['rate_state']:
+                os.makedirs(os.path.dirname(os.path.abspath(options['rate_state'])), exist_ok = True)
+            if cache[0]:
+                options['cache'] = ReportCache(path = cache[0], ttl = cache[1], negative_ttl = cache[2])
+            CLIENTS[key] = VirusTotalClient(logger = logger, **options)
+        return CLIENTS[key]
@@ -6,24 +6,52 @@
 # email = felicitychou@hotmail.com
 
 # standard
+from concurrent.futures import ThreadPoolExecutor
 from optparse import OptionParser
 from configparser import ConfigParser
+import glob
 import json
-import time
+import logging
+import multiprocessing
 import os
+import signal
+import time
 
 # self
-from core.basic_analyze import BasicAnalyzer
-from core.static_analyze import StaticAnalyzer
+from core.basic_analyze import BasicAnalyzer, REQUIRED_HASH_TYPES
+from core.static_analyze import StaticAnalyzer, YaraScanService, rules_digest
 from core.dynamic_analyze import DynamicAnalyzer
 from core.logger import Logger
+from core.cache import ResultCache, STAGES
+from core.sample import Sample
+from core.daemon import AnalysisDaemon
+from core.sandbox import get_pool
+from utils.Hasher import DEFAULT_CHUNK_SIZE
 
 # init logger
 logger = Logger().logger
 
+# seconds between batch progress lines
+BATCH_PROGRESS_INTERVAL = 5
+
+
+def load_config():
+    config = ConfigParser()
+    config.read_file(open('rudolf.cfg'))
+    logger.info("Read rudolf.cfg successfully.")
+    return config
 
+def analyze(filepath,mode,refresh = ()):
+    config = load_config()
+    result_path, results = analyze_stages(filepath = filepath,mode = mode,refresh = refresh,config = config)
+    ResultCache(result_path = config.get('rudolf','Result_Path'),logger = logger,conf = config['rudolf']).evict()
+    return result_path
 
-def analyze(filepath,mode):
+def analyze_stages(filepath,mode,refresh,config):
+    '''
+    run (or load cached) stages of one sample
+    :return result_path, {stage: result}
+    '''
     global logger
     logger.info("Analyze %s mode:%s" % (filepath, mode))
 
@@ -37,40 +65,203 @@ def analyze(filepath,mode):
     else:
         pass
 
-    # get config
-    config = ConfigParser()
-    config.read_file(open('rudolf.cfg'))
-    logger.info("Read rudolf.cfg successfully.")
+    # the sample is opened and mapped once, every analyzer reads the same mapping
+    with Sample(filepath) as sample:
+        # digests and file type the stages depend on, known before any stage starts.
+        # only what the cache lookup and virustotal need, the other Hash_Types are left
+        # to the basic stage so a cache hit does not pay for them
+        sample.hashes(REQUIRED_HASH_TYPES, chunk_size = config['basic'].getint('Hash_Chunk_Size', DEFAULT_CHUNK_SIZE))
+        filetype = sample.filetype
+
+        # set result_path (one directory per sample, shared by every run)
+        cache = ResultCache(result_path = config.get('rudolf','Result_Path'),logger = logger,conf = config['rudolf'])
+        sha256 = sample.sha256
+        result_path = cache.sample_path(sha256)
+        os.makedirs(result_path, exist_ok = True)
+        logger.info("Make result path %s" % (result_path,))
+
+        # look up cached results
+        stages = ['basic'] + (['static'] if static else []) + (['dynamic'] if dynamic else [])
+        keys,results = {},{}
+        for stage in stages:
+            # static results also depend on the content of the yara rules
+            keys[stage] = cache.key(stage, config[stage], rules_digest(config[stage]) if stage == 'static' else '')
+            cached = None if stage in refresh else cache.lookup(sha256, stage, keys[stage])
+            if cached:
+                with open(cached) as fr:
+                    results[stage] = json.load(fr)
+                logger.info("Load cached %s result %s" % (stage, cached))
+
+        # stages left to run, static only needs the md5 and dynamic the file type,
+        # so neither waits for the basic result
+        analyzers = {}
+        # init basic analyzer
+        if 'basic' not in results:
+            analyzers['basic'] = lambda: BasicAnalyzer(sample = sample,logger = logger,conf = config['basic'])
+        # init static analyzer
+        if static and 'static' not in results:
+            analyzers['static'] = lambda: StaticAnalyzer(sample = sample,hash = sample.md5,logger = logger,conf = config['static'])
+        # init dynamic analyzer
+        if dynamic and 'dynamic' not in results:
+            analyzers['dynamic'] = lambda: DynamicAnalyzer(sample = sample,filetype = filetype,result_path = result_path,
+                                                           pool = get_pool(config = config,logger = logger),logger = logger,conf = config['dynamic'])
+
+        def run_stage(stage):
+            analyzer = analyzers[stage]()
+            logger.info("Init and Run %s_analyzer successfully." % (stage,))
+            result = analyzer.output()
+            # each stage is stored as soon as it is done, results cut short by an error are not reused
+            complete = analyzer.complete()
+            if not complete:
+                logger.warning("%s_analyzer: %s, result not cached" % (stage, '; '.join(analyzer.errors)))
+            cache.store(sha256, stage, keys[stage], result, complete = complete)
+            logger.info("Output %s_analyzer result successfully." % (stage,))
+            return result
+
+        # yara, virustotal and the sandbox wait on I/O or release the GIL, they overlap with basic
+        if len(analyzers) > 1 and config.getboolean('rudolf', 'Concurrent_Stages', fallback = True):
+            with ThreadPoolExecutor(max_workers = len(analyzers)) as executor:
+                futures = dict((stage, executor.submit(run_stage, stage)) for stage in analyzers)
+            for stage, future in futures.items():
+                results[stage] = future.result()
+        else:
+            for stage in analyzers:
+                results[stage] = run_stage(stage)
+        results = dict((stage, results[stage]) for stage in stages)
+
+    return result_path, results
+
+
+# batch worker state, set once per process by batch_init
+batch_state = {}
+
+def batch_init(mode,refresh):
+    # config is read once per worker, per sample logging is left to warnings
+    logger.setLevel(logging.WARNING)
+    batch_state.update(mode = mode,refresh = refresh,config = load_config())
+
+def batch_analyze(filepath):
+    starttime = time.time()
+    summary = {'filepath':filepath}
+    try:
+        result_path, results = analyze_stages(filepath = filepath,mode = batch_state['mode'],refresh = batch_state['refresh'],config = batch_state['config'])
+        basic = results['basic']
+        summary.update({
+            'sha256':basic.get('sha256'),
+            'md5':basic.get('md5'),
+            'filetype':basic.get('filetype'),
+            'filesize':basic.get('filesize'),
+            'packer':(basic.get('packer') or {}).get('name'),
+            'result_path':result_path,
+        })
+        if 'static' in results:
+            summary['yara'] = [match['rule'] for match in results['static'].get('yara') or []]
+            virustotal = results['static'].get('virustotal')
+            summary['virustotal'] = '%s/%s' % (virustotal['positives'], virustotal['total']) if virustotal and 'positives' in virustotal else None
+    except Exception as e:
+        logger.exception('%s: %s' % (Exception, e))
+        summary['error'] = '%s' % (e,)
+    summary['elapsed'] = round(time.time() - starttime, 3)
+    return summary
+
+def serve():
+    '''
+    daemon mode, config and compiled rules are loaded once for all jobs
+    '''
+    config = load_config()
+    cache = ResultCache(result_path = config.get('rudolf','Result_Path'),logger = logger,conf = config['rudolf'])
+
+    def analyze_job(filepath,mode,refresh):
+        result = analyze_stages(filepath = filepath,mode = mode,refresh = refresh,config = config)
+        cache.evict()
+        return result
+
+    # boot the sandboxes before the first dynamic job instead of on its lease
+    if config['dynamic'].getboolean('Pool_Warm', False):
+        get_pool(config = config,logger = logger).warm()
+    daemon = AnalysisDaemon(analyze = analyze_job,logger = logger,conf = config['rudolf'])
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def collect_samples(target):
+    '''
+    target: directory (walked recursively), manifest file (one path per line, # comments)
+            or glob pattern
+    '''
+    if os.path.isdir(target):
+        filepaths = [os.path.join(root, filename) for root, dirs, filenames in os.walk(target) for filename in sorted(filenames)]
+    elif os.path.isfile(target):
+        basedir = os.path.dirname(os.path.abspath(target))
+        with open(target) as fr:
+            lines = [line.strip() for line in fr]
+        filepaths = [os.path.normpath(os.path.join(basedir, line)) for line in lines if line and not line.startswith('#')]
+    else:
+        filepaths = sorted(glob.glob(target, recursive = True))
+    # each sample once, in the given order
+    seen = set()
+    return [filepath for filepath in filepaths if os.path.isfile(filepath) and not (filepath in seen or seen.add(filepath))]
+
+def yara_summaries(service,filepaths):
+    for filepath, matches, timing, error in service.scan(filepaths):
+        summary = {'filepath':filepath}
+        if error is None:
+            summary['yara'] = [match['rule'] for match in matches]
+            summary['timeout'] = any(item['timeout'] for item in timing)
+            summary['elapsed'] = round(sum(item['elapsed'] for item in timing), 3)
+        else:
+            summary['error'] = error
+        yield summary
+
+def batch(target,mode,refresh = (),workers = 0,output = None):
+    '''
+    basic + static analysis of many samples on a process pool, one JSONL summary line per sample
+    mode yara: yara only, on threads of this process sharing one compiled ruleset, no result files
+    :return summary path
+    '''
+    config = load_config()
+    filepaths = collect_samples(target)
+    # no sandbox in batch mode
+    if mode not in ('basic', 'static', 'yara'):
+        mode = 'static'
+    if mode == 'yara':
+        pool = None
+        service = YaraScanService(conf = config['static'],logger = logger,workers = workers)
+        workers = service.workers
+        summaries = yara_summaries(service, filepaths)
+    else:
+        workers = workers or config.getint('rudolf', 'Batch_Workers', fallback = 0) or os.cpu_count()
+        # small chunks keep the workers busy to the end, large ones save IPC on big corpora
+        chunksize = max(1, min(16, len(filepaths) // (workers * 8)))
+        maxtasksperchild = config.getint('rudolf', 'Batch_Max_Tasks_Per_Child', fallback = 0) or None
+        pool = multiprocessing.Pool(workers, initializer = batch_init, initargs = (mode, refresh), maxtasksperchild = maxtasksperchild)
+        summaries = pool.imap_unordered(batch_analyze, filepaths, chunksize)
+    if not output:
+        output = os.path.join(config.get('rudolf','Result_Path'), time.strftime('batch_%Y%m%d_%H%M%S.jsonl'))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+    logger.info("Batch %d samples mode:%s workers:%d summary:%s" % (len(filepaths), mode, workers, output))
+
+    done, failed = 0, 0
+    starttime = lasttime = time.time()
+    try:
+        with open(output, 'w') as fw:
+            for summary in summaries:
+                fw.write(json.dumps(summary) + '\n')
+                done += 1
+                failed += 'error' in summary
+                if time.time() - lasttime >= BATCH_PROGRESS_INTERVAL or done == len(filepaths):
+                    fw.flush()
+                    lasttime = time.time()
+                    elapsed = lasttime - starttime
+                    logger.info("Batch %d/%d done, %d failed, %.1f samples/s, %.0fs elapsed" % (done, len(filepaths), failed, done / elapsed if elapsed else 0, elapsed))
+    finally:
+        if pool is not None:
+            pool.terminate()
 
-    # init basic analyzer
-    basic_analyzer = BasicAnalyzer(filepath = filepath,logger = logger,conf = config['basic'])
-    logger.info("Init and Run basic_analyzer successfully.")
-    # set result_path
-    result_path = os.path.join(config.get('rudolf','Result_Path'), '%s_%s' % (basic_analyzer.sha256, time.time()))
-    os.makedirs(result_path)
-    logger.info("Make result path %s" % (result_path,))
-    # init static analyzer
-    if static:
-        static_analyzer = StaticAnalyzer(filepath = filepath,hash = basic_analyzer.md5,logger = logger,conf = config['static'])
-        logger.info("Init and Run static_analyzer successfully.")
-    # init dynamic analyzer
-    if dynamic:
-        dynamic_analyzer = DynamicAnalyzer(filepath = filepath,filetype = basic_analyzer.filetype,result_path = result_path,
-                                           sandbox_id = 1,logger = logger,conf = config['dynamic'])
-        logger.info("Init and Run dynamic_analyzer successfully.")
-
-    # output result
-    with open(os.path.join(result_path,'basic.json'),'w') as fw:
-        json.dump(basic_analyzer.output(),fw)
-        logger.info("Output basic_analyzer result successfully.")
-    if static:
-        with open(os.path.join(result_path,'static.json'),'w') as fw:
-            json.dump(static_analyzer.output(),fw)
-            logger.info("Output static_analyzer result successfully.")
-    if dynamic:
-        with open(os.path.join(result_path,'dynamic.json'),'w') as fw:
-            json.dump(dynamic_analyzer.output(),fw)
-            logger.info("Output dynamic_analyzer result successfully.")
+    ResultCache(result_path = config.get('rudolf','Result_Path'),logger = logger,conf = config['rudolf']).evict()
+    return output
 
 
 def main():
@@ -78,7 +269,12 @@ def main():
     parser = OptionParser(version = "%prog 1.0")
 
     parser.add_option("-f", "--file", dest="filepath", help="Malcode filepath")
-    parser.add_option("-m", "--mode", dest="mode", help="Malcode Analyze mode: basic/static/dynamic/all",default='all')
+    parser.add_option("-m", "--mode", dest="mode", help="Malcode Analyze mode: basic/static/dynamic/all, batch: basic/static/yara",default='all')
+    parser.add_option("-r", "--refresh", dest="refresh", help="Ignore cached results of these stages: basic,static,dynamic/all",default='')
+    parser.add_option("-b", "--batch", dest="batch", help="Batch basic/static analysis of a directory, manifest file or glob pattern")
+    parser.add_option("-w", "--workers", dest="workers", type="int", help="Batch worker processes, threads in yara mode (default: Batch_Workers / Yara_Scan_Workers or cpu count)",default=0)
+    parser.add_option("-d", "--daemon", dest="daemon", action="store_true", help="Run as a daemon serving jobs on Daemon_Host:Daemon_Port",default=False)
+    parser.add_option("-o", "--output", dest="output", help="Batch JSONL summary path (default: Result_Path/batch_<time>.jsonl)")
 
     (options, args) = parser.parse_args()
 
@@ -87,9 +283,14 @@ def main():
         filepath = options.filepath
     if options.mode:
         mode = options.mode
+    refresh = STAGES if options.refresh == 'all' else [stage.strip() for stage in options.refresh.split(',') if stage.strip()]
 
-    if filepath and os.path.exists(filepath):
-        analyze(filepath = filepath,mode = mode)
+    if options.daemon:
+        serve()
+    elif options.batch:
+        batch(target = options.batch,mode = mode,refresh = refresh,workers = options.workers,output = options.output)
+    elif filepath and os.path.exists(filepath):
+        analyze(filepath = filepath,mode = mode,refresh = refresh)
     else:
         parser.print_help()
 
@@ -1,853 +1,1300 @@
-
-
-# Refer: https://linux.die.net/include/elf.h
-
-from ctypes import *
-import struct
-import io
-import sys
-
-# Standard ELF types. #
-
-# Data Type #
-# 8-bit c_ubyte c_byte
-# 16-bit c_ushort c_short
-# 32-bit c_uint c_int
-# 64-bit c_ulonglong c_longlong
-
-# Type for a 16-bit quantity. #
-Elf32_Half = c_ushort
-Elf64_Half = c_ushort
-
-# Types for signed and unsigned 32-bit quantities. #
-Elf32_Word  = c_uint
-Elf32_Sword = c_int
-Elf64_Word  = c_uint
-Elf64_Sword = c_int
-
-# Types for signed and unsigned 64-bit quantities. #
-Elf32_Xword  = c_ulonglong
-Elf32_Sxword = c_longlong
-Elf64_Xword  = c_ulonglong
-Elf64_Sxword = c_longlong
-
-
-# Type of addresses. #
-Elf32_Addr = c_uint
-Elf64_Addr = c_ulonglong
-
-# Type of file offsets. #
-Elf32_Off = c_uint
-Elf64_Off = c_ulonglong
-
-# Type for section indices, which are 16-bit quantities. #
-Elf32_Section = c_ushort
-Elf64_Section = c_ushort
-
-# Type for version symbol information. #
-Elf32_Versym = Elf32_Half
-Elf64_Versym = Elf64_Half
-
-# The ELF file header.  This appears at the start of every ELF file.  #
-
-# ELF e_ident 
-EI_NIDENT = 16
-
-Elf32_Ehdr_Size = 52 # ELF32 header size 
-Elf64_Ehdr_Size = 64 # ELF64 header size 
-
-# Fields in the e_ident array.  The EI_* macros are indices into the array.  
-# The macros under each EI_* macro are the values the byte may have.  
-
-# ELF MAGIC File identification 
-ELFMAG0 = 0x7f # Magic number byte 0 
-ELFMAG1 = 'E'  # Magic number byte 1
-ELFMAG2 = 'L'  # Magic number byte 2
-ELFMAG3 = 'F'  # Magic number byte 3 
-ELFMAG  = [ELFMAG0, ord(ELFMAG1), ord(ELFMAG2), ord(ELFMAG3)] 
-
-# ELF File class 
-ELFCLASSNONE = 0    # Invalid class
-ELFCLASS32   = 1    # 32-bit objects 
-ELFCLASS64   = 2    # 64-bit objects
-ELFCLASS = {ELFCLASSNONE:'Invalid class',ELFCLASS32:'ELF32',ELFCLASS64:'ELF64'}
-
-# ELF DATA encoding 
-ELFDATANONE = 0     # Invalid data encoding
-ELFDATA2LSB = 1     # 2's complement, little endian
-ELFDATA2MSB = 2     # 2's complement, big endian 
-ELFDATA = {ELFDATANONE:'Invalid data encoding',ELFDATA2LSB:'''2's complement, little endian''',ELFDATA2MSB:'''2's complement, big endian'''}
-
-# ELF File version Value must be EV_CURRENT
-# Legal values for e_version (version)
-EV_NONE    = 0       # Invalid ELF version 
-EV_CURRENT = 1       # Current version
-ELFVERSION = {EV_NONE:'0 (Invalid)',EV_CURRENT:'1 (Current)'}
-
-# ELF OS ABI identification
-ELFOSABI_NONE       = 0   # UNIX System V ABI (UNIX - System V)
-ELFOSABI_SYSV       = 0   # Alias
-ELFOSABI_HPUX       = 1   # HP-UX 
-ELFOSABI_NETBSD     = 2   # NetBSD 
-ELFOSABI_LINUX      = 3   # Linux  
-ELFOSABI_SOLARIS    = 6   # Sun Solaris
-ELFOSABI_AIX        = 7   # IBM AIX 
-ELFOSABI_IRIX       = 8   # SGI Irix
-ELFOSABI_FREEBSD    = 9   # FreeBSD
-ELFOSABI_TRU64      = 10  # Compaq TRU64 UNIX
-ELFOSABI_MODESTO    = 11  # Novell Modesto
-ELFOSABI_OPENBSD    = 12  # OpenBSD
-ELFOSABI_ARM        = 97  # ARM 
-ELFOSABI_STANDALONE = 255 # Standalone (embedded) application 
-
-ELFOSABI = {ELFOSABI_SYSV:'UNIX - System V',ELFOSABI_HPUX:'HP-UX',ELFOSABI_NETBSD:'NetBSD',ELFOSABI_LINUX:'Linux',
-            ELFOSABI_SOLARIS:'Sun Solaris',ELFOSABI_AIX:'IBM AIX',ELFOSABI_IRIX:'SGI Irix',ELFOSABI_FREEBSD:'FreeBSD',
-            ELFOSABI_TRU64:'Compaq TRU64 UNIX',ELFOSABI_MODESTO:'Novell Modesto',ELFOSABI_OPENBSD:'OpenBSD',
-            ELFOSABI_ARM:'ARM',ELFOSABI_STANDALONE:'Standalone (embedded) application'
-}
-
-# Legal values for e_type (object file type)
-
-ET_NONE   = 0      # No file type
-ET_REL    = 1      # Relocatable file 
-ET_EXEC   = 2      # Executable file
-ET_DYN    = 3      # Shared object file
-ET_CORE   = 4      # Core file
-ET_NUM    = 5      # Number of defined types
-ET_LOOS   = 0xfe00 # OS-specific range start 
-ET_HIOS   = 0xfeff # OS-specific range end 
-ET_LOPROC = 0xff00 # Processor-specific range start 
-ET_HIPROC = 0xffff # Processor-specific range end 
-ELFTYPE = {ET_NONE:'No file type',ET_REL:'REL (Relocatable file)',ET_EXEC:'EXEC (Executable file)',ET_DYN:'DYN (Shared object file)',ET_CORE:'CORE (Core file)'}
-
-# Legal values for e_machine (architecture)
-
-EM_NONE        = 0      # No machine 
-EM_M32         = 1      # AT&T WE 32100 
-EM_SPARC       = 2      # SUN SPARC 
-EM_386         = 3      # Intel 80386 
-EM_68K         = 4      # Motorola m68k family 
-EM_88K         = 5      # Motorola m88k family 
-EM_860         = 7      # Intel 80860 
-EM_MIPS        = 8      # MIPS R3000 big-endian 
-EM_S370        = 9      # IBM System/370 
-EM_MIPS_RS3_LE = 10     # MIPS R3000 little-endian 
-
-EM_PARISC      = 15      # HPPA 
-EM_VPP500      = 17      # Fujitsu VPP500 
-EM_SPARC32PLUS = 18      # Sun's "v8plus" 
-EM_960         = 19      # Intel 80960 
-EM_PPC         = 20      # PowerPC 
-EM_PPC64       = 21      # PowerPC 64-bit 
-EM_S390        = 22      # IBM S390 
-
-EM_V800        = 36      # NEC V800 series 
-EM_FR20        = 37      # Fujitsu FR20 
-EM_RH32        = 38      # TRW RH-32 
-EM_RCE         = 39      # Motorola RCE 
-EM_ARM         = 40      # ARM 
-EM_FAKE_ALPHA  = 41      # Digital Alpha 
-EM_SH          = 42      # Hitachi SH 
-EM_SPARCV9     = 43      # SPARC v9 64-bit 
-EM_TRICORE     = 44      # Siemens Tricore 
-EM_ARC         = 45      # Argonaut RISC Core 
-EM_H8_300      = 46      # Hitachi H8/300 
-EM_H8_300H     = 47      # Hitachi H8/300H 
-EM_H8S         = 48      # Hitachi H8S 
-EM_H8_500      = 49      # Hitachi H8/500 
-EM_IA_64       = 50      # Intel Merced 
-EM_MIPS_X      = 51      # Stanford MIPS-X 
-EM_COLDFIRE    = 52      # Motorola Coldfire 
-EM_68HC12      = 53      # Motorola M68HC12 
-EM_MMA         = 54      # Fujitsu MMA Multimedia Accelerator
-EM_PCP         = 55      # Siemens PCP 
-EM_NCPU        = 56      # Sony nCPU embeeded RISC 
-EM_NDR1        = 57      # Denso NDR1 microprocessor 
-EM_STARCORE    = 58      # Motorola Start*Core processor 
-EM_ME16        = 59      # Toyota ME16 processor 
-EM_ST100       = 60      # STMicroelectronic ST100 processor 
-EM_TINYJ       = 61      # Advanced Logic Corp. Tinyj emb.fam
-EM_X86_64      = 62      # AMD x86-64 architecture / Advanced Micro Devices X86-64
-EM_PDSP        = 63      # Sony DSP Processor 
-
-EM_FX66        = 66      # Siemens FX66 microcontroller 
-EM_ST9PLUS     = 67      # STMicroelectronics ST9+ 8/16 mc 
-EM_ST7         = 68      # STmicroelectronics ST7 8 bit mc 
-EM_68HC16      = 69      # Motorola MC68HC16 microcontroller 
-EM_68HC11      = 70      # Motorola MC68HC11 microcontroller 
-EM_68HC08      = 71      # Motorola MC68HC08 microcontroller 
-EM_68HC05      = 72      # Motorola MC68HC05 microcontroller 
-EM_SVX         = 73      # Silicon Graphics SVx 
-EM_ST19        = 74      # STMicroelectronics ST19 8 bit mc 
-EM_VAX         = 75      # Digital VAX 
-EM_CRIS        = 76      # Axis Communications 32-bit embedded processor 
-EM_JAVELIN     = 77      # Infineon Technologies 32-bit embedded processor 
-EM_FIREPATH    = 78      # Element 14 64-bit DSP Processor 
-EM_ZSP         = 79      # LSI Logic 16-bit DSP Processor 
-EM_MMIX        = 80      # Donald Knuth's educational 64-bit processor 
-EM_HUANY       = 81      # Harvard University machine-independent object files 
-EM_PRISM       = 82      # SiTera Prism 
-EM_AVR         = 83      # Atmel AVR 8-bit microcontroller 
-EM_FR30        = 84      # Fujitsu FR30 
-EM_D10V        = 85      # Mitsubishi D10V 
-EM_D30V        = 86      # Mitsubishi D30V 
-EM_V850        = 87      # NEC v850 
-EM_M32R        = 88      # Mitsubishi M32R 
-EM_MN10300     = 89      # Matsushita MN10300 
-EM_MN10200     = 90      # Matsushita MN10200 
-EM_PJ          = 91      # picoJava 
-EM_OPENRISC    = 92      # OpenRISC 32-bit embedded processor 
-EM_ARC_A5      = 93      # ARC Cores Tangent-A5 
-EM_XTENSA      = 94      # Tensilica Xtensa Architecture 
-
-ELFMACHINE = {EM_NONE:'NONE',EM_M32:'AT&T WE 32100',EM_SPARC:'SUN SPARC',EM_386:'Intel 80386',EM_68K:'Motorola m68k family',EM_88K:'Motorola m88k family',EM_860:'Intel 80860',
-EM_MIPS:'MIPS R3000 big-endian',EM_S370:'IBM System/370',EM_MIPS_RS3_LE:'MIPS R3000 little-endian',EM_PARISC:'HPPA',EM_VPP500:'Fujitsu VPP500',EM_SPARC32PLUS:'''Sun's "v8plus"''',
-EM_960:'Intel 80960',EM_PPC:'PowerPC',EM_PPC64:'PowerPC 64-bit',EM_S390:'IBM S390',EM_V800:'NEC V800 series',EM_FR20:'Fujitsu FR20',EM_RH32:'TRW RH-32',EM_RCE:'Motorola RCE',EM_ARM:'ARM',
-EM_FAKE_ALPHA:'Digital Alpha',EM_SH:'Hitachi SH',EM_SPARCV9:'SPARC v9 64-bit',EM_TRICORE:'Siemens Tricore',EM_ARC:'Argonaut RISC Core',EM_H8_300:'Hitachi H8/300',
-EM_H8_300H:'Hitachi H8/300H',EM_H8S:'Hitachi H8S',EM_H8_500:'Hitachi H8/500',EM_IA_64:'Intel Merced',EM_MIPS_X:'Stanford MIPS-X',EM_COLDFIRE:'Motorola Coldfire',
-EM_68HC12:'Motorola M68HC12',EM_MMA:'Fujitsu MMA Multimedia Accelerator',EM_PCP:'Siemens PCP',EM_NCPU:'Sony nCPU embeeded RISC',EM_NDR1:'Denso NDR1 microprocessor',
-EM_STARCORE:'Motorola Start*Core processor',EM_ME16:'Toyota ME16 processor',EM_ST100:'STMicroelectronic ST100 processor',EM_TINYJ:'Advanced Logic Corp. Tinyj emb.fam',
-EM_X86_64:'Advanced Micro Devices X86-64',EM_PDSP:'Sony DSP Processor',EM_FX66:'Siemens FX66 microcontroller',EM_ST9PLUS:'STMicroelectronics ST9+ 8/16 mc',EM_ST7:'STmicroelectronics ST7 8 bit mc',
-EM_68HC16:'Motorola MC68HC16 microcontroller',EM_68HC11:'Motorola MC68HC11 microcontroller',EM_68HC08:'Motorola MC68HC08 microcontroller',EM_68HC05:'Motorola MC68HC05 microcontroller',
-EM_SVX:'Silicon Graphics SVx',EM_ST19:'STMicroelectronics ST19 8 bit mc',EM_VAX:'Digital VAX',EM_CRIS:'Axis Communications 32-bit embedded processor',EM_JAVELIN:'Infineon Technologies 32-bit embedded processor',
-EM_FIREPATH:'Element 14 64-bit DSP Processor',EM_ZSP:'LSI Logic 16-bit DSP Processor',EM_MMIX:'''Donald Knuth's educational 64-bit processor''',EM_HUANY:'Harvard University machine-independent object files',
-EM_PRISM:'SiTera Prism',EM_AVR:'Atmel AVR 8-bit microcontroller',EM_FR30:'Fujitsu FR30',EM_D10V:'Mitsubishi D10V',EM_D30V:'Mitsubishi D30V',EM_V850:'NEC v850',EM_M32R:'Mitsubishi M32R',
-EM_MN10300:'Matsushita MN10300',EM_MN10200:'Matsushita MN10200',EM_PJ:'picoJava',EM_OPENRISC:'OpenRISC 32-bit embedded processor',EM_ARC_A5:'ARC Cores Tangent-A5',EM_XTENSA:'Tensilica Xtensa Architecture',
-}
-
-# Special section indices.  
-
-SHN_UNDEF     = 0           # Undefined section 
-SHN_LORESERVE = 0xff00      # Start of reserved indices 
-SHN_LOPROC    = 0xff00      # Start of processor-specific 
-SHN_BEFORE    = 0xff00      # Order section before all others (Solaris).  
-SHN_AFTER     = 0xff01      # Order section after all others (Solaris).  
-SHN_HIPROC    = 0xff1f      # End of processor-specific 
-SHN_LOOS      = 0xff20      # Start of OS-specific 
-SHN_HIOS      = 0xff3f      # End of OS-specific 
-SHN_ABS       = 0xfff1      # Associated symbol is absolute 
-SHN_COMMON    = 0xfff2      # Associated symbol is common 
-SHN_XINDEX    = 0xffff      # Index is in extra table.  
-SHN_HIRESERVE = 0xffff      # End of reserved indices 
-
-
-# Legal values for sh_type (section type)
-
-SHT_NULL          = 0          # Section header table entry unused 
-SHT_PROGBITS      = 1          # Program data 
-SHT_SYMTAB        = 2          # Symbol table 
-SHT_STRTAB        = 3          # String table 
-SHT_RELA          = 4          # Relocation entries with addends 
-SHT_HASH          = 5          # Symbol hash table 
-SHT_DYNAMIC       = 6          # Dynamic linking information 
-SHT_NOTE          = 7          # Notes 
-SHT_NOBITS        = 8          # Program space with no data (bss) 
-SHT_REL           = 9          # Relocation entries, no addends 
-SHT_SHLIB         = 10         # Reserved 
-SHT_DYNSYM        = 11         # Dynamic linker symbol table 
-SHT_INIT_ARRAY    = 14         # Array of constructors 
-SHT_FINI_ARRAY    = 15         # Array of destructors 
-SHT_PREINIT_ARRAY = 16         # Array of pre-constructors 
-SHT_GROUP         = 17         # Section group 
-SHT_SYMTAB_SHNDX  = 18         # Extended section indeces 
-SHT_LOOS          = 0x60000000 # Start OS-specific.  
-SHT_GNU_HASH      = 0x6ffffff6 # GNU-style hash table.  
-SHT_GNU_LIBLIST   = 0x6ffffff7 # Prelink library list 
-SHT_CHECKSUM      = 0x6ffffff8 # Checksum for DSO content.  
-SHT_LOSUNW        = 0x6ffffffa # Sun-specific low bound.  
-SHT_SUNW_move     = 0x6ffffffa
-SHT_SUNW_COMDAT   = 0x6ffffffb
-SHT_SUNW_syminfo  = 0x6ffffffc
-SHT_GNU_verdef    = 0x6ffffffd # Version definition section.  
-SHT_GNU_verneed   = 0x6ffffffe # Version needs section.  
-SHT_GNU_versym    = 0x6fffffff # Version symbol table.  
-SHT_HISUNW        = 0x6fffffff # Sun-specific high bound.  
-SHT_HIOS          = 0x6fffffff # End OS-specific type 
-SHT_LOPROC        = 0x70000000 # Start of processor-specific 
-SHT_HIPROC        = 0x7fffffff # End of processor-specific 
-SHT_LOUSER        = 0x80000000 # Start of application-specific 
-SHT_HIUSER        = 0x8fffffff # End of application-spec
-
-ELFSHTYPE = {SHT_NULL:'NULL',SHT_PROGBITS:'PROGBITS',SHT_SYMTAB:'SYMTAB',SHT_STRTAB:'STRTAB',SHT_RELA:'RELA',SHT_HASH:'HASH',SHT_DYNAMIC:'DYNAMIC',
-SHT_NOTE:'NOTE',SHT_NOBITS:'NOBITS',SHT_REL:'REL',SHT_SHLIB:'SHLIB',SHT_DYNSYM:'DYNSYM',SHT_INIT_ARRAY:'INIT_ARRAY',
-SHT_FINI_ARRAY:'FINI_ARRAY',SHT_PREINIT_ARRAY:'PREINIT_ARRAY',SHT_GROUP:'GROUP',SHT_SYMTAB_SHNDX:'SYMTAB_SHNDX',
-SHT_GNU_HASH:'GNU_HASH',SHT_GNU_LIBLIST:'GNU_LIBLIST',SHT_CHECKSUM:'CHECKSUM',SHT_GNU_verdef:'GNU_verdef',SHT_GNU_verneed:"VERNEED",SHT_GNU_versym:"VERSYM"
-}
-
-# Legal values for sh_flags (section flags).  
-
-SHF_WRITE             = (1 << 0)   # Writable 
-SHF_ALLOC             = (1 << 1)   # Occupies memory during execution 
-SHF_EXECINSTR         = (1 << 2)   # Executable
-SHF_MERGE             = (1 << 4)   # Might be merged
-SHF_STRINGS           = (1 << 5)   # Contains nul-terminated strings
-SHF_INFO_LINK         = (1 << 6)   # `sh_info' contains SHT index
-SHF_LINK_ORDER        = (1 << 7)   # Preserve order after combining
-SHF_OS_NONCONFORMING  = (1 << 8)   # Non-standard OS specific handling required */
-SHF_GROUP             = (1 << 9)   # Section is member of a group. 
-SHF_TLS               = (1 << 10)  # Section hold thread-local data. 
-SHF_MASKOS            = 0x0ff00000 # OS-specific. 
-SHF_MASKPROC          = 0xf0000000 # Processor-specific
-SHF_ORDERED           = (1 << 30)  # Special ordering requirement (Solaris).  */
-SHF_EXCLUDE           = (1 << 31)  # Section is excluded unless referenced or allocated (Solaris).*/
-
-ELFSHFLAG = {SHF_WRITE:'W',SHF_ALLOC:'A',SHF_EXECINSTR:'X',SHF_MERGE:'M',SHF_STRINGS:'S',SHF_INFO_LINK:'I',SHF_LINK_ORDER:'L',SHF_GROUP:'G',SHF_TLS:'T',SHF_MASKOS:'o',SHF_MASKPROC:'p',SHF_EXCLUDE:'E'}
-
-# Section group handling.  
-GRP_COMDAT = 0x1     # Mark group as COMDAT.
-
-
-# Legal values for p_type (segment type)
-
-PT_NULL    = 0   # Program header table entry unused 
-PT_LOAD    = 1   # Loadable program segment 
-PT_DYNAMIC = 2   # Dynamic linking information 
-PT_INTERP  = 3   # Program interpreter 
-PT_NOTE    = 4   # Auxiliary information 
-PT_SHLIB   = 5   # Reserved 
-PT_PHDR    = 6   # Entry for header table itself 
-PT_TLS     = 7   # Thread-local storage segment
-PT_LOOS         = 0x60000000  # Start of OS-specific 
-PT_GNU_EH_FRAME = 0x6474e550  # GCC .eh_frame_hdr segment 
-PT_GNU_STACK    = 0x6474e551  # Indicates stack executability 
-PT_GNU_RELRO    = 0x6474e552  # Read-only after relocation 
-PT_LOSUNW       = 0x6ffffffa  #
-PT_SUNWBSS      = 0x6ffffffa  # Sun Specific segment 
-PT_SUNWSTACK    = 0x6ffffffb  # Stack segment 
-PT_HISUNW       = 0x6fffffff  #
-PT_HIOS         = 0x6fffffff  # End of OS-specific 
-PT_LOPROC       = 0x70000000  # Start of processor-specific 
-PT_HIPROC       = 0x7fffffff  # End of processor-specific 
-
-ELFPHTYPE = {PT_NULL:'NULL',PT_LOAD:'LOAD',PT_DYNAMIC:'DYNAMIC',PT_INTERP:'INTERP',PT_NOTE:'NOTE',PT_SHLIB:'SHLIB',PT_PHDR:'PHDR',PT_TLS:'TLS',
-PT_LOOS:'LOOS',PT_GNU_EH_FRAME:'GNU_EH_FRAME',PT_GNU_STACK:'GNU_STACK',PT_GNU_RELRO:'GNU_RELRO',PT_LOSUNW:'LOSUNW',PT_SUNWBSS:'SUNWBSS',
-PT_SUNWSTACK:'SUNWSTACK',PT_HISUNW:'HISUNW',PT_HIOS:'HIOS',PT_LOPROC:'LOPROC',PT_HIPROC:'HIPROC',}
-
-# Legal values for p_flags (segment flags)
-
-PF_X         = (1 << 0)  # Segment is executable 
-PF_W         = (1 << 1)  # Segment is writable 
-PF_R         = (1 << 2)  # Segment is readable 
-PF_MASKOS    = 0x0ff00000  # OS-specific 
-PF_MASKPROC  = 0xf0000000  # Processor-specific
-
-ELFPHFLAG = {PF_X:'E',PF_W:'W',PF_R:'R'}
-
-# E_IDENT
-class E_IDENT(Structure):
-
-    _fields_ = [
-                ('e_mag0',c_ubyte),       # File identification / Magic number byte 0
-                ('e_mag1',c_ubyte),       # File identification / Magic number byte 1
-                ('e_mag2',c_ubyte),       # File identification / Magic number byte 2
-                ('e_mag3',c_ubyte),       # File identification / Magic number byte 3
-                ('e_class',c_ubyte),      # File class byte
-                ('e_data',c_ubyte),       # Data encoding byte
-                ('e_version',c_ubyte),    # File version byte
-                ('e_osabi',c_ubyte),      # OS ABI identification
-                ('e_abiversion',c_ubyte), # ABI version
-                ('e_pad', c_ubyte * 7),   # padding bytes
-    ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-    def iself(self):
-        return True if self.e_mag0 == ELFMAG0 and self.e_mag1 == ord(ELFMAG1) and self.e_mag2 == ord(ELFMAG2) and self.e_mag3 == ord(ELFMAG3) else False
-
-    def is32bit(self):
-        return True if self.e_class == ELFCLASS32 else False
-
-    def is64bit(self):
-        return True if self.e_class == ELFCLASS64 else False
-
-
-# The ELF file header.  This appears at the start of every ELF file.
-
-class Elf32_Ehdr(Structure):
-
-    _fields_ = [
-            ('e_ident',E_IDENT),        # Magic number and other info 
-            ('e_type',Elf32_Half),      # Object file type 
-            ('e_machine',Elf32_Half),   # Architecture
-            ('e_version',Elf32_Word),   # Object file version
-            ('e_entry',Elf32_Addr),     # Entry point virtual address
-            ('e_phoff',Elf32_Off),      # Program header table file offset 
-            ('e_shoff',Elf32_Off),      # Section header table file offset 
-            ('e_flags',Elf32_Word),     # Processor-specific flags 
-            ('e_ehsize',Elf32_Half),    # ELF header size in bytes 
-            ('e_phentsize',Elf32_Half), # Program header table entry size 
-            ('e_phnum',Elf32_Half),     # Program header table entry count 
-            ('e_shentsize',Elf32_Half), # Section header table entry size 
-            ('e_shnum',Elf32_Half),     # Section header table entry count 
-            ('e_shstrndx',Elf32_Half),  # Section header string table index 
-    ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-class Elf64_Ehdr(Structure):
-
-    _fields_ = [
-            ('e_ident',E_IDENT),        # Magic number and other info 
-            ('e_type',Elf64_Half),      # Object file type 
-            ('e_machine',Elf64_Half),   # Architecture 
-            ('e_version',Elf64_Word),   # Object file version 
-            ('e_entry',Elf64_Addr),     # Entry point virtual address 
-            ('e_phoff',Elf64_Off),      # Program header table file offset 
-            ('e_shoff',Elf64_Off),      # Section header table file offset 
-            ('e_flags',Elf64_Word),     # Processor-specific flags 
-            ('e_ehsize',Elf64_Half),    # ELF header size in bytes 
-            ('e_phentsize',Elf64_Half), # Program header table entry size 
-            ('e_phnum',Elf64_Half),     # Program header table entry count 
-            ('e_shentsize',Elf64_Half), # Section header table entry size 
-            ('e_shnum',Elf64_Half),     # Section header table entry count 
-            ('e_shstrndx',Elf64_Half),  # Section header string table index 
-    ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-# Section header
-class Elf32_Shdr(Structure):
-
-    _fields_ = [
-              ('sh_name',Elf32_Word),      # Section name (string tbl index)
-              ('sh_type',Elf32_Word),      # Section type
-              ('sh_flags',Elf32_Word),     # Section flags
-              ('sh_addr',Elf32_Addr),      # Section virtual addr at execution
-              ('sh_offset',Elf32_Off),     # Section file offset
-              ('sh_size',Elf32_Word),      # Section size in bytes
-              ('sh_link',Elf32_Word),      # Link to another section
-              ('sh_info',Elf32_Word),      # Additional section information
-              ('sh_addralign',Elf32_Word), # Section alignment
-              ('sh_entsize',Elf32_Word),   # Entry size if section holds table 
-  ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-
-class Elf64_Shdr(Structure):
-
-    _fields_ = [
-              ('sh_name',Elf64_Word),       # Section name (string tbl index)
-              ('sh_type',Elf64_Word),       # Section type
-              ('sh_flags',Elf64_Xword),     # Section flags
-              ('sh_addr',Elf64_Addr),       # Section virtual addr at execution
-              ('sh_offset',Elf64_Off),      # Section file offset
-              ('sh_size',Elf64_Xword),      # Section size in bytes
-              ('sh_link',Elf64_Word),       # Link to another section
-              ('sh_info',Elf64_Word),       # Additional section information
-              ('sh_addralign',Elf64_Xword), # Section alignment
-              ('sh_entsize',Elf64_Xword),   # Entry size if section holds table 
-  ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-# Program segment header
-class Elf32_Phdr(Structure):
-
-    _fields_ = [
-              ('p_type',Elf32_Word),   # Segment type 
-              ('p_offset',Elf32_Off),  # Segment file offset 
-              ('p_vaddr',Elf32_Addr),  # Segment virtual address
-              ('p_paddr',Elf32_Addr),  # Segment physical address
-              ('p_filesz',Elf32_Word), # Segment size in file 
-              ('p_memsz',Elf32_Word),  # Segment size in memory 
-              ('p_flags',Elf32_Word),  # Segment flags
-              ('p_align',Elf32_Word),  # Segment alignment
-    ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-class Elf64_Phdr(Structure):
-
-    _fields_ = [
-              ('p_type',Elf64_Word),   # Segment type 
-              ('p_flags',Elf64_Word),  # Segment flags
-              ('p_offset',Elf64_Off),  # Segment file offset 
-              ('p_vaddr',Elf64_Addr),  # Segment virtual address
-              ('p_paddr',Elf64_Addr),  # Segment physical address
-              ('p_filesz',Elf64_Xword), # Segment size in file 
-              ('p_memsz',Elf64_Xword),  # Segment size in memory 
-              ('p_align',Elf64_Xword),  # Segment alignment
-    ]
-
-    def __new__(self, buffer):
-        return self.from_buffer_copy(buffer)
-
-    def __init__(self, buffer):
-        pass
-
-
-
-e_ident_show  = '''Magic: {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:s} 
-Class: {:s} 
-Data: {:s} 
-Version: {:s}
-OS/ABI: {:s}
-ABI Version: {:d}'''
-
-Elf32_Ehdr_show = '''Type: {:s}
-Machine: {:s}
-Version: {:#x}
-Entry point address: {:#x}
-Start of program headers: {:d} (bytes into file)
-Start of section headers: {:d} (bytes into file)
-Flags: {:#x}
-Size of this header: {:d} (bytes)
-Size of program headers: {:d} (bytes)
-Number of program headers: {:d}
-Size of section headers: {:d} (bytes)
-Number of section headers: {:d}
-Section header string table index: {:d}
-'''
-
-Section_FLag_info ='''Key to Flags:
-  W (write), A (alloc), X (execute), M (merge), S (strings)
-  I (info), L (link order), G (group), T (TLS), E (exclude), x (unknown)
-  O (extra OS processing required) o (OS specific), p (processor specific)
-'''
-
-class ELF32(object):
-
-    def __init__(self,data):
-        self.data = data
-        self.Parse()
-
-    def Parse(self):
-        # ELF header
-        self.data.seek(0,0)
-        self.header = Elf32_Ehdr(self.data.read(Elf32_Ehdr_Size))
-
-        # ELF section header   
-        self.data.seek(self.header.e_shoff,0)
-        
-        section_headers_data = self.data.read(self.header.e_shentsize * self.header.e_shnum)
-        # Get Section Headers
-        self.section_headers = [Elf32_Shdr(section_headers_data[i * self.header.e_shentsize:(i + 1) * self.header.e_shentsize]) for i in range(0,self.header.e_shnum)]
-        #self.section_headers = []
-        #for i in range(0,self.header.e_shnum):
-        #    print(len(section_headers_data[i * self.header.e_shentsize:(i + 1)*self.header.e_shentsize]))
-        #    self.section_headers.append(Elf32_Shdr(section_headers_data[i * self.header.e_shentsize:(i + 1)*self.header.e_shentsize]))
-
-        # Get Section Names
-        self.section_names = []
-        for i in range(0,self.header.e_shnum):
-            offset = self.section_headers[self.header.e_shstrndx].sh_offset + self.section_headers[i].sh_name
-            self.section_names.append(self.ReadStr(offset))
-
-        # Program segment header
-        self.data.seek(self.header.e_phoff,0)
-        segment_headers_data = self.data.read(self.header.e_phentsize * self.header.e_phnum)
-        self.segment_headers = [Elf32_Phdr(segment_headers_data[i * self.header.e_phentsize:(i + 1) * self.header.e_phentsize]) for i in range(0,self.header.e_phnum)]
-    
-    def ReadStr(self,offset,end='\0',len=32):
-        self.data.seek(offset,0)
-        chars = ""
-        for char in self.data.read(len).decode():
-            if not char == end:
-                chars = chars + char
-            else:
-                break
-        return chars
-
-    def Output(self):
-        return self.header,self.section_names,self.section_headers,self.segment_headers
-
-class ELF64(object):
-
-    def __init__(self,data):
-        self.data = data
-        self.Parse()
-
-    def Parse(self):
-        # ELF header
-        self.data.seek(0,0)
-        self.header = Elf64_Ehdr(self.data.read(Elf64_Ehdr_Size))
-
-        # ELF section header   
-        self.data.seek(self.header.e_shoff,0)
-        section_headers_data = self.data.read(self.header.e_shentsize * self.header.e_shnum)
-        # Get Section Headers
-        self.section_headers = [Elf64_Shdr(section_headers_data[i * self.header.e_shentsize:(i + 1) * self.header.e_shentsize]) for i in range(0,self.header.e_shnum)]
-
-        # Get Section Names
-        self.section_names = []
-        for i in range(0,self.header.e_shnum):
-            offset = self.section_headers[self.header.e_shstrndx].sh_offset + self.section_headers[i].sh_name
-            self.section_names.append(self.ReadStr(offset))
-
-        # Program segment header
-        self.data.seek(self.header.e_phoff,0)
-        segment_headers_data = self.data.read(self.header.e_phentsize * self.header.e_phnum)
-        self.segment_headers = [Elf64_Phdr(segment_headers_data[i * self.header.e_phentsize:(i + 1) * self.header.e_phentsize]) for i in range(0,self.header.e_phnum)]
-    
-    def ReadStr(self,offset,end='\0',len=32):
-        self.data.seek(offset,0)
-        chars = ""
-        for char in self.data.read(len).decode():
-            if not char == end:
-                chars = chars + char
-            else:
-                break
-        return chars
-
-    def Output(self):
-        return self.header,self.section_names,self.section_headers,self.segment_headers
-
-class ELF(object):
-
-    def __init__(self,filepath):
-        with open(filepath, 'rb') as fr:
-            #self.data = io.StringIO(fr.read().decode())
-            self.data = io.BytesIO(fr.read())
-
-        self.data.seek(0,0)
-        self.e_ident = E_IDENT(self.data.read(EI_NIDENT))
-
-        if self.e_ident.iself() and self.e_ident.is32bit():
-            self.elffile = ELF32(self.data)
-            self.header,self.section_names,self.section_headers,self.segment_headers = self.elffile.Output()
-        elif self.e_ident.iself() and self.e_ident.is64bit():
-            self.elffile = ELF64(self.data)
-            self.header,self.section_names,self.section_headers,self.segment_headers = self.elffile.Output()
-        else:
-            pass
-
-        self.section2segment()
-
-    def readstr(self,offset,end='\0',len=32):
-        self.data.seek(offset,0)
-        chars = ""
-        for char in self.data.read(len).decode():
-            if not char == end:
-                chars = chars + char
-            else:
-                break
-        return chars
-
-    def section2segment(self):
-        self.section2segment_result = []
-        for i in range(0,self.header.e_phnum):
-            phdr = self.segment_headers[i]
-            if phdr.p_memsz == 0:
-                self.section2segment_result.append([])
-                continue
-            else: 
-                sections = []
-                for index,section in enumerate(self.section_headers):
-                    # section must have Flag ALLOC
-                    if not section.sh_flags & SHF_ALLOC:
-                        continue
-
-                    if not bool(phdr.p_type == PT_TLS) == bool(section.sh_flags & SHF_TLS):
-                        continue
-
-                    if (section.sh_addr >= phdr.p_vaddr) and (section.sh_addr + section.sh_size) <= (phdr.p_vaddr + phdr.p_memsz):
-                        sections.append(self.section_names[index])
-                    else:
-                        pass
-            self.section2segment_result.append(sections)
-
-    def elfphdrtype(self,p_type):
-
-      if p_type > PT_LOOS and p_type< PT_HIOS:
-          return "LOOS+%x" % (p_type - PT_LOOS)
-      elif p_type > PT_LOPROC and p_type< PT_HIPROC:
-          return "LOPROC+%x" % (p_type - PT_LOPROC)
-      else:
-          return "%#x" % p_type
-
-    def PrintELFHeader(self):
-        header = self.header
-        # e_ident
-        print(e_ident_show.format(header.e_ident.e_mag0,header.e_ident.e_mag1,header.e_ident.e_mag2,header.e_ident.e_mag3,header.e_ident.e_class,
-            header.e_ident.e_data,header.e_ident.e_version,header.e_ident.e_osabi,header.e_ident.e_abiversion," ".join(['%02x' % pad for pad in header.e_ident.e_pad]),
-            ELFCLASS[header.e_ident.e_class],ELFDATA[header.e_ident.e_data],ELFVERSION[header.e_ident.e_version],ELFOSABI[header.e_ident.e_osabi],header.e_ident.e_abiversion))
-    
-        # header
-        print (Elf32_Ehdr_show.format(ELFTYPE[header.e_type],ELFMACHINE[header.e_machine],header.e_version,header.e_entry,header.e_phoff,header.e_shoff,header.e_flags,
-            header.e_ehsize,header.e_phentsize,header.e_phnum,header.e_shentsize,header.e_shnum,header.e_shstrndx))
-
-    def OutputELFHeader(self):
-        header = self.header
-        magic_info = [header.e_ident.e_mag0,
-                 header.e_ident.e_mag1, header.e_ident.e_mag2, header.e_ident.e_mag3, header.e_ident.e_class,
-                 header.e_ident.e_data, header.e_ident.e_version, header.e_ident.e_osabi, header.e_ident.e_abiversion]
-        magic_info.extend(header.e_ident.e_pad)
-
-        return {'Magic':magic_info,#list
-                  'Class':ELFCLASS[header.e_ident.e_class],#string
-                  'Data':ELFDATA[header.e_ident.e_data],#string
-                  'Version':ELFVERSION[header.e_ident.e_version],#string
-                  'OS/ABI':ELFOSABI[header.e_ident.e_osabi],#string
-                  'ABI Version':header.e_ident.e_abiversion,#oct int
-                  'Type':ELFTYPE[header.e_type],#string
-                  'Machine':ELFMACHINE[header.e_machine],#string
-                  'Version':'{:#x}'.format(header.e_version),# hex int
-                  'Entry point address':'{:#x}'.format(header.e_entry),# hex int
-                  'Start of program headers':header.e_phoff,# oct int
-                  'Start of section headers':header.e_shoff,# oct int
-                'Flags':'{:#x}'.format(header.e_flags),# hex int
-                'Size of this header': header.e_ehsize,# oct int
-                'Size of program headers': header.e_phentsize,#oct int
-                'Number of program headers':header.e_phnum,#oct int
-                'Size of section headers': header.e_shentsize,#oct int
-                'Number of section headers':header.e_shnum,#oct int
-                'Section header string table index':header.e_shstrndx,#oct int
-        }
-
-
-
-    def PrintELFShdr(self):
-        ELF32title = '[{:>2s}] {:<20s} {:<16s} {:<8s} {:<6s} {:<6s} {:>2s} {:>3s} {:>2s} {:>3s} {:>2s}'
-        ELF32content = '[{:2d}] {:<20s} {:<16s} {:0>8x} {:0>6x} {:0>6x} {:0>2x} {:>3s} {:>2d} {:>3d} {:>2d}'
-        ELF64title = '[{:>2s}] {:<16s} {:<16s} {:>16s} {:<8s}\n     {:<16s} {:<16s} {:>6s} {:>4s} {:>4s} {:>6s}'
-        ELF64content = '[{:2d}] {:<16s} {:<16s} {:0>16x} {:0>8x}\n     {:0>16x} {:0>16x} {:>6s} {:>4d} {:>4d} {:>6d}'        
-        #print('There are {:d} section headers, starting at offset {:#x}:\n\nSection Headers:').format(self.header.e_shnum,self.header.e_shoff)
-        if self.e_ident.is32bit():
-            title, content= ELF32title,ELF32content   
-        elif self.e_ident.is64bit():
-            title, content= ELF64title,ELF64content
-        else:
-            return
-
-        print(title.format('Nr','Name','Type','Addr','Off','Size','ES','Flg','Lk','Inf','Al'))
-        for i in range(0,self.header.e_shnum):
-            shdr = self.section_headers[i]
-            sh_name = self.section_names[i]
-            sh_flags = ''.join([mark for flag,mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
-            print(content.format(i,sh_name,ELFSHTYPE.get(shdr.sh_type,"%#x" % shdr.sh_type),shdr.sh_addr,shdr.sh_offset,shdr.sh_size,shdr.sh_entsize,sh_flags,shdr.sh_link,shdr.sh_info,shdr.sh_addralign))
-
-    def OutputELFShdr(self):
-        output = []
-
-        if self.e_ident.is32bit():
-            for i,shdr in enumerate(self.section_headers):
-                #shdr = self.section_headers[i]
-                sh_name = self.section_names[i]
-                sh_flags = ''.join([mark for flag, mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
-                output.append(
-                    {'Name': sh_name,
-                     'Type': ELFSHTYPE.get(shdr.sh_type, "%#x" % shdr.sh_type),
-                     'Addr': '{:0>8x}'.format(shdr.sh_addr), # hex int
-                     'Off': '{:0>6x}'.format(shdr.sh_offset), # hex int
-                     'Size': '{:0>6x}'.format(shdr.sh_size), # hex int
-                     'ES': '{:0>2x}'.format(shdr.sh_entsize), # hex int
-                     'Flg': sh_flags,# string
-                     'Lk': shdr.sh_link, # oct int
-                     'Inf': shdr.sh_info, # oct int
-                     'Al': shdr.sh_addralign}) #oct int
-        elif self.e_ident.is64bit():
-            for i,shdr in enumerate(self.section_headers):
-                #shdr = self.section_headers[i]
-                sh_name = self.section_names[i]
-                sh_flags = ''.join([mark for flag, mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
-                output.append(
-                    {'Name': sh_name,
-                     'Type': ELFSHTYPE.get(shdr.sh_type, "%#x" % shdr.sh_type),
-                     'Addr': '{:0>16x}'.format(shdr.sh_addr), # hex int
-                     'Off': '{:0>8x}'.format(shdr.sh_offset), # hex int
-                     'Size': '{:0>16x}'.format(shdr.sh_size), # hex int
-                     'ES': '{:0>16x}'.format(shdr.sh_entsize), # hex int
-                     'Flg': sh_flags, # string
-                     'Lk': shdr.sh_link, # oct int
-                     'Inf': shdr.sh_info, # oct int
-                     'Al': shdr.sh_addralign}) #oct int
-        else:
-            return
-        return output
-
-    def PrintELFPhdr(self):
-        #print('Elf file type is {:s}').format(ELFTYPE[self.header.e_type],)
-        #print('Entry point {:#x}').format(self.header.e_entry,)
-        #print('There are {:d} program headers, starting at offset {:d}\n\nProgram Headers:').format(self.header.e_phnum,self.header.e_phoff)
-        ELF32title = '{:<14s} {:<8s} {:<10s} {:<10s} {:<7s} {:<7s} {:<3s} {:<6s}'
-        ELF32content = '{:<14s} 0x{:0>6x} 0x{:0>8x} 0x{:0>8x} 0x{:0>5x} 0x{:0>5x} {:<3s} 0x{:<4x}'
-        ELF64title = '{:<14s} {:<18s} {:<18s} {:<18s} \n               {:<18s} {:<18s} {:<6s} {:<6s}'
-        ELF64content = '{:<14s} 0x{:0>16x} 0x{:0>16x} 0x{:0>16x} \n               0x{:0>16x} 0x{:0>16x} {:<6s} {:<6x}'
-
-        if self.e_ident.is32bit():
-            title,content = ELF32title, ELF32content
-        elif self.e_ident.is64bit():
-            title, content= ELF64title,ELF64content
-        else:
-            return
-
-        print(title.format('Type','Offset','VirtAddr','PhysAddr','FileSiz','MemSiz','Flg','Align'))
-        for i in range(0,self.header.e_phnum):
-            phdr = self.segment_headers[i]
-            ph_flags = ''.join([mark for flag,mark in ELFPHFLAG.items() if phdr.p_flags & flag])
-            print(content.format(ELFPHTYPE.get(phdr.p_type,self.elfphdrtype(phdr.p_type)),phdr.p_offset,phdr.p_vaddr,phdr.p_paddr,phdr.p_filesz,phdr.p_memsz,ph_flags,phdr.p_align))
-            
-            if phdr.p_type == PT_INTERP:
-                print ("\t[Requesting program interpreter: %s]" % self.readstr(offset = phdr.p_offset))
-
-        print('\nSection to Segment mapping:\nSegment Sections...')
-        for index,sections in enumerate(self.section2segment_result):
-            print('{:0>2d}    {:s}'.format(index," ".join(sections)))
-
-    def OutputELFPhdr(self):
-        output = []
-
-        if self.e_ident.is32bit():
-            for i,phdr in enumerate(self.segment_headers):
-                ph_flags = ''.join([mark for flag, mark in ELFPHFLAG.items() if phdr.p_flags & flag])
-
-                output.append(
-                    {'Type':ELFPHTYPE.get(phdr.p_type, self.elfphdrtype(phdr.p_type)), #string
-                     'Offset':'0x{:0>6x}'.format(phdr.p_offset), #hex
-                     'VirtAddr':'0x{:0>8x}'.format(phdr.p_vaddr),#hex
-                     'PhysAddr':'0x{:0>8x}'.format(phdr.p_paddr),#hex
-                     'FileSiz':'0x{:0>5x}'.format(phdr.p_filesz),#hex
-                     'MemSiz':'0x{:0>5x}'.format(phdr.p_memsz),#hex
-                     'Flg':ph_flags, #string
-                     'Align':'0x{:<4x}'.format(phdr.p_align)})#hex
-        elif self.e_ident.is64bit():
-            for i,phdr in enumerate(self.segment_headers):
-                ph_flags = ''.join([mark for flag, mark in iter(ELFPHFLAG.items()) if phdr.p_flags & flag])
-                output.append(
-                    {'Type':ELFPHTYPE.get(phdr.p_type, self.elfphdrtype(phdr.p_type)),
-                     'Offset':'0x{:0>16x}'.format(phdr.p_offset),
-                     'VirtAddr':'0x{:0>16x}'.format(phdr.p_vaddr),
-                     'PhysAddr':'0x{:0>16x}'.format(phdr.p_paddr),
-                     'FileSiz':'0x{:0>16x}'.format(phdr.p_filesz),
-                     'MemSiz':'0x{:0>16x}'.format(phdr.p_memsz),
-                     'Flg':ph_flags,
-                     'Align':'0x{:<6x}'.format(phdr.p_align)})
-        else:
-            return
-        return output
-        
-
-
-    def Print(self):
-        self.PrintELFHeader()
-        self.PrintELFShdr()
-        print(Section_FLag_info)
-        self.PrintELFPhdr()
-
-
-
+
+
+# Refer: https://linux.die.net/include/elf.h
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from functools import cached_property
+import mmap
+import struct
+import sys
+
+# Standard ELF types. #
+
+# Data Type (struct format characters, byte order is added per file from EI_DATA) #
+# 8-bit B b
+# 16-bit H h
+# 32-bit I i
+# 64-bit Q q
+
+# Type for a 16-bit quantity. #
+Elf32_Half = 'H'
+Elf64_Half = 'H'
+
+# Types for signed and unsigned 32-bit quantities. #
+Elf32_Word  = 'I'
+Elf32_Sword = 'i'
+Elf64_Word  = 'I'
+Elf64_Sword = 'i'
+
+# Types for signed and unsigned 64-bit quantities. #
+Elf32_Xword  = 'Q'
+Elf32_Sxword = 'q'
+Elf64_Xword  = 'Q'
+Elf64_Sxword = 'q'
+
+
+# Type of addresses. #
+Elf32_Addr = 'I'
+Elf64_Addr = 'Q'
+
+# Type of file offsets. #
+Elf32_Off = 'I'
+Elf64_Off = 'Q'
+
+# Type for section indices, which are 16-bit quantities. #
+Elf32_Section = 'H'
+Elf64_Section = 'H'
+
+# Type for version symbol information. #
+Elf32_Versym = Elf32_Half
+Elf64_Versym = Elf64_Half
+
+# The ELF file header.  This appears at the start of every ELF file.  #
+
+# ELF e_ident 
+EI_NIDENT = 16
+
+Elf32_Ehdr_Size = 52 # ELF32 header size 
+Elf64_Ehdr_Size = 64 # ELF64 header size 
+
+# Fields in the e_ident array.  The EI_* macros are indices into the array.  
+# The macros under each EI_* macro are the values the byte may have.  
+
+# ELF MAGIC File identification 
+ELFMAG0 = 0x7f # Magic number byte 0 
+ELFMAG1 = 'E'  # Magic number byte 1
+ELFMAG2 = 'L'  # Magic number byte 2
+ELFMAG3 = 'F'  # Magic number byte 3 
+ELFMAG  = [ELFMAG0, ord(ELFMAG1), ord(ELFMAG2), ord(ELFMAG3)] 
+
+# ELF File class 
+ELFCLASSNONE = 0    # Invalid class
+ELFCLASS32   = 1    # 32-bit objects 
+ELFCLASS64   = 2    # 64-bit objects
+ELFCLASS = {ELFCLASSNONE:'Invalid class',ELFCLASS32:'ELF32',ELFCLASS64:'ELF64'}
+
+# ELF DATA encoding 
+ELFDATANONE = 0     # Invalid data encoding
+ELFDATA2LSB = 1     # 2's complement, little endian
+ELFDATA2MSB = 2     # 2's complement, big endian 
+ELFDATA = {ELFDATANONE:'Invalid data encoding',ELFDATA2LSB:'''2's complement, little endian''',ELFDATA2MSB:'''2's complement, big endian'''}
+
+# ELF File version Value must be EV_CURRENT
+# Legal values for e_version (version)
+EV_NONE    = 0       # Invalid ELF version 
+EV_CURRENT = 1       # Current version
+ELFVERSION = {EV_NONE:'0 (Invalid)',EV_CURRENT:'1 (Current)'}
+
+# ELF OS ABI identification
+ELFOSABI_NONE       = 0   # UNIX System V ABI (UNIX - System V)
+ELFOSABI_SYSV       = 0   # Alias
+ELFOSABI_HPUX       = 1   # HP-UX 
+ELFOSABI_NETBSD     = 2   # NetBSD 
+ELFOSABI_LINUX      = 3   # Linux  
+ELFOSABI_SOLARIS    = 6   # Sun Solaris
+ELFOSABI_AIX        = 7   # IBM AIX 
+ELFOSABI_IRIX       = 8   # SGI Irix
+ELFOSABI_FREEBSD    = 9   # FreeBSD
+ELFOSABI_TRU64      = 10  # Compaq TRU64 UNIX
+ELFOSABI_MODESTO    = 11  # Novell Modesto
+ELFOSABI_OPENBSD    = 12  # OpenBSD
+ELFOSABI_ARM        = 97  # ARM 
+ELFOSABI_STANDALONE = 255 # Standalone (embedded) application 
+
+ELFOSABI = {ELFOSABI_SYSV:'UNIX - System V',ELFOSABI_HPUX:'HP-UX',ELFOSABI_NETBSD:'NetBSD',ELFOSABI_LINUX:'Linux',
+            ELFOSABI_SOLARIS:'Sun Solaris',ELFOSABI_AIX:'IBM AIX',ELFOSABI_IRIX:'SGI Irix',ELFOSABI_FREEBSD:'FreeBSD',
+            ELFOSABI_TRU64:'Compaq TRU64 UNIX',ELFOSABI_MODESTO:'Novell Modesto',ELFOSABI_OPENBSD:'OpenBSD',
+            ELFOSABI_ARM:'ARM',ELFOSABI_STANDALONE:'Standalone (embedded) application'
+}
+
+# Legal values for e_type (object file type)
+
+ET_NONE   = 0      # No file type
+ET_REL    = 1      # Relocatable file 
+ET_EXEC   = 2      # Executable file
+ET_DYN    = 3      # Shared object file
+ET_CORE   = 4      # Core file
+ET_NUM    = 5      # Number of defined types
+ET_LOOS   = 0xfe00 # OS-specific range start 
+ET_HIOS   = 0xfeff # OS-specific range end 
+ET_LOPROC = 0xff00 # Processor-specific range start 
+ET_HIPROC = 0xffff # Processor-specific range end 
+ELFTYPE = {ET_NONE:'No file type',ET_REL:'REL (Relocatable file)',ET_EXEC:'EXEC (Executable file)',ET_DYN:'DYN (Shared object file)',ET_CORE:'CORE (Core file)'}
+
+# Legal values for e_machine (architecture)
+
+EM_NONE        = 0      # No machine 
+EM_M32         = 1      # AT&T WE 32100 
+EM_SPARC       = 2      # SUN SPARC 
+EM_386         = 3      # Intel 80386 
+EM_68K         = 4      # Motorola m68k family 
+EM_88K         = 5      # Motorola m88k family 
+EM_860         = 7      # Intel 80860 
+EM_MIPS        = 8      # MIPS R3000 big-endian 
+EM_S370        = 9      # IBM System/370 
+EM_MIPS_RS3_LE = 10     # MIPS R3000 little-endian 
+
+EM_PARISC      = 15      # HPPA 
+EM_VPP500      = 17      # Fujitsu VPP500 
+EM_SPARC32PLUS = 18      # Sun's "v8plus" 
+EM_960         = 19      # Intel 80960 
+EM_PPC         = 20      # PowerPC 
+EM_PPC64       = 21      # PowerPC 64-bit 
+EM_S390        = 22      # IBM S390 
+
+EM_V800        = 36      # NEC V800 series 
+EM_FR20        = 37      # Fujitsu FR20 
+EM_RH32        = 38      # TRW RH-32 
+EM_RCE         = 39      # Motorola RCE 
+EM_ARM         = 40      # ARM 
+EM_FAKE_ALPHA  = 41      # Digital Alpha 
+EM_SH          = 42      # Hitachi SH 
+EM_SPARCV9     = 43      # SPARC v9 64-bit 
+EM_TRICORE     = 44      # Siemens Tricore 
+EM_ARC         = 45      # Argonaut RISC Core 
+EM_H8_300      = 46      # Hitachi H8/300 
+EM_H8_300H     = 47      # Hitachi H8/300H 
+EM_H8S         = 48      # Hitachi H8S 
+EM_H8_500      = 49      # Hitachi H8/500 
+EM_IA_64       = 50      # Intel Merced 
+EM_MIPS_X      = 51      # Stanford MIPS-X 
+EM_COLDFIRE    = 52      # Motorola Coldfire 
+EM_68HC12      = 53      # Motorola M68HC12 
+EM_MMA         = 54      # Fujitsu MMA Multimedia Accelerator
+EM_PCP         = 55      # Siemens PCP 
+EM_NCPU        = 56      # Sony nCPU embeeded RISC 
+EM_NDR1        = 57      # Denso NDR1 microprocessor 
+EM_STARCORE    = 58      # Motorola Start*Core processor 
+EM_ME16        = 59      # Toyota ME16 processor 
+EM_ST100       = 60      # STMicroelectronic ST100 processor 
+EM_TINYJ       = 61      # Advanced Logic Corp. Tinyj emb.fam
+EM_X86_64      = 62      # AMD x86-64 architecture / Advanced Micro Devices X86-64
+EM_PDSP        = 63      # Sony DSP Processor 
+
+EM_FX66        = 66      # Siemens FX66 microcontroller 
+EM_ST9PLUS     = 67      # STMicroelectronics ST9+ 8/16 mc 
+EM_ST7         = 68      # STmicroelectronics ST7 8 bit mc 
+EM_68HC16      = 69      # Motorola MC68HC16 microcontroller 
+EM_68HC11      = 70      # Motorola MC68HC11 microcontroller 
+EM_68HC08      = 71      # Motorola MC68HC08 microcontroller 
+EM_68HC05      = 72      # Motorola MC68HC05 microcontroller 
+EM_SVX         = 73      # Silicon Graphics SVx 
+EM_ST19        = 74      # STMicroelectronics ST19 8 bit mc 
+EM_VAX         = 75      # Digital VAX 
+EM_CRIS        = 76      # Axis Communications 32-bit embedded processor 
+EM_JAVELIN     = 77      # Infineon Technologies 32-bit embedded processor 
+EM_FIREPATH    = 78      # Element 14 64-bit DSP Processor 
+EM_ZSP         = 79      # LSI Logic 16-bit DSP Processor 
+EM_MMIX        = 80      # Donald Knuth's educational 64-bit processor 
+EM_HUANY       = 81      # Harvard University machine-independent object files 
+EM_PRISM       = 82      # SiTera Prism 
+EM_AVR         = 83      # Atmel AVR 8-bit microcontroller 
+EM_FR30        = 84      # Fujitsu FR30 
+EM_D10V        = 85      # Mitsubishi D10V 
+EM_D30V        = 86      # Mitsubishi D30V 
+EM_V850        = 87      # NEC v850 
+EM_M32R        = 88      # Mitsubishi M32R 
+EM_MN10300     = 89      # Matsushita MN10300 
+EM_MN10200     = 90      # Matsushita MN10200 
+EM_PJ          = 91      # picoJava 
+EM_OPENRISC    = 92      # OpenRISC 32-bit embedded processor 
+EM_ARC_A5      = 93      # ARC Cores Tangent-A5 
+EM_XTENSA      = 94      # Tensilica Xtensa Architecture 
+
+ELFMACHINE = {EM_NONE:'NONE',EM_M32:'AT&T WE 32100',EM_SPARC:'SUN SPARC',EM_386:'Intel 80386',EM_68K:'Motorola m68k family',EM_88K:'Motorola m88k family',EM_860:'Intel 80860',
+EM_MIPS:'MIPS R3000 big-endian',EM_S370:'IBM System/370',EM_MIPS_RS3_LE:'MIPS R3000 little-endian',EM_PARISC:'HPPA',EM_VPP500:'Fujitsu VPP500',EM_SPARC32PLUS:'''Sun's "v8plus"''',
+EM_960:'Intel 80960',EM_PPC:'PowerPC',EM_PPC64:'PowerPC 64-bit',EM_S390:'IBM S390',EM_V800:'NEC V800 series',EM_FR20:'Fujitsu FR20',EM_RH32:'TRW RH-32',EM_RCE:'Motorola RCE',EM_ARM:'ARM',
+EM_FAKE_ALPHA:'Digital Alpha',EM_SH:'Hitachi SH',EM_SPARCV9:'SPARC v9 64-bit',EM_TRICORE:'Siemens Tricore',EM_ARC:'Argonaut RISC Core',EM_H8_300:'Hitachi H8/300',
+EM_H8_300H:'Hitachi H8/300H',EM_H8S:'Hitachi H8S',EM_H8_500:'Hitachi H8/500',EM_IA_64:'Intel Merced',EM_MIPS_X:'Stanford MIPS-X',EM_COLDFIRE:'Motorola Coldfire',
+EM_68HC12:'Motorola M68HC12',EM_MMA:'Fujitsu MMA Multimedia Accelerator',EM_PCP:'Siemens PCP',EM_NCPU:'Sony nCPU embeeded RISC',EM_NDR1:'Denso NDR1 microprocessor',
+EM_STARCORE:'Motorola Start*Core processor',EM_ME16:'Toyota ME16 processor',EM_ST100:'STMicroelectronic ST100 processor',EM_TINYJ:'Advanced Logic Corp. Tinyj emb.fam',
+EM_X86_64:'Advanced Micro Devices X86-64',EM_PDSP:'Sony DSP Processor',EM_FX66:'Siemens FX66 microcontroller',EM_ST9PLUS:'STMicroelectronics ST9+ 8/16 mc',EM_ST7:'STmicroelectronics ST7 8 bit mc',
+EM_68HC16:'Motorola MC68HC16 microcontroller',EM_68HC11:'Motorola MC68HC11 microcontroller',EM_68HC08:'Motorola MC68HC08 microcontroller',EM_68HC05:'Motorola MC68HC05 microcontroller',
+EM_SVX:'Silicon Graphics SVx',EM_ST19:'STMicroelectronics ST19 8 bit mc',EM_VAX:'Digital VAX',EM_CRIS:'Axis Communications 32-bit embedded processor',EM_JAVELIN:'Infineon Technologies 32-bit embedded processor',
+EM_FIREPATH:'Element 14 64-bit DSP Processor',EM_ZSP:'LSI Logic 16-bit DSP Processor',EM_MMIX:'''Donald Knuth's educational 64-bit processor''',EM_HUANY:'Harvard University machine-independent object files',
+EM_PRISM:'SiTera Prism',EM_AVR:'Atmel AVR 8-bit microcontroller',EM_FR30:'Fujitsu FR30',EM_D10V:'Mitsubishi D10V',EM_D30V:'Mitsubishi D30V',EM_V850:'NEC v850',EM_M32R:'Mitsubishi M32R',
+EM_MN10300:'Matsushita MN10300',EM_MN10200:'Matsushita MN10200',EM_PJ:'picoJava',EM_OPENRISC:'OpenRISC 32-bit embedded processor',EM_ARC_A5:'ARC Cores Tangent-A5',EM_XTENSA:'Tensilica Xtensa Architecture',
+}
+
+# Special section indices.  
+
+SHN_UNDEF     = 0           # Undefined section 
+SHN_LORESERVE = 0xff00      # Start of reserved indices 
+SHN_LOPROC    = 0xff00      # Start of processor-specific 
+SHN_BEFORE    = 0xff00      # Order section before all others (Solaris).  
+SHN_AFTER     = 0xff01      # Order section after all others (Solaris).  
+SHN_HIPROC    = 0xff1f      # End of processor-specific 
+SHN_LOOS      = 0xff20      # Start of OS-specific 
+SHN_HIOS      = 0xff3f      # End of OS-specific 
+SHN_ABS       = 0xfff1      # Associated symbol is absolute 
+SHN_COMMON    = 0xfff2      # Associated symbol is common 
+SHN_XINDEX    = 0xffff      # Index is in extra table.  
+SHN_HIRESERVE = 0xffff      # End of reserved indices 
+
+PN_XNUM       = 0xffff      # e_phnum escape, the real count is sh_info of section 0
+
+
+# Legal values for sh_type (section type)
+
+SHT_NULL          = 0          # Section header table entry unused 
+SHT_PROGBITS      = 1          # Program data 
+SHT_SYMTAB        = 2          # Symbol table 
+SHT_STRTAB        = 3          # String table 
+SHT_RELA          = 4          # Relocation entries with addends 
+SHT_HASH          = 5          # Symbol hash table 
+SHT_DYNAMIC       = 6          # Dynamic linking information 
+SHT_NOTE          = 7          # Notes 
+SHT_NOBITS        = 8          # Program space with no data (bss) 
+SHT_REL           = 9          # Relocation entries, no addends 
+SHT_SHLIB         = 10         # Reserved 
+SHT_DYNSYM        = 11         # Dynamic linker symbol table 
+SHT_INIT_ARRAY    = 14         # Array of constructors 
+SHT_FINI_ARRAY    = 15         # Array of destructors 
+SHT_PREINIT_ARRAY = 16         # Array of pre-constructors 
+SHT_GROUP         = 17         # Section group 
+SHT_SYMTAB_SHNDX  = 18         # Extended section indeces 
+SHT_LOOS          = 0x60000000 # Start OS-specific.  
+SHT_GNU_HASH      = 0x6ffffff6 # GNU-style hash table.  
+SHT_GNU_LIBLIST   = 0x6ffffff7 # Prelink library list 
+SHT_CHECKSUM      = 0x6ffffff8 # Checksum for DSO content.  
+SHT_LOSUNW        = 0x6ffffffa # Sun-specific low bound.  
+SHT_SUNW_move     = 0x6ffffffa
+SHT_SUNW_COMDAT   = 0x6ffffffb
+SHT_SUNW_syminfo  = 0x6ffffffc
+SHT_GNU_verdef    = 0x6ffffffd # Version definition section.  
+SHT_GNU_verneed   = 0x6ffffffe # Version needs section.  
+SHT_GNU_versym    = 0x6fffffff # Version symbol table.  
+SHT_HISUNW        = 0x6fffffff # Sun-specific high bound.  
+SHT_HIOS          = 0x6fffffff # End OS-specific type 
+SHT_LOPROC        = 0x70000000 # Start of processor-specific 
+SHT_HIPROC        = 0x7fffffff # End of processor-specific 
+SHT_LOUSER        = 0x80000000 # Start of application-specific 
+SHT_HIUSER        = 0x8fffffff # End of application-spec
+
+ELFSHTYPE = {SHT_NULL:'NULL',SHT_PROGBITS:'PROGBITS',SHT_SYMTAB:'SYMTAB',SHT_STRTAB:'STRTAB',SHT_RELA:'RELA',SHT_HASH:'HASH',SHT_DYNAMIC:'DYNAMIC',
+SHT_NOTE:'NOTE',SHT_NOBITS:'NOBITS',SHT_REL:'REL',SHT_SHLIB:'SHLIB',SHT_DYNSYM:'DYNSYM',SHT_INIT_ARRAY:'INIT_ARRAY',
+SHT_FINI_ARRAY:'FINI_ARRAY',SHT_PREINIT_ARRAY:'PREINIT_ARRAY',SHT_GROUP:'GROUP',SHT_SYMTAB_SHNDX:'SYMTAB_SHNDX',
+SHT_GNU_HASH:'GNU_HASH',SHT_GNU_LIBLIST:'GNU_LIBLIST',SHT_CHECKSUM:'CHECKSUM',SHT_GNU_verdef:'GNU_verdef',SHT_GNU_verneed:"VERNEED",SHT_GNU_versym:"VERSYM"
+}
+
+# Legal values for sh_flags (section flags).  
+
+SHF_WRITE             = (1 << 0)   # Writable 
+SHF_ALLOC             = (1 << 1)   # Occupies memory during execution 
+SHF_EXECINSTR         = (1 << 2)   # Executable
+SHF_MERGE             = (1 << 4)   # Might be merged
+SHF_STRINGS           = (1 << 5)   # Contains nul-terminated strings
+SHF_INFO_LINK         = (1 << 6)   # `sh_info' contains SHT index
+SHF_LINK_ORDER        = (1 << 7)   # Preserve order after combining
+SHF_OS_NONCONFORMING  = (1 << 8)   # Non-standard OS specific handling required */
+SHF_GROUP             = (1 << 9)   # Section is member of a group. 
+SHF_TLS               = (1 << 10)  # Section hold thread-local data. 
+SHF_MASKOS            = 0x0ff00000 # OS-specific. 
+SHF_MASKPROC          = 0xf0000000 # Processor-specific
+SHF_ORDERED           = (1 << 30)  # Special ordering requirement (Solaris).  */
+SHF_EXCLUDE           = (1 << 31)  # Section is excluded unless referenced or allocated (Solaris).*/
+
+ELFSHFLAG = {SHF_WRITE:'W',SHF_ALLOC:'A',SHF_EXECINSTR:'X',SHF_MERGE:'M',SHF_STRINGS:'S',SHF_INFO_LINK:'I',SHF_LINK_ORDER:'L',SHF_GROUP:'G',SHF_TLS:'T',SHF_MASKOS:'o',SHF_MASKPROC:'p',SHF_EXCLUDE:'E'}
+
+# Section group handling.  
+GRP_COMDAT = 0x1     # Mark group as COMDAT.
+
+
+# Legal values for p_type (segment type)
+
+PT_NULL    = 0   # Program header table entry unused 
+PT_LOAD    = 1   # Loadable program segment 
+PT_DYNAMIC = 2   # Dynamic linking information 
+PT_INTERP  = 3   # Program interpreter 
+PT_NOTE    = 4   # Auxiliary information 
+PT_SHLIB   = 5   # Reserved 
+PT_PHDR    = 6   # Entry for header table itself 
+PT_TLS     = 7   # Thread-local storage segment
+PT_LOOS         = 0x60000000  # Start of OS-specific 
+PT_GNU_EH_FRAME = 0x6474e550  # GCC .eh_frame_hdr segment 
+PT_GNU_STACK    = 0x6474e551  # Indicates stack executability 
+PT_GNU_RELRO    = 0x6474e552  # Read-only after relocation 
+PT_LOSUNW       = 0x6ffffffa  #
+PT_SUNWBSS      = 0x6ffffffa  # Sun Specific segment 
+PT_SUNWSTACK    = 0x6ffffffb  # Stack segment 
+PT_HISUNW       = 0x6fffffff  #
+PT_HIOS         = 0x6fffffff  # End of OS-specific 
+PT_LOPROC       = 0x70000000  # Start of processor-specific 
+PT_HIPROC       = 0x7fffffff  # End of processor-specific 
+
+ELFPHTYPE = {PT_NULL:'NULL',PT_LOAD:'LOAD',PT_DYNAMIC:'DYNAMIC',PT_INTERP:'INTERP',PT_NOTE:'NOTE',PT_SHLIB:'SHLIB',PT_PHDR:'PHDR',PT_TLS:'TLS',
+PT_LOOS:'LOOS',PT_GNU_EH_FRAME:'GNU_EH_FRAME',PT_GNU_STACK:'GNU_STACK',PT_GNU_RELRO:'GNU_RELRO',PT_LOSUNW:'LOSUNW',PT_SUNWBSS:'SUNWBSS',
+PT_SUNWSTACK:'SUNWSTACK',PT_HISUNW:'HISUNW',PT_HIOS:'HIOS',PT_LOPROC:'LOPROC',PT_HIPROC:'HIPROC',}
+
+# Legal values for p_flags (segment flags)
+
+PF_X         = (1 << 0)  # Segment is executable 
+PF_W         = (1 << 1)  # Segment is writable 
+PF_R         = (1 << 2)  # Segment is readable 
+PF_MASKOS    = 0x0ff00000  # OS-specific 
+PF_MASKPROC  = 0xf0000000  # Processor-specific
+
+ELFPHFLAG = {PF_X:'E',PF_W:'W',PF_R:'R'}
+
+# Symbol table entry st_info: binding (high 4 bits) and type (low 4 bits)
+
+STB_LOCAL      = 0   # Local symbol 
+STB_GLOBAL     = 1   # Global symbol 
+STB_WEAK       = 2   # Weak symbol 
+STB_GNU_UNIQUE = 10  # Unique symbol 
+
+ELFSTBIND = {STB_LOCAL:'LOCAL',STB_GLOBAL:'GLOBAL',STB_WEAK:'WEAK',STB_GNU_UNIQUE:'UNIQUE'}
+
+STT_NOTYPE    = 0   # Symbol type is unspecified 
+STT_OBJECT    = 1   # Symbol is a data object 
+STT_FUNC      = 2   # Symbol is a code object 
+STT_SECTION   = 3   # Symbol associated with a section 
+STT_FILE      = 4   # Symbol's name is file name 
+STT_COMMON    = 5   # Symbol is a common data object 
+STT_TLS       = 6   # Symbol is thread-local data object
+STT_GNU_IFUNC = 10  # Symbol is indirect code object 
+
+ELFSTTYPE = {STT_NOTYPE:'NOTYPE',STT_OBJECT:'OBJECT',STT_FUNC:'FUNC',STT_SECTION:'SECTION',STT_FILE:'FILE',STT_COMMON:'COMMON',STT_TLS:'TLS',STT_GNU_IFUNC:'IFUNC'}
+
+# Legal values for d_tag (dynamic entry type)
+
+DT_NULL     = 0           # Marks end of dynamic section 
+DT_NEEDED   = 1           # Name of needed library 
+DT_PLTRELSZ = 2           # Size in bytes of PLT relocs 
+DT_PLTGOT   = 3           # Processor defined value 
+DT_HASH     = 4           # Address of symbol hash table 
+DT_STRTAB   = 5           # Address of string table 
+DT_SYMTAB   = 6           # Address of symbol table 
+DT_RELA     = 7           # Address of Rela relocs 
+DT_RELASZ   = 8           # Total size of Rela relocs 
+DT_RELAENT  = 9           # Size of one Rela reloc 
+DT_STRSZ    = 10          # Size of string table 
+DT_SYMENT   = 11          # Size of one symbol table entry 
+DT_INIT     = 12          # Address of init function 
+DT_FINI     = 13          # Address of termination function 
+DT_SONAME   = 14          # Name of shared object 
+DT_RPATH    = 15          # Library search path (deprecated) 
+DT_SYMBOLIC = 16          # Start symbol search here 
+DT_REL      = 17          # Address of Rel relocs 
+DT_RELSZ    = 18          # Total size of Rel relocs 
+DT_RELENT   = 19          # Size of one Rel reloc 
+DT_PLTREL   = 20          # Type of reloc in PLT 
+DT_DEBUG    = 21          # For debugging; unspecified 
+DT_TEXTREL  = 22          # Reloc might modify .text 
+DT_JMPREL   = 23          # Address of PLT relocs 
+DT_BIND_NOW = 24          # Process relocations of object 
+DT_RUNPATH  = 29          # Library search path 
+DT_FLAGS    = 30          # Flags for the object being loaded 
+DT_GNU_HASH = 0x6ffffef5  # GNU-style hash table 
+DT_VERSYM   = 0x6ffffff0  # 
+DT_FLAGS_1  = 0x6ffffffb  # State flags 
+DT_VERNEED  = 0x6ffffffe  # Address of table with needed versions 
+
+ELFDTAG = {DT_NULL:'NULL',DT_NEEDED:'NEEDED',DT_PLTRELSZ:'PLTRELSZ',DT_PLTGOT:'PLTGOT',DT_HASH:'HASH',DT_STRTAB:'STRTAB',DT_SYMTAB:'SYMTAB',
+DT_RELA:'RELA',DT_RELASZ:'RELASZ',DT_RELAENT:'RELAENT',DT_STRSZ:'STRSZ',DT_SYMENT:'SYMENT',DT_INIT:'INIT',DT_FINI:'FINI',DT_SONAME:'SONAME',
+DT_RPATH:'RPATH',DT_SYMBOLIC:'SYMBOLIC',DT_REL:'REL',DT_RELSZ:'RELSZ',DT_RELENT:'RELENT',DT_PLTREL:'PLTREL',DT_DEBUG:'DEBUG',DT_TEXTREL:'TEXTREL',
+DT_JMPREL:'JMPREL',DT_BIND_NOW:'BIND_NOW',DT_RUNPATH:'RUNPATH',DT_FLAGS:'FLAGS',DT_GNU_HASH:'GNU_HASH',DT_VERSYM:'VERSYM',DT_FLAGS_1:'FLAGS_1',DT_VERNEED:'VERNEED'}
+
+# d_val of these tags is an offset into the dynamic string table
+DT_STRING_TAGS = (DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH)
+
+def Record(name,fields):
+    '''
+    namedtuple of a C struct, fields: [(field name, format character), ...] in file order
+    Record.format is the struct format without the byte order
+    '''
+    record = namedtuple(name, [field for field, fmt in fields])
+    record.format = ''.join([fmt for field, fmt in fields])
+    return record
+
+# E_IDENT
+class E_IDENT(Record('E_IDENT', [
+                ('e_mag0','B'),       # File identification / Magic number byte 0
+                ('e_mag1','B'),       # File identification / Magic number byte 1
+                ('e_mag2','B'),       # File identification / Magic number byte 2
+                ('e_mag3','B'),       # File identification / Magic number byte 3
+                ('e_class','B'),      # File class byte
+                ('e_data','B'),       # Data encoding byte
+                ('e_version','B'),    # File version byte
+                ('e_osabi','B'),      # OS ABI identification
+                ('e_abiversion','B'), # ABI version
+                ('e_pad','7s'),       # padding bytes
+    ])):
+
+    __slots__ = ()
+
+    @classmethod
+    def decode(cls, buffer, offset = 0):
+        # single bytes, the same in either byte order; a short buffer is zero padded
+        return cls._make(E_IDENT_Struct.unpack(bytes(buffer[offset:offset + EI_NIDENT]).ljust(EI_NIDENT, b'\0')))
+
+    def iself(self):
+        return True if self.e_mag0 == ELFMAG0 and self.e_mag1 == ord(ELFMAG1) and self.e_mag2 == ord(ELFMAG2) and self.e_mag3 == ord(ELFMAG3) else False
+
+    def is32bit(self):
+        return True if self.e_class == ELFCLASS32 else False
+
+    def is64bit(self):
+        return True if self.e_class == ELFCLASS64 else False
+
+E_IDENT_Struct = struct.Struct(E_IDENT.format)
+
+
+# The ELF file header.  This appears at the start of every ELF file.
+# e_ident is unpacked as raw bytes and replaced by an E_IDENT record
+
+Elf32_Ehdr = Record('Elf32_Ehdr', [
+            ('e_ident','%ds' % EI_NIDENT), # Magic number and other info 
+            ('e_type',Elf32_Half),      # Object file type 
+            ('e_machine',Elf32_Half),   # Architecture
+            ('e_version',Elf32_Word),   # Object file version
+            ('e_entry',Elf32_Addr),     # Entry point virtual address
+            ('e_phoff',Elf32_Off),      # Program header table file offset 
+            ('e_shoff',Elf32_Off),      # Section header table file offset 
+            ('e_flags',Elf32_Word),     # Processor-specific flags 
+            ('e_ehsize',Elf32_Half),    # ELF header size in bytes 
+            ('e_phentsize',Elf32_Half), # Program header table entry size 
+            ('e_phnum',Elf32_Half),     # Program header table entry count 
+            ('e_shentsize',Elf32_Half), # Section header table entry size 
+            ('e_shnum',Elf32_Half),     # Section header table entry count 
+            ('e_shstrndx',Elf32_Half),  # Section header string table index 
+    ])
+
+Elf64_Ehdr = Record('Elf64_Ehdr', [
+            ('e_ident','%ds' % EI_NIDENT), # Magic number and other info 
+            ('e_type',Elf64_Half),      # Object file type 
+            ('e_machine',Elf64_Half),   # Architecture 
+            ('e_version',Elf64_Word),   # Object file version 
+            ('e_entry',Elf64_Addr),     # Entry point virtual address 
+            ('e_phoff',Elf64_Off),      # Program header table file offset 
+            ('e_shoff',Elf64_Off),      # Section header table file offset 
+            ('e_flags',Elf64_Word),     # Processor-specific flags 
+            ('e_ehsize',Elf64_Half),    # ELF header size in bytes 
+            ('e_phentsize',Elf64_Half), # Program header table entry size 
+            ('e_phnum',Elf64_Half),     # Program header table entry count 
+            ('e_shentsize',Elf64_Half), # Section header table entry size 
+            ('e_shnum',Elf64_Half),     # Section header table entry count 
+            ('e_shstrndx',Elf64_Half),  # Section header string table index 
+    ])
+
+# Section header
+Elf32_Shdr = Record('Elf32_Shdr', [
+              ('sh_name',Elf32_Word),      # Section name (string tbl index)
+              ('sh_type',Elf32_Word),      # Section type
+              ('sh_flags',Elf32_Word),     # Section flags
+              ('sh_addr',Elf32_Addr),      # Section virtual addr at execution
+              ('sh_offset',Elf32_Off),     # Section file offset
+              ('sh_size',Elf32_Word),      # Section size in bytes
+              ('sh_link',Elf32_Word),      # Link to another section
+              ('sh_info',Elf32_Word),      # Additional section information
+              ('sh_addralign',Elf32_Word), # Section alignment
+              ('sh_entsize',Elf32_Word),   # Entry size if section holds table 
+  ])
+
+Elf64_Shdr = Record('Elf64_Shdr', [
+              ('sh_name',Elf64_Word),       # Section name (string tbl index)
+              ('sh_type',Elf64_Word),       # Section type
+              ('sh_flags',Elf64_Xword),     # Section flags
+              ('sh_addr',Elf64_Addr),       # Section virtual addr at execution
+              ('sh_offset',Elf64_Off),      # Section file offset
+              ('sh_size',Elf64_Xword),      # Section size in bytes
+              ('sh_link',Elf64_Word),       # Link to another section
+              ('sh_info',Elf64_Word),       # Additional section information
+              ('sh_addralign',Elf64_Xword), # Section alignment
+              ('sh_entsize',Elf64_Xword),   # Entry size if section holds table 
+  ])
+
+# Program segment header
+Elf32_Phdr = Record('Elf32_Phdr', [
+              ('p_type',Elf32_Word),   # Segment type 
+              ('p_offset',Elf32_Off),  # Segment file offset 
+              ('p_vaddr',Elf32_Addr),  # Segment virtual address
+              ('p_paddr',Elf32_Addr),  # Segment physical address
+              ('p_filesz',Elf32_Word), # Segment size in file 
+              ('p_memsz',Elf32_Word),  # Segment size in memory 
+              ('p_flags',Elf32_Word),  # Segment flags
+              ('p_align',Elf32_Word),  # Segment alignment
+    ])
+
+Elf64_Phdr = Record('Elf64_Phdr', [
+              ('p_type',Elf64_Word),   # Segment type 
+              ('p_flags',Elf64_Word),  # Segment flags
+              ('p_offset',Elf64_Off),  # Segment file offset 
+              ('p_vaddr',Elf64_Addr),  # Segment virtual address
+              ('p_paddr',Elf64_Addr),  # Segment physical address
+              ('p_filesz',Elf64_Xword), # Segment size in file 
+              ('p_memsz',Elf64_Xword),  # Segment size in memory 
+              ('p_align',Elf64_Xword),  # Segment alignment
+    ])
+
+# Symbol table entry
+Elf32_Sym = Record('Elf32_Sym', [
+              ('st_name',Elf32_Word),       # Symbol name (string tbl index)
+              ('st_value',Elf32_Addr),      # Symbol value
+              ('st_size',Elf32_Word),       # Symbol size
+              ('st_info','B'),              # Symbol type and binding
+              ('st_other','B'),             # Symbol visibility
+              ('st_shndx',Elf32_Section),   # Section index
+    ])
+
+Elf64_Sym = Record('Elf64_Sym', [
+              ('st_name',Elf64_Word),       # Symbol name (string tbl index)
+              ('st_info','B'),              # Symbol type and binding
+              ('st_other','B'),             # Symbol visibility
+              ('st_shndx',Elf64_Section),   # Section index
+              ('st_value',Elf64_Addr),      # Symbol value
+              ('st_size',Elf64_Xword),      # Symbol size
+    ])
+
+# Dynamic section entry
+Elf32_Dyn = Record('Elf32_Dyn', [
+              ('d_tag',Elf32_Sword),   # Dynamic entry type
+              ('d_val',Elf32_Word),    # Integer value / address
+    ])
+
+Elf64_Dyn = Record('Elf64_Dyn', [
+              ('d_tag',Elf64_Sxword),  # Dynamic entry type
+              ('d_val',Elf64_Xword),   # Integer value / address
+    ])
+
+# Relocation entries, unpacked as (r_offset, r_info[, r_addend]) and returned as Elf_Rel
+Elf32_Rel = Record('Elf32_Rel', [('r_offset',Elf32_Addr), ('r_info',Elf32_Word)])
+Elf64_Rel = Record('Elf64_Rel', [('r_offset',Elf64_Addr), ('r_info',Elf64_Xword)])
+Elf32_Rela = Record('Elf32_Rela', [('r_offset',Elf32_Addr), ('r_info',Elf32_Word), ('r_addend',Elf32_Sword)])
+Elf64_Rela = Record('Elf64_Rela', [('r_offset',Elf64_Addr), ('r_info',Elf64_Xword), ('r_addend',Elf64_Sxword)])
+
+# r_info split into symbol index and type, r_addend is None for SHT_REL
+Elf_Rel = namedtuple('Elf_Rel', 'r_offset r_sym r_type r_addend')
+
+
+class ElfCodec(object):
+    '''
+    Precompiled struct codecs for one (EI_CLASS, EI_DATA) pair
+    tables are unpacked in bulk with iter_unpack straight from the mapped file
+    '''
+
+    def __init__(self,elfclass,elfdata):
+        endian = '>' if elfdata == ELFDATA2MSB else '<'
+        if elfclass == ELFCLASS64:
+            self.Ehdr, self.Shdr, self.Phdr, self.Sym, self.Dyn = Elf64_Ehdr, Elf64_Shdr, Elf64_Phdr, Elf64_Sym, Elf64_Dyn
+            rel, rela = Elf64_Rel, Elf64_Rela
+            self.r_sym_shift, self.r_type_mask = 32, 0xffffffff
+        else:
+            self.Ehdr, self.Shdr, self.Phdr, self.Sym, self.Dyn = Elf32_Ehdr, Elf32_Shdr, Elf32_Phdr, Elf32_Sym, Elf32_Dyn
+            rel, rela = Elf32_Rel, Elf32_Rela
+            self.r_sym_shift, self.r_type_mask = 8, 0xff
+        self.ehdr = struct.Struct(endian + self.Ehdr.format)
+        self.shdr = struct.Struct(endian + self.Shdr.format)
+        self.phdr = struct.Struct(endian + self.Phdr.format)
+        self.sym = struct.Struct(endian + self.Sym.format)
+        self.dyn = struct.Struct(endian + self.Dyn.format)
+        self.rel = struct.Struct(endian + rel.format)
+        self.rela = struct.Struct(endian + rela.format)
+
+    def unpack(self,codec,data,offset,count,entsize):
+        # count records entsize bytes apart, records past the end of data are dropped
+        entsize = max(entsize, codec.size)
+        count = max(min(count, (len(data) - offset - codec.size) // entsize + 1), 0)
+        if entsize == codec.size:
+            return codec.iter_unpack(data[offset:offset + count * entsize])
+        # padded entries
+        return (codec.unpack_from(data, offset + i * entsize) for i in range(count))
+
+    def header(self,data):
+        # a truncated header is zero padded
+        fields = self.ehdr.unpack(bytes(data[:self.ehdr.size]).ljust(self.ehdr.size, b'\0'))
+        return self.Ehdr(E_IDENT.decode(fields[0]), *fields[1:])
+
+    def section_headers(self,data,offset,count,entsize):
+        return list(map(self.Shdr._make, self.unpack(self.shdr, data, offset, count, entsize)))
+
+    def segment_headers(self,data,offset,count,entsize):
+        return list(map(self.Phdr._make, self.unpack(self.phdr, data, offset, count, entsize)))
+
+    def symbols(self,data,offset,count,entsize):
+        return list(map(self.Sym._make, self.unpack(self.sym, data, offset, count, entsize)))
+
+    def dynamic(self,data,offset,count):
+        entries = []
+        for entry in self.unpack(self.dyn, data, offset, count, 0):
+            if entry[0] == DT_NULL:
+                break
+            entries.append(self.Dyn._make(entry))
+        return entries
+
+    def relocations(self,data,offset,count,entsize,addend):
+        shift, mask = self.r_sym_shift, self.r_type_mask
+        if addend:
+            table = self.unpack(self.rela, data, offset, count, entsize)
+            return [Elf_Rel(r_offset, r_info >> shift, r_info & mask, r_addend) for r_offset, r_info, r_addend in table]
+        table = self.unpack(self.rel, data, offset, count, entsize)
+        return [Elf_Rel(r_offset, r_info >> shift, r_info & mask, None) for r_offset, r_info in table]
+
+# (EI_CLASS, EI_DATA) -> codec, compiled once at import
+ELFCODECS = dict(((elfclass, elfdata), ElfCodec(elfclass, elfdata)) for elfclass in (ELFCLASS32, ELFCLASS64) for elfdata in (ELFDATA2LSB, ELFDATA2MSB))
+
+def FindDynamic(section_headers,segment_headers):
+    # (offset, size, string table section index or None) of the dynamic table,
+    # from PT_DYNAMIC when the section headers are stripped
+    for section in section_headers:
+        if section.sh_type == SHT_DYNAMIC:
+            return section.sh_offset, section.sh_size, section.sh_link
+    for segment in segment_headers:
+        if segment.p_type == PT_DYNAMIC:
+            return segment.p_offset, segment.p_filesz, None
+    return 0, 0, None
+
+
+e_ident_show  = '''Magic: {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:02x} {:s} 
+Class: {:s} 
+Data: {:s} 
+Version: {:s}
+OS/ABI: {:s}
+ABI Version: {:d}'''
+
+Elf32_Ehdr_show = '''Type: {:s}
+Machine: {:s}
+Version: {:#x}
+Entry point address: {:#x}
+Start of program headers: {:d} (bytes into file)
+Start of section headers: {:d} (bytes into file)
+Flags: {:#x}
+Size of this header: {:d} (bytes)
+Size of program headers: {:d} (bytes)
+Number of program headers: {:d}
+Size of section headers: {:d} (bytes)
+Number of section headers: {:d}
+Section header string table index: {:d}
+'''
+
+Section_FLag_info ='''Key to Flags:
+  W (write), A (alloc), X (execute), M (merge), S (strings)
+  I (info), L (link order), G (group), T (TLS), E (exclude), x (unknown)
+  O (extra OS processing required) o (OS specific), p (processor specific)
+'''
+
+class StrTab(object):
+
+    def __init__(self,data):
+        # one copy of the table, names are sliced out of it by offset
+        self.data = bytes(data)
+        self.names = {}
+
+    def get(self,offset):
+        name = self.names.get(offset)
+        if name is None:
+            end = self.data.find(b'\0', offset)
+            if end == -1:
+                end = len(self.data)
+            # never raises on undecodable names
+            name = self.data[offset:end].decode('utf-8', 'backslashreplace')
+            self.names[offset] = name
+        return name
+
+def ReadCStr(data,offset,size):
+    # NUL terminated string at offset, at most size bytes
+    chunk = bytes(data[offset:offset + size])
+    end = chunk.find(b'\0')
+    if end != -1:
+        chunk = chunk[:end]
+    return chunk.decode('utf-8', 'backslashreplace')
+
+# Limits of the hardened parse mode, a crafted header can claim anything
+DEFAULT_LIMITS = {
+    'max_sections':4096,                  # section headers read
+    'max_segments':1024,                  # program headers read
+    'max_symbols':1000000,                # entries per symbol table
+    'max_relocations':1000000,            # entries per relocation table
+    'max_dynamic':4096,                   # dynamic section entries
+    'max_strtab_size':16 * 1024 * 1024,   # bytes per string table
+    'max_read':256 * 1024 * 1024,         # bytes decoded over all tables
+}
+
+class ELFParseError(ValueError):
+    pass
+
+class ELF32(object):
+
+    elfclass = ELFCLASS32
+
+    def __init__(self,data,hardened = False,limits = None):
+        '''
+        data: memoryview over the whole file
+        hardened: record malformed tables in self.anomalies and keep what can be read
+                  instead of raising ELFParseError, every table is bounded by limits
+        limits: overrides of DEFAULT_LIMITS
+        '''
+        # every table is decoded on first access and cached
+        self.data = data
+        self.hardened = hardened
+        # without hardened only explicit limits apply
+        self.limits = dict(DEFAULT_LIMITS if hardened else dict.fromkeys(DEFAULT_LIMITS, sys.maxsize), **(limits or {}))
+        self.anomalies = []
+        self.bytes_read = 0
+        e_data = E_IDENT.decode(data).e_data
+        if (self.elfclass, e_data) not in ELFCODECS:
+            self.anomaly('unknown EI_DATA %d, decoded as little endian' % (e_data,))
+            e_data = ELFDATA2LSB
+        self.codec = ELFCODECS[(self.elfclass, e_data)]
+        self.strtabs = {}
+        self.symtabs = {}
+        self.reltabs = {}
+
+    def anomaly(self,message):
+        if not self.hardened:
+            raise ELFParseError(message)
+        self.anomalies.append(message)
+
+    def table(self,name,offset,count,entsize,record_size,limit):
+        # number of records of a table that can and may be read, checked against file size and limits
+        if entsize and entsize < record_size:
+            self.anomaly('%s: entry size %d smaller than %d' % (name, entsize, record_size))
+        entsize = max(entsize, record_size)
+        if count > self.limits[limit]:
+            self.anomaly('%s: %d entries over the %s limit %d' % (name, count, limit, self.limits[limit]))
+            count = self.limits[limit]
+        available = max((len(self.data) - offset - record_size) // entsize + 1, 0)
+        if count > available:
+            self.anomaly('%s: offset %#x, %d entries past the end of file' % (name, offset, count - available))
+            count = available
+        return self.charge(name, count, entsize)
+
+    def charge(self,name,count,entsize):
+        # count of the records that fit in what is left of max_read
+        budget = max(self.limits['max_read'] - self.bytes_read, 0) // entsize
+        if count > budget:
+            self.anomaly('%s: max_read %d exhausted' % (name, self.limits['max_read']))
+            count = budget
+        self.bytes_read += count * entsize
+        return count
+
+    def Parse(self):
+        # decode everything now
+        return self.Output()
+
+    # ELF header
+    @cached_property
+    def header(self):
+        if len(self.data) < self.codec.ehdr.size:
+            self.anomaly('ELF header truncated to %d bytes' % (len(self.data),))
+        return self.codec.header(self.data)
+
+    # ELF section header
+    @cached_property
+    def section_headers(self):
+        header = self.header
+        count = header.e_shnum
+        if header.e_shoff == 0:
+            if count:
+                self.anomaly('e_shoff is 0 with %d section headers' % (count,))
+            return []
+        if count == 0:
+            # extended numbering, the real count is sh_size of section 0
+            first = self.codec.section_headers(self.data,header.e_shoff,self.table('section header 0',header.e_shoff,1,header.e_shentsize,self.codec.shdr.size,'max_sections'),header.e_shentsize)
+            count = first[0].sh_size if first else 0
+        count = self.table('section header table',header.e_shoff,count,header.e_shentsize,self.codec.shdr.size,'max_sections')
+        return self.codec.section_headers(self.data,header.e_shoff,count,header.e_shentsize)
+
+    # Section names
+    @cached_property
+    def section_names(self):
+        if not self.section_headers:
+            return []
+        index = self.header.e_shstrndx
+        if index == SHN_XINDEX:
+            # the real index is sh_link of section 0
+            index = self.section_headers[0].sh_link
+        shstrtab = self.strtab(index)
+        return [shstrtab.get(section.sh_name) for section in self.section_headers]
+
+    # Program segment header
+    @cached_property
+    def segment_headers(self):
+        header = self.header
+        count = header.e_phnum
+        if header.e_phoff == 0:
+            if count:
+                self.anomaly('e_phoff is 0 with %d program headers' % (count,))
+            return []
+        if count == PN_XNUM and self.section_headers:
+            # extended numbering, the real count is sh_info of section 0
+            count = self.section_headers[0].sh_info
+        count = self.table('program header table',header.e_phoff,count,header.e_phentsize,self.codec.phdr.size,'max_segments')
+        return self.codec.segment_headers(self.data,header.e_phoff,count,header.e_phentsize)
+
+    # String table (.shstrtab / .strtab / .dynstr) of section index, loaded once
+    def strtab(self,index):
+        if index not in self.strtabs:
+            if index >= len(self.section_headers):
+                self.anomaly('string table section %d of %d' % (index, len(self.section_headers)))
+                self.strtabs[index] = StrTab(b'')
+                return self.strtabs[index]
+            section = self.section_headers[index]
+            if section.sh_type == SHT_NOBITS:
+                self.strtabs[index] = StrTab(b'')
+            else:
+                self.strtabs[index] = self.strtab_at('section %d string table' % (index,),section.sh_offset,section.sh_size)
+        return self.strtabs[index]
+
+    # String table at a file offset, cut to the file and max_strtab_size
+    def strtab_at(self,name,offset,size):
+        if offset + size > len(self.data):
+            self.anomaly('%s: offset %#x size %#x past the end of file' % (name, offset, size))
+            size = max(len(self.data) - offset, 0)
+        if size > self.limits['max_strtab_size']:
+            self.anomaly('%s: %d bytes over the max_strtab_size limit %d' % (name, size, self.limits['max_strtab_size']))
+            size = self.limits['max_strtab_size']
+        size = self.charge(name, size, 1)
+        return StrTab(self.data[offset:offset + size])
+
+    # Symbol table (.symtab / .dynsym) of section index
+    def symbols(self,index):
+        if index not in self.symtabs:
+            section = self.section_headers[index]
+            entsize = max(section.sh_entsize, self.codec.sym.size)
+            count = self.table('section %d symbol table' % (index,),section.sh_offset,section.sh_size // entsize,section.sh_entsize,self.codec.sym.size,'max_symbols')
+            self.symtabs[index] = self.codec.symbols(self.data,section.sh_offset,count,section.sh_entsize)
+        return self.symtabs[index]
+
+    # Relocation entries (.rel* / .rela*) of section index
+    def relocations(self,index):
+        if index not in self.reltabs:
+            section = self.section_headers[index]
+            addend = section.sh_type == SHT_RELA
+            record_size = self.codec.rela.size if addend else self.codec.rel.size
+            entsize = max(section.sh_entsize, record_size)
+            count = self.table('section %d relocation table' % (index,),section.sh_offset,section.sh_size // entsize,section.sh_entsize,record_size,'max_relocations')
+            self.reltabs[index] = self.codec.relocations(self.data,section.sh_offset,count,section.sh_entsize,addend)
+        return self.reltabs[index]
+
+    # Dynamic section entries up to DT_NULL
+    @cached_property
+    def dynamic(self):
+        offset, size, link = FindDynamic(self.section_headers,self.segment_headers)
+        count = self.table('dynamic section',offset,size // self.codec.dyn.size,0,self.codec.dyn.size,'max_dynamic')
+        return self.codec.dynamic(self.data,offset,count)
+
+    def Output(self):
+        return self.header,self.section_names,self.section_headers,self.segment_headers
+
+class ELF64(ELF32):
+
+    # same tables, 64-bit records
+    elfclass = ELFCLASS64
+
+class ELF(object):
+
+    def __init__(self,filepath = None,data = None,hardened = False,limits = None):
+        '''
+        filepath: map the file read-only
+        data: share an already loaded buffer (bytes / mmap / memoryview) instead
+        hardened, limits: see ELF32, use for untrusted samples
+        '''
+        self.mmap = None
+        if data is None:
+            with open(filepath, 'rb') as fr:
+                self.mmap = mmap.mmap(fr.fileno(), 0, access = mmap.ACCESS_READ)
+            data = self.mmap
+        # headers are decoded straight from this view, the file is never copied
+        self.data = memoryview(data)
+
+        self.e_ident = E_IDENT.decode(self.data)
+
+        # nothing past e_ident is decoded until it is asked for
+        if self.e_ident.iself() and self.e_ident.is32bit():
+            self.elffile = ELF32(self.data,hardened,limits)
+        elif self.e_ident.iself() and self.e_ident.is64bit():
+            self.elffile = ELF64(self.data,hardened,limits)
+        else:
+            self.elffile = None
+
+    @property
+    def header(self):
+        return self.elffile.header
+
+    @property
+    def section_names(self):
+        return self.elffile.section_names
+
+    @property
+    def section_headers(self):
+        return self.elffile.section_headers
+
+    @property
+    def segment_headers(self):
+        return self.elffile.segment_headers
+
+    @property
+    def dynamic(self):
+        return self.elffile.dynamic
+
+    # malformed tables met so far (hardened mode)
+    @property
+    def anomalies(self):
+        return self.elffile.anomalies if self.elffile is not None else []
+
+    # bytes of max_read charged by the tables decoded so far
+    @property
+    def bytes_read(self):
+        return self.elffile.bytes_read if self.elffile is not None else 0
+
+    def symbols(self,index):
+        return self.elffile.symbols(index)
+
+    def relocations(self,index):
+        return self.elffile.relocations(index)
+
+    # section indexes of SHT_SYMTAB / SHT_DYNSYM / SHT_REL / SHT_RELA ...
+    def sections_of_type(self,*sh_types):
+        return [index for index, section in enumerate(self.section_headers) if section.sh_type in sh_types]
+
+    def vaddr2offset(self,vaddr):
+        # file offset of a virtual address inside a PT_LOAD segment, None if unmapped
+        for segment in self.segment_headers:
+            if segment.p_type == PT_LOAD and segment.p_vaddr <= vaddr < segment.p_vaddr + segment.p_filesz:
+                return vaddr - segment.p_vaddr + segment.p_offset
+        return None
+
+    # String table of the dynamic section, located through DT_STRTAB when the section headers are stripped
+    @cached_property
+    def dynamic_strtab(self):
+        offset, size, link = FindDynamic(self.section_headers,self.segment_headers)
+        if link is not None and link < len(self.section_headers):
+            return self.strtab(link)
+        tags = dict((entry.d_tag, entry.d_val) for entry in self.dynamic if entry.d_tag in (DT_STRTAB, DT_STRSZ))
+        offset = self.vaddr2offset(tags.get(DT_STRTAB, 0))
+        if offset is None:
+            return StrTab(b'')
+        return self.elffile.strtab_at('DT_STRTAB string table',offset,tags.get(DT_STRSZ, 0))
+
+    def dynamic_strings(self,d_tag):
+        return [self.dynamic_strtab.get(entry.d_val) for entry in self.dynamic if entry.d_tag == d_tag]
+
+    # DT_NEEDED libraries
+    @property
+    def needed(self):
+        return self.dynamic_strings(DT_NEEDED)
+
+    @property
+    def soname(self):
+        names = self.dynamic_strings(DT_SONAME)
+        return names[0] if names else None
+
+    @property
+    def rpath(self):
+        return self.dynamic_strings(DT_RPATH)
+
+    @property
+    def runpath(self):
+        return self.dynamic_strings(DT_RUNPATH)
+
+    # Undefined (imported) and defined global (exported) symbols of .dynsym
+    def imports(self):
+        names = set()
+        for index in self.sections_of_type(SHT_DYNSYM):
+            strtab = self.strtab(self.section_headers[index].sh_link)
+            for symbol in self.symbols(index):
+                if symbol.st_shndx == SHN_UNDEF and symbol.st_name and symbol.st_info >> 4 in (STB_GLOBAL, STB_WEAK):
+                    names.add(strtab.get(symbol.st_name))
+        return sorted(names)
+
+    def exports(self):
+        names = set()
+        for index in self.sections_of_type(SHT_DYNSYM):
+            strtab = self.strtab(self.section_headers[index].sh_link)
+            for symbol in self.symbols(index):
+                if symbol.st_shndx != SHN_UNDEF and symbol.st_name and symbol.st_info >> 4 in (STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE) \
+                        and symbol.st_info & 0xf in (STT_FUNC, STT_OBJECT, STT_GNU_IFUNC):
+                    names.add(strtab.get(symbol.st_name))
+        return sorted(names)
+
+    @cached_property
+    def section2segment_result(self):
+        return self.section2segment()
+
+    def close(self):
+        self.data.release()
+        if self.mmap is not None:
+            self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def readstr(self,offset,size=4096):
+        return ReadCStr(self.data,offset,size)
+
+    def strtab(self,index):
+        return self.elffile.strtab(index)
+
+    # (file offset, size in file) of a section / segment
+    def section_range(self,index):
+        section = self.section_headers[index]
+        return section.sh_offset, 0 if section.sh_type == SHT_NOBITS else section.sh_size
+
+    def segment_range(self,index):
+        segment = self.segment_headers[index]
+        return segment.p_offset, segment.p_filesz
+
+    def section2segment(self):
+        # ALLOC sections sorted by start address: each segment only visits the
+        # sections starting inside [p_vaddr, p_vaddr + p_memsz] instead of the
+        # whole table, so huge (fuzzed) section tables stay cheap
+        allocated = sorted((section.sh_addr, index) for index, section in enumerate(self.section_headers) if section.sh_flags & SHF_ALLOC)
+        starts = [addr for addr, index in allocated]
+
+        section2segment_result = []
+        for phdr in self.segment_headers:
+            if phdr.p_memsz == 0:
+                section2segment_result.append([])
+                continue
+            end = phdr.p_vaddr + phdr.p_memsz
+            tls = phdr.p_type == PT_TLS
+            indexes = []
+            for addr, index in allocated[bisect_left(starts, phdr.p_vaddr):bisect_right(starts, end)]:
+                section = self.section_headers[index]
+                if not tls == bool(section.sh_flags & SHF_TLS):
+                    continue
+                if addr + section.sh_size <= end:
+                    indexes.append(index)
+            # keep section table order
+            indexes.sort()
+            section2segment_result.append([self.section_names[index] for index in indexes])
+        return section2segment_result
+
+    def elfphdrtype(self,p_type):
+
+      if p_type > PT_LOOS and p_type< PT_HIOS:
+          return "LOOS+%x" % (p_type - PT_LOOS)
+      elif p_type > PT_LOPROC and p_type< PT_HIPROC:
+          return "LOPROC+%x" % (p_type - PT_LOPROC)
+      else:
+          return "%#x" % p_type
+
+    def PrintELFHeader(self):
+        header = self.header
+        # e_ident
+        print(e_ident_show.format(header.e_ident.e_mag0,header.e_ident.e_mag1,header.e_ident.e_mag2,header.e_ident.e_mag3,header.e_ident.e_class,
+            header.e_ident.e_data,header.e_ident.e_version,header.e_ident.e_osabi,header.e_ident.e_abiversion," ".join(['%02x' % pad for pad in header.e_ident.e_pad]),
+            ELFCLASS.get(header.e_ident.e_class,"%#x" % header.e_ident.e_class),ELFDATA.get(header.e_ident.e_data,"%#x" % header.e_ident.e_data),ELFVERSION.get(header.e_ident.e_version,"%#x" % header.e_ident.e_version),ELFOSABI.get(header.e_ident.e_osabi,"%#x" % header.e_ident.e_osabi),header.e_ident.e_abiversion))
+    
+        # header
+        print (Elf32_Ehdr_show.format(ELFTYPE.get(header.e_type,"%#x" % header.e_type),ELFMACHINE.get(header.e_machine,"%#x" % header.e_machine),header.e_version,header.e_entry,header.e_phoff,header.e_shoff,header.e_flags,
+            header.e_ehsize,header.e_phentsize,header.e_phnum,header.e_shentsize,header.e_shnum,header.e_shstrndx))
+
+    def OutputELFHeader(self):
+        header = self.header
+        magic_info = [header.e_ident.e_mag0,
+                 header.e_ident.e_mag1, header.e_ident.e_mag2, header.e_ident.e_mag3, header.e_ident.e_class,
+                 header.e_ident.e_data, header.e_ident.e_version, header.e_ident.e_osabi, header.e_ident.e_abiversion]
+        magic_info.extend(header.e_ident.e_pad)
+
+        return {'Magic':magic_info,#list
+                  'Class':ELFCLASS.get(header.e_ident.e_class,"%#x" % header.e_ident.e_class),#string
+                  'Data':ELFDATA.get(header.e_ident.e_data,"%#x" % header.e_ident.e_data),#string
+                  'Version':ELFVERSION.get(header.e_ident.e_version,"%#x" % header.e_ident.e_version),#string
+                  'OS/ABI':ELFOSABI.get(header.e_ident.e_osabi,"%#x" % header.e_ident.e_osabi),#string
+                  'ABI Version':header.e_ident.e_abiversion,#oct int
+                  'Type':ELFTYPE.get(header.e_type,"%#x" % header.e_type),#string
+                  'Machine':ELFMACHINE.get(header.e_machine,"%#x" % header.e_machine),#string
+                  'Version':'{:#x}'.format(header.e_version),# hex int
+                  'Entry point address':'{:#x}'.format(header.e_entry),# hex int
+                  'Start of program headers':header.e_phoff,# oct int
+                  'Start of section headers':header.e_shoff,# oct int
+                'Flags':'{:#x}'.format(header.e_flags),# hex int
+                'Size of this header': header.e_ehsize,# oct int
+                'Size of program headers': header.e_phentsize,#oct int
+                'Number of program headers':header.e_phnum,#oct int
+                'Size of section headers': header.e_shentsize,#oct int
+                'Number of section headers':header.e_shnum,#oct int
+                'Section header string table index':header.e_shstrndx,#oct int
+        }
+
+
+
+    def PrintELFShdr(self):
+        ELF32title = '[{:>2s}] {:<20s} {:<16s} {:<8s} {:<6s} {:<6s} {:>2s} {:>3s} {:>2s} {:>3s} {:>2s}'
+        ELF32content = '[{:2d}] {:<20s} {:<16s} {:0>8x} {:0>6x} {:0>6x} {:0>2x} {:>3s} {:>2d} {:>3d} {:>2d}'
+        ELF64title = '[{:>2s}] {:<16s} {:<16s} {:>16s} {:<8s}\n     {:<16s} {:<16s} {:>6s} {:>4s} {:>4s} {:>6s}'
+        ELF64content = '[{:2d}] {:<16s} {:<16s} {:0>16x} {:0>8x}\n     {:0>16x} {:0>16x} {:>6s} {:>4d} {:>4d} {:>6d}'        
+        #print('There are {:d} section headers, starting at offset {:#x}:\n\nSection Headers:').format(self.header.e_shnum,self.header.e_shoff)
+        if self.e_ident.is32bit():
+            title, content= ELF32title,ELF32content   
+        elif self.e_ident.is64bit():
+            title, content= ELF64title,ELF64content
+        else:
+            return
+
+        print(title.format('Nr','Name','Type','Addr','Off','Size','ES','Flg','Lk','Inf','Al'))
+        for i in range(0,len(self.section_headers)):
+            shdr = self.section_headers[i]
+            sh_name = self.section_names[i]
+            sh_flags = ''.join([mark for flag,mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
+            print(content.format(i,sh_name,ELFSHTYPE.get(shdr.sh_type,"%#x" % shdr.sh_type),shdr.sh_addr,shdr.sh_offset,shdr.sh_size,shdr.sh_entsize,sh_flags,shdr.sh_link,shdr.sh_info,shdr.sh_addralign))
+
+    def OutputELFShdr(self):
+        output = []
+
+        if self.e_ident.is32bit():
+            for i,shdr in enumerate(self.section_headers):
+                #shdr = self.section_headers[i]
+                sh_name = self.section_names[i]
+                sh_flags = ''.join([mark for flag, mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
+                output.append(
+                    {'Name': sh_name,
+                     'Type': ELFSHTYPE.get(shdr.sh_type, "%#x" % shdr.sh_type),
+                     'Addr': '{:0>8x}'.format(shdr.sh_addr), # hex int
+                     'Off': '{:0>6x}'.format(shdr.sh_offset), # hex int
+                     'Size': '{:0>6x}'.format(shdr.sh_size), # hex int
+                     'ES': '{:0>2x}'.format(shdr.sh_entsize), # hex int
+                     'Flg': sh_flags,# string
+                     'Lk': shdr.sh_link, # oct int
+                     'Inf': shdr.sh_info, # oct int
+                     'Al': shdr.sh_addralign}) #oct int
+        elif self.e_ident.is64bit():
+            for i,shdr in enumerate(self.section_headers):
+                #shdr = self.section_headers[i]
+                sh_name = self.section_names[i]
+                sh_flags = ''.join([mark for flag, mark in ELFSHFLAG.items() if shdr.sh_flags & flag])
+                output.append(
+                    {'Name': sh_name,
+                     'Type': ELFSHTYPE.get(shdr.sh_type, "%#x" % shdr.sh_type),
+                     'Addr': '{:0>16x}'.format(shdr.sh_addr), # hex int
+                     'Off': '{:0>8x}'.format(shdr.sh_offset), # hex int
+                     'Size': '{:0>16x}'.format(shdr.sh_size), # hex int
+                     'ES': '{:0>16x}'.format(shdr.sh_entsize), # hex int
+                     'Flg': sh_flags, # string
+                     'Lk': shdr.sh_link, # oct int
+                     'Inf': shdr.sh_info, # oct int
+                     'Al': shdr.sh_addralign}) #oct int
+        else:
+            return
+        return output
+
+    def PrintELFPhdr(self):
+        #print('Elf file type is {:s}').format(ELFTYPE[self.header.e_type],)
+        #print('Entry point {:#x}').format(self.header.e_entry,)
+        #print('There are {:d} program headers, starting at offset {:d}\n\nProgram Headers:').format(self.header.e_phnum,self.header.e_phoff)
+        ELF32title = '{:<14s} {:<8s} {:<10s} {:<10s} {:<7s} {:<7s} {:<3s} {:<6s}'
+        ELF32content = '{:<14s} 0x{:0>6x} 0x{:0>8x} 0x{:0>8x} 0x{:0>5x} 0x{:0>5x} {:<3s} 0x{:<4x}'
+        ELF64title = '{:<14s} {:<18s} {:<18s} {:<18s} \n               {:<18s} {:<18s} {:<6s} {:<6s}'
+        ELF64content = '{:<14s} 0x{:0>16x} 0x{:0>16x} 0x{:0>16x} \n               0x{:0>16x} 0x{:0>16x} {:<6s} {:<6x}'
+
+        if self.e_ident.is32bit():
+            title,content = ELF32title, ELF32content
+        elif self.e_ident.is64bit():
+            title, content= ELF64title,ELF64content
+        else:
+            return
+
+        print(title.format('Type','Offset','VirtAddr','PhysAddr','FileSiz','MemSiz','Flg','Align'))
+        for i in range(0,len(self.segment_headers)):
+            phdr = self.segment_headers[i]
+            ph_flags = ''.join([mark for flag,mark in ELFPHFLAG.items() if phdr.p_flags & flag])
+            print(content.format(ELFPHTYPE.get(phdr.p_type,self.elfphdrtype(phdr.p_type)),phdr.p_offset,phdr.p_vaddr,phdr.p_paddr,phdr.p_filesz,phdr.p_memsz,ph_flags,phdr.p_align))
+            
+            if phdr.p_type == PT_INTERP:
+                print ("\t[Requesting program interpreter: %s]" % self.readstr(offset = phdr.p_offset,size = phdr.p_filesz))
+
+        print('\nSection to Segment mapping:\nSegment Sections...')
+        for index,sections in enumerate(self.section2segment_result):
+            print('{:0>2d}    {:s}'.format(index," ".join(sections)))
+
+    def OutputELFPhdr(self):
+        output = []
+
+        if self.e_ident.is32bit():
+            for i,phdr in enumerate(self.segment_headers):
+                ph_flags = ''.join([mark for flag, mark in ELFPHFLAG.items() if phdr.p_flags & flag])
+
+                output.append(
+                    {'Type':ELFPHTYPE.get(phdr.p_type, self.elfphdrtype(phdr.p_type)), #string
+                     'Offset':'0x{:0>6x}'.format(phdr.p_offset), #hex
+                     'VirtAddr':'0x{:0>8x}'.format(phdr.p_vaddr),#hex
+                     'PhysAddr':'0x{:0>8x}'.format(phdr.p_paddr),#hex
+                     'FileSiz':'0x{:0>5x}'.format(phdr.p_filesz),#hex
+                     'MemSiz':'0x{:0>5x}'.format(phdr.p_memsz),#hex
+                     'Flg':ph_flags, #string
+                     'Align':'0x{:<4x}'.format(phdr.p_align)})#hex
+        elif self.e_ident.is64bit():
+            for i,phdr in enumerate(self.segment_headers):
+                ph_flags = ''.join([mark for flag, mark in iter(ELFPHFLAG.items()) if phdr.p_flags & flag])
+                output.append(
+                    {'Type':ELFPHTYPE.get(phdr.p_type, self.elfphdrtype(phdr.p_type)),
+                     'Offset':'0x{:0>16x}'.format(phdr.p_offset),
+                     'VirtAddr':'0x{:0>16x}'.format(phdr.p_vaddr),
+                     'PhysAddr':'0x{:0>16x}'.format(phdr.p_paddr),
+                     'FileSiz':'0x{:0>16x}'.format(phdr.p_filesz),
+                     'MemSiz':'0x{:0>16x}'.format(phdr.p_memsz),
+                     'Flg':ph_flags,
+                     'Align':'0x{:<6x}'.format(phdr.p_align)})
+        else:
+            return
+        return output
+        
+
+
+    def OutputELFSymbols(self):
+        # {section name: [symbol, ...]} of every .symtab / .dynsym
+        output = {}
+        value_format = '%016x' if self.e_ident.is64bit() else '%08x'
+        # st_info -> (type, bind), st_shndx -> Ndx, looked up instead of formatted per symbol
+        info = [(ELFSTTYPE.get(i & 0xf, "%#x" % (i & 0xf)), ELFSTBIND.get(i >> 4, "%#x" % (i >> 4))) for i in range(256)]
+        special = {SHN_UNDEF:'UND', SHN_ABS:'ABS', SHN_COMMON:'COM'}
+        for index in self.sections_of_type(SHT_SYMTAB, SHT_DYNSYM):
+            strtab = self.strtab(self.section_headers[index].sh_link)
+            symbols = []
+            for symbol in self.symbols(index):
+                st_type, st_bind = info[symbol.st_info]
+                symbols.append(
+                    {'Name': strtab.get(symbol.st_name), # string
+                     'Value': value_format % symbol.st_value, # hex int
+                     'Size': symbol.st_size, # oct int
+                     'Type': st_type, # string
+                     'Bind': st_bind, # string
+                     'Ndx': special.get(symbol.st_shndx, symbol.st_shndx)}) # string / oct int
+            output[self.section_names[index]] = symbols
+        return output
+
+    def OutputELFDynamic(self):
+        output = []
+        for entry in self.dynamic:
+            if entry.d_tag in DT_STRING_TAGS:
+                value = self.dynamic_strtab.get(entry.d_val) # string
+            else:
+                value = '{:#x}'.format(entry.d_val) # hex int
+            output.append({'Tag':ELFDTAG.get(entry.d_tag, "%#x" % entry.d_tag), 'Value':value})
+        return output
+
+    def OutputELFRelocations(self):
+        # one summary per relocation section, entries are far too many to list
+        output = []
+        for index in self.sections_of_type(SHT_REL, SHT_RELA):
+            section = self.section_headers[index]
+            relocations = self.relocations(index)
+            names = set()
+            link = section.sh_link
+            if link and link < len(self.section_headers) and self.section_headers[link].sh_type in (SHT_SYMTAB, SHT_DYNSYM):
+                symbols = self.symbols(link)
+                strtab = self.strtab(self.section_headers[link].sh_link)
+                for r_sym in set(relocation.r_sym for relocation in relocations):
+                    if 0 < r_sym < len(symbols) and symbols[r_sym].st_name:
+                        names.add(strtab.get(symbols[r_sym].st_name))
+            output.append(
+                {'Name': self.section_names[index], # string
+                 'Type': ELFSHTYPE[section.sh_type], # string
+                 'Count': len(relocations), # oct int
+                 'Symbols': sorted(names)}) # list
+        return output
+
+    def Print(self):
+        self.PrintELFHeader()
+        self.PrintELFShdr()
+        print(Section_FLag_info)
+        self.PrintELFPhdr()
+
+
+
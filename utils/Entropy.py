@@ -0,0 +1,118 @@
+# Byte statistics (Shannon entropy, histogram summary, md5) of file regions.
+# Everything runs on zero-copy memoryview slices with NumPy bincount.
+
+import hashlib
+
+import numpy
+
+# bincount widens its input to intp, count in chunks to keep the temporary small
+CHUNK_SIZE = 4 * 1024 * 1024
+# below this the 64K pair table costs more than it saves
+PAIR_MIN_SIZE = 64 * 1024
+# above this many region boundaries the prefix table gets too large
+MAX_BOUNDS = 8192
+
+PRINTABLE = numpy.zeros(256, dtype = bool)
+PRINTABLE[0x20:0x7f] = True
+PRINTABLE[[0x09, 0x0a, 0x0d]] = True
+
+def byte_counts(data):
+    array = numpy.frombuffer(data, dtype = numpy.uint8)
+    if len(array) < PAIR_MIN_SIZE:
+        return numpy.bincount(array, minlength = 256).astype(numpy.int64)
+    # count byte pairs as uint16, half the elements for bincount to widen,
+    # then fold the 256x256 table back into low byte + high byte counts
+    even = len(array) & ~1
+    pairs = numpy.zeros(65536, dtype = numpy.int64)
+    for start in range(0, even, CHUNK_SIZE):
+        pairs += numpy.bincount(array[start:min(start + CHUNK_SIZE, even)].view(numpy.uint16), minlength = 65536)
+    pairs = pairs.reshape(256, 256)
+    counts = pairs.sum(axis = 0) + pairs.sum(axis = 1)
+    if even < len(array):
+        counts[array[-1]] += 1
+    return counts
+
+def entropy(counts):
+    # bits per byte, 0.0 - 8.0
+    total = counts.sum()
+    if not total:
+        return 0.0
+    p = counts[counts > 0] / total
+    return float(-(p * numpy.log2(p)).sum())
+
+def histogram_summary(counts):
+    total = float(counts.sum()) or 1.0
+    return {
+        'zero':round(float(counts[0]) / total, 4),                     # 0x00 ratio
+        'printable':round(float(counts[PRINTABLE].sum()) / total, 4),  # ascii text ratio
+        'high':round(float(counts[0x80:].sum()) / total, 4),           # 0x80-0xff ratio
+        'unique':int((counts > 0).sum()),                              # distinct byte values
+        'top':int(counts.argmax()),                                    # most common byte
+    }
+
+class RegionStats(object):
+    '''
+    Statistics of many, possibly overlapping, regions of one buffer.
+    The buffer is cut at every region boundary and each piece is counted
+    once, a region histogram is then the difference of two prefix sums.
+    '''
+
+    def __init__(self,data,regions,max_hash_bytes = None):
+        # regions: [(offset, size), ...]
+        # max_hash_bytes: md5 budget, crafted tables can repeat a huge region many times
+        self.data = memoryview(data)
+        self.hash_budget = max_hash_bytes
+        self.hash_skipped = 0
+        self.size = len(self.data)
+        bounds = set([0, self.size])
+        for offset, size in regions:
+            start, end = self.clamp(offset, size)
+            bounds.add(start)
+            bounds.add(end)
+        self.prefix = None
+        # segments often span exactly one section, hash each range once
+        self.digests = {}
+        if len(bounds) <= MAX_BOUNDS:
+            bounds = sorted(bounds)
+            self.index = dict((bound, i) for i, bound in enumerate(bounds))
+            self.prefix = numpy.zeros((len(bounds), 256), dtype = numpy.int64)
+            for i in range(1, len(bounds)):
+                self.prefix[i] = self.prefix[i - 1] + byte_counts(self.data[bounds[i - 1]:bounds[i]])
+
+    def clamp(self,offset,size):
+        start = min(max(offset, 0), self.size)
+        return start, min(start + max(size, 0), self.size)
+
+    def counts(self,offset,size):
+        start, end = self.clamp(offset, size)
+        if self.prefix is None:
+            return byte_counts(self.data[start:end])
+        return self.prefix[self.index[end]] - self.prefix[self.index[start]]
+
+    def stats(self,offset,size):
+        start, end = self.clamp(offset, size)
+        if start == end:
+            return {'Entropy':None, 'MD5':None, 'Histogram':None}
+        counts = self.counts(offset, size)
+        return {
+            'Entropy':round(entropy(counts), 4),
+            'MD5':self.md5(start, end),
+            'Histogram':histogram_summary(counts),
+        }
+
+    def md5(self,start,end):
+        if (start, end) not in self.digests:
+            if self.hash_budget is not None:
+                if end - start > self.hash_budget:
+                    self.hash_skipped += 1
+                    return None
+                self.hash_budget -= end - start
+            self.digests[(start, end)] = hashlib.md5(self.data[start:end]).hexdigest()
+        return self.digests[(start, end)]
+
+    def entropy(self):
+        # whole buffer
+        return round(entropy(self.counts(0, self.size)), 4)
+
+    def close(self):
+        self.data.release()
@@ -0,0 +1,80 @@
+# Streaming multi-digest engine.
+# The sample is read once in fixed-size chunks and every chunk is fed to all
+# requested digests, so memory use does not depend on the sample size.
+
+import binascii
+import hashlib
+
+import ssdeep
+
+DEFAULT_HASH_TYPES = ['md5', 'sha1', 'sha256', 'sha512', 'crc32', 'ssdeep']
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+class CRC32(object):
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = binascii.crc32(data, self.value)
+
+    def hexdigest(self):
+        return '%x' % (self.value & 0xffffffff)
+
+class SSDeep(object):
+
+    def __init__(self):
+        self.handle = ssdeep.Hash()
+
+    def update(self, data):
+        # ssdeep binding only takes bytes
+        self.handle.update(bytes(data))
+
+    def hexdigest(self):
+        return self.handle.digest()
+
+def new(hash_type):
+    if hash_type == 'crc32':
+        return CRC32()
+    if hash_type == 'ssdeep':
+        return SSDeep()
+    # 'md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512' ...
+    return hashlib.new(hash_type)
+
+def parse_hash_types(value):
+    # "md5, sha256,crc32" -> ['md5', 'sha256', 'crc32']
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+class Hasher(object):
+
+    def __init__(self, hash_types = DEFAULT_HASH_TYPES, chunk_size = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.handles = {}
+        for hash_type in hash_types:
+            self.handles[hash_type] = new(hash_type)
+
+    def update(self, data):
+        for handle in self.handles.values():
+            handle.update(data)
+
+    def update_from_file(self, filepath):
+        with open(filepath, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b''):
+                self.update(chunk)
+
+    def update_from_buffer(self, data):
+        # bytes / mmap / memoryview already in memory, fed in zero-copy slices
+        data = memoryview(data)
+        for start in range(0, len(data), self.chunk_size):
+            self.update(data[start:start + self.chunk_size])
+
+    def hexdigests(self):
+        return dict((hash_type, handle.hexdigest()) for hash_type, handle in self.handles.items())
+
+    def hash_file(self, filepath):
+        self.update_from_file(filepath)
+        return self.hexdigests()
+
+    def hash_buffer(self, data):
+        self.update_from_buffer(data)
+        return self.hexdigests()
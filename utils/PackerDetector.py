@@ -0,0 +1,86 @@
+# Packer detection on the in-memory sample, without running upx.
+# UPX: l_info / PackHeader "UPX!" magic, UPX section names, "$Id: UPX x.yy" banner
+# others: YARA rules from [basic] PackerSign_Path
+
+import os
+import re
+import struct
+
+import yara
+
+UPX_MAGIC = b'UPX!'
+UPX_SECTION_NAMES = ('UPX0', 'UPX1', 'UPX2', '.UPX0', '.UPX1')
+UPX_BANNER = re.compile(rb'\$Id: UPX (\d+\.\d+[\w.]*)')
+# the PackHeader sits in the last bytes of a packed ELF
+UPX_TRAILER_SIZE = 4096
+# PackHeader "UPX!" version format method level ..., ranges upx itself accepts
+UPX_VERSIONS = range(1, 15)
+UPX_FORMATS = range(1, 64)
+UPX_METHODS = range(2, 17)         # nrv2b .. lzma, deflate, zstd
+UPX_LEVELS = range(1, 11)
+
+class PackerDetector(object):
+
+    def __init__(self,rules_path = None):
+        self.rules = None
+        if rules_path and os.path.isfile(rules_path):
+            self.rules = yara.compile(filepath = rules_path)
+
+    def detect(self,data,section_names = ()):
+        '''
+        data: bytes / mmap of the whole sample
+        return {'name':'upx','version':'3.96','evidence':[...]} or None
+        '''
+        packer = self.detect_upx(data,section_names)
+        if packer is None and self.rules is not None:
+            packer = self.detect_yara(data)
+        return packer
+
+    def detect_upx(self,data,section_names = ()):
+        evidence = []
+        # ELF: l_info {l_checksum, l_magic, l_lsize, l_version, l_format} follows the program headers
+        # ELF64 / ELF32 header size
+        if data[:4] == b'\x7fELF' and len(data) >= (64 if data[4] == 2 else 52):
+            endian = '>' if data[5] == 2 else '<'
+            if data[4] == 2:
+                phoff, = struct.unpack_from(endian + 'Q', data, 32)
+                phentsize, phnum = struct.unpack_from(endian + 'HH', data, 54)
+            else:
+                phoff, = struct.unpack_from(endian + 'I', data, 28)
+                phentsize, phnum = struct.unpack_from(endian + 'HH', data, 42)
+            l_info = phoff + phentsize * phnum
+            if data[l_info + 4:l_info + 8] == UPX_MAGIC:
+                evidence.append('l_info')
+        if self.find_packheader(data) is not None:
+            evidence.append('packheader')
+        if any(name in UPX_SECTION_NAMES for name in section_names):
+            evidence.append('sections')
+
+        # the banner alone only gives the version, unpacked files may quote it too
+        if not evidence:
+            return None
+        banner = UPX_BANNER.search(data)
+        if banner:
+            evidence.append('banner')
+        return {'name':'upx', 'version':banner.group(1).decode() if banner else None, 'evidence':evidence}
+
+    def find_packheader(self,data):
+        # offset of the last "UPX!" in the trailer followed by a plausible PackHeader,
+        # the string alone is quoted by unpacked files too
+        start = max(0, len(data) - UPX_TRAILER_SIZE)
+        offset = data.rfind(UPX_MAGIC, start)
+        while offset != -1:
+            if offset + 8 <= len(data):
+                version, format, method, level = bytearray(data[offset + 4:offset + 8])
+                if version in UPX_VERSIONS and format in UPX_FORMATS and method in UPX_METHODS and level in UPX_LEVELS:
+                    return offset
+            offset = data.rfind(UPX_MAGIC, start, offset)
+        return None
+
+    def detect_yara(self,data):
+        # rule meta: packer = "name", version = "x.y"; falls back to the rule name
+        matches = self.rules.match(data = data)
+        if not matches:
+            return None
+        match = matches[0]
+        return {'name':match.meta.get('packer', match.rule), 'version':match.meta.get('version'), 'evidence':['yara:%s' % (match.rule,)]}
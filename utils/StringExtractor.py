@@ -0,0 +1,89 @@
+# In-process replacement for strings(1).
+# Scans a memory-mapped sample once and reports ASCII, UTF-16LE and UTF-16BE
+# strings together with their file offsets.
+
+import mmap
+import os
+import re
+
+DEFAULT_MIN_LENGTH = 4
+DEFAULT_MAX_COUNT = 100000
+
+# printable characters as strings(1) sees them: tab and 0x20-0x7e
+PRINTABLE = rb'[\t\x20-\x7e]'
+
+class StringExtractor(object):
+
+    def __init__(self, min_length = DEFAULT_MIN_LENGTH, max_count = DEFAULT_MAX_COUNT, byteorder = None):
+        self.min_length = max(1, min_length)
+        self.max_count = max_count
+        # 'little' / 'big' / None (guess from the ELF ident)
+        self.byteorder = byteorder
+        # factored so every position is tried against a single branch point:
+        # group 1 utf-16be, group 2 ascii, group 3 utf-16le
+        self.pattern = re.compile(rb'(\x00%s(?:\x00%s){%d,})|%s(?:(%s{%d,})|(\x00(?:%s\x00){%d,}))' % (
+            PRINTABLE, PRINTABLE, self.min_length - 1, PRINTABLE, PRINTABLE, self.min_length - 1, PRINTABLE, self.min_length - 1))
+        # utf-16le from a given offset, the last character of an ascii match can start one
+        self.le_pattern = re.compile(rb'(?:%s\x00){%d,}' % (PRINTABLE, self.min_length))
+
+    def guess_byteorder(self, data):
+        # EI_DATA: 1 little endian, 2 big endian
+        if data[:4] == b'\x7fELF' and len(data) > 5 and data[5] == 2:
+            return 'big'
+        return 'little'
+
+    def le_end(self, data, start, end):
+        '''
+        a UTF-16BE match \0 c1 \0 c2 ... \0 cn read from start + 1: c1 \0 ... c(n-1) \0,
+        plus cn when a NUL follows the match
+        return end of that UTF-16LE string, or None when it is shorter than min_length
+        '''
+        le_end = end + 1 if end < len(data) and data[end] == 0 else end - 1
+        if (le_end - start - 1) // 2 < self.min_length:
+            return None
+        return le_end
+
+    def extract(self, data):
+        '''
+        data: bytes / mmap / memoryview
+        return {'ascii':[{'offset':0x40,'string':'...'},...],'unicode':[...],'unicode_be':[...]}
+        '''
+        result = {'ascii':[], 'unicode':[], 'unicode_be':[]}
+        byteorder = self.byteorder or self.guess_byteorder(data)
+        count = 0
+        # end of a utf-16le string found behind an ascii match, matches inside it are skipped
+        skip = 0
+        for match in self.pattern.finditer(data):
+            if count >= self.max_count:
+                break
+            start, end = match.span()
+            if start < skip:
+                continue
+            if match.lastindex == 2:
+                result['ascii'].append({'offset':start, 'string':match.group(0).decode('ascii')})
+                # "goliY\0Z\0c\0e\0": the ascii match took the first character of a utf-16le string
+                if byteorder == 'little' and end < len(data) and data[end] == 0:
+                    le = self.le_pattern.match(data, end - 1)
+                    if le:
+                        result['unicode'].append({'offset':end - 1, 'string':le.group(0).decode('utf-16-le')})
+                        skip = le.end()
+                        count += 1
+            elif match.lastindex == 3:
+                result['unicode'].append({'offset':start, 'string':match.group(0).decode('utf-16-le')})
+            elif byteorder == 'little' and self.le_end(data, start, end):
+                # "\0a\0b\0c\0d" reads as UTF-16BE from the first byte or as
+                # UTF-16LE from the second one; trust the sample byte order
+                le_end = self.le_end(data, start, end)
+                result['unicode'].append({'offset':start + 1, 'string':bytes(data[start + 1:le_end]).decode('utf-16-le')})
+            else:
+                result['unicode_be'].append({'offset':start, 'string':match.group(0).decode('utf-16-be')})
+            count += 1
+        return result
+
+    def extract_file(self, filepath):
+        with open(filepath, 'rb') as file:
+            # an empty file can not be mapped
+            if os.fstat(file.fileno()).st_size == 0:
+                return self.extract(b'')
+            with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                return self.extract(data)